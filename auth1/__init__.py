@@ -7,20 +7,77 @@ from ._types import (
     Guard,
     StatefullGuard,
     AuthFactory,
+    Hasher,
+    ThrottleBackend,
     Session,
     SessionHandler,
-    SessionSerializer
+    SessionSerializer,
+    SessionIndex,
+    SessionInfo,
+    Instrument,
+    Request
 )
 
 from ._manager import AuthManager
-from ._guards import SessionGuard
-from ._user import GenericUser
+from ._config import ConfigError, AuthConfig, GuardConfig, compile_auth_config
+from ._guards import (
+    SessionGuard,
+    TokenGuard,
+    SignedTokenGuard,
+    BasicAuthGuard,
+    ChainGuard,
+    ChainStats,
+    hash_token
+)
+from ._user import GenericUser, TokenUser, SlotUser, make_user_class
+from ._hashing import PBKDF2Hasher, CalibrationResult, calibrate_pbkdf2
+from ._throttle import InMemoryThrottleBackend, LoginThrottler, ThrottleStats
+from ._recaller import Recaller
+from ._cache import TTLCache
+from ._signing import SignedTokenCodec, InvalidTokenError
+from ._gate import Gate, UserGate, AuthorizationError
+from ._permissions import (
+    HasPermissions,
+    PermissionRegistry,
+    has_all,
+    has_any,
+    store_permission_mask,
+    load_permission_mask
+)
+from ._middleware import AuthenticateMiddleware, LazyUser, ScopeRequest, ProfileMiddleware, TenantMiddleware
+from ._tenant import TenantAuthManager
+from ._profiler import SlowRequestProfiler, SlowRequest
+from ._offload import Offloader, OffloadStats, nonblocking
+from ._instrument import (
+    NullInstrument,
+    HistogramCollector,
+    OperationStats,
+    prometheus_text
+)
 from ._random import random_string, set_random_string_factory
 
 from ._session import (
     SessionStore,
     NullSessionHandler,
     JSONSerializer,
+    InMemorySessionIndex,
+    HashRing,
+    ShardedSessionHandler,
+    SessionUnavailableError,
+    CircuitBreaker,
+    BreakerStats,
+    ResilienceStats,
+    ResilientSessionHandler,
+    TransferStats,
+    supports_scan,
+    scan_sessions,
+    export_sessions,
+    import_sessions,
+    SessionBudget,
+    SessionTooLargeError,
+    BudgetStats,
+    SessionConfig,
+    compile_session_config,
     SessionManager
 )
 
@@ -34,15 +91,86 @@ __all__ = [
     "StatefullGuard",
     "AuthFactory",
     "AuthManager",
+    "TenantAuthManager",
+    "TenantMiddleware",
+    "ConfigError",
+    "AuthConfig",
+    "GuardConfig",
+    "compile_auth_config",
+    "SessionConfig",
+    "compile_session_config",
+    "AuthenticateMiddleware",
+    "LazyUser",
+    "ScopeRequest",
+    "ProfileMiddleware",
+    "SlowRequestProfiler",
+    "SlowRequest",
+    "Gate",
+    "UserGate",
+    "AuthorizationError",
+    "HasPermissions",
+    "PermissionRegistry",
+    "has_all",
+    "has_any",
+    "store_permission_mask",
+    "load_permission_mask",
     "SessionGuard",
+    "TokenGuard",
+    "SignedTokenGuard",
+    "BasicAuthGuard",
+    "ChainGuard",
+    "ChainStats",
+    "SignedTokenCodec",
+    "InvalidTokenError",
+    "hash_token",
+    "TTLCache",
+    "Request",
     "Session",
     "SessionStore",
     "SessionHandler",
     "NullSessionHandler",
     "SessionSerializer",
     "JSONSerializer",
+    "SessionIndex",
+    "SessionInfo",
+    "InMemorySessionIndex",
+    "HashRing",
+    "ShardedSessionHandler",
+    "SessionUnavailableError",
+    "CircuitBreaker",
+    "BreakerStats",
+    "ResilienceStats",
+    "ResilientSessionHandler",
+    "TransferStats",
+    "supports_scan",
+    "scan_sessions",
+    "export_sessions",
+    "import_sessions",
+    "SessionBudget",
+    "SessionTooLargeError",
+    "BudgetStats",
     "SessionManager",
     "GenericUser",
+    "TokenUser",
+    "SlotUser",
+    "make_user_class",
+    "Hasher",
+    "PBKDF2Hasher",
+    "CalibrationResult",
+    "calibrate_pbkdf2",
+    "ThrottleBackend",
+    "InMemoryThrottleBackend",
+    "LoginThrottler",
+    "ThrottleStats",
+    "Recaller",
+    "Offloader",
+    "nonblocking",
+    "Instrument",
+    "NullInstrument",
+    "HistogramCollector",
+    "OperationStats",
+    "prometheus_text",
+    "OffloadStats",
     "random_string",
     "set_random_string_factory"
 ]
@@ -0,0 +1,106 @@
+import argparse
+import asyncio
+import importlib
+import sys
+import typing as t
+
+from ._hashing import calibrate_pbkdf2
+from ._types import SessionHandler
+from ._session import export_sessions, import_sessions
+
+
+def _calibrate(args: argparse.Namespace) -> int:
+    result = calibrate_pbkdf2(
+        target_seconds=args.target_ms / 1000.0,
+        logins_per_second=args.logins_per_second,
+        digest=args.digest
+    )
+
+    print(f"digest:            {args.digest}")
+    print(f"iterations:        {result.iterations}")
+    print(f"verify latency:    {result.verify_seconds * 1000:.1f} ms")
+    print(f"logins/sec/core:   {result.logins_per_second:.1f}")
+    print()
+    print(f"PBKDF2Hasher(iterations={result.iterations}, digest=\"{args.digest}\")")
+
+    return 0
+
+
+def _load_handler(path: str) -> SessionHandler:
+    module_name, _, attribute = path.partition(":")
+
+    if not attribute:
+        raise SystemExit(f"--handler must look like module:attribute, got `{path}`")
+
+    handler = getattr(importlib.import_module(module_name), attribute)
+
+    # a factory builds the handler, so it can read its own settings
+    if not isinstance(handler, SessionHandler):
+        handler = handler()
+
+    return t.cast(SessionHandler, handler)
+
+
+def _export(args: argparse.Namespace) -> int:
+    handler = _load_handler(args.handler)
+
+    if args.output == "-":
+        stats = asyncio.run(export_sessions(handler, sys.stdout.buffer, args.batch_size))
+    else:
+        with open(args.output, "wb") as f:
+            stats = asyncio.run(export_sessions(handler, f, args.batch_size))
+
+    print(f"exported {stats.records} sessions, {stats.offset} bytes", file=sys.stderr)
+
+    return 0
+
+
+def _import(args: argparse.Namespace) -> int:
+    handler = _load_handler(args.handler)
+
+    if args.input == "-":
+        stats = asyncio.run(import_sessions(handler, sys.stdin.buffer, args.workers, args.batch_size, args.checkpoint))
+    else:
+        with open(args.input, "rb") as f:
+            stats = asyncio.run(import_sessions(handler, f, args.workers, args.batch_size, args.checkpoint))
+
+    print(f"imported {stats.records} sessions, {stats.offset} bytes", file=sys.stderr)
+
+    return 0
+
+
+def main(argv: t.List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m auth1")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    calibrate = subparsers.add_parser("calibrate", help="recommend password hashing parameters for this host")
+    calibrate.add_argument("--target-ms", type=float, default=250.0, help="target verify latency in milliseconds")
+    calibrate.add_argument("--logins-per-second", type=float, default=None, help="logins per second one core must sustain")
+    calibrate.add_argument("--digest", default="sha256")
+    calibrate.set_defaults(func=_calibrate)
+
+    export = subparsers.add_parser("export", help="stream every session of a handler to a file")
+    export.add_argument("--handler", required=True, help="module:attribute of a session handler or a factory for one")
+    export.add_argument("-o", "--output", default="-", help="file to write, - for stdout")
+    export.add_argument("--batch-size", type=int, default=100)
+    export.set_defaults(func=_export)
+
+    import_ = subparsers.add_parser("import", help="write exported sessions into a handler")
+    import_.add_argument("--handler", required=True, help="module:attribute of a session handler or a factory for one")
+    import_.add_argument("-i", "--input", default="-", help="file to read, - for stdin")
+    import_.add_argument("--workers", type=int, default=4, help="concurrent writes")
+    import_.add_argument("--batch-size", type=int, default=100)
+    import_.add_argument("--checkpoint", default=None, help="file recording progress, an interrupted import resumes from it")
+    import_.set_defaults(func=_import)
+
+    args = parser.parse_args(argv)
+
+    # resuming seeks back into the input, which stdin can not do
+    if args.command == "import" and args.checkpoint is not None and args.input == "-":
+        import_.error("--checkpoint needs a file given with --input, stdin can not be resumed")
+
+    return t.cast(int, args.func(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
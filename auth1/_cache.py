@@ -0,0 +1,56 @@
+import time
+import threading
+import typing as t
+from collections import OrderedDict
+
+_K = t.TypeVar("_K")
+_V = t.TypeVar("_V")
+
+
+class TTLCache(t.Generic[_K, _V]):
+
+    def __init__(self, ttl: float = 30.0, maxsize: int = 10000, clock: t.Callable[[], float] = time.monotonic) -> None:
+        self._ttl = ttl
+        self._maxsize = maxsize
+        self._clock = clock
+        self._entries: "OrderedDict[_K, t.Tuple[float, _V]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: _K) -> _V | None:
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+
+        if expires_at <= self._clock():
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+
+        return value
+
+    def set(self, key: _K, value: _V) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock() + self._ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: _K) -> _V | None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return None if entry is None else entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
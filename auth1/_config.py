@@ -0,0 +1,114 @@
+import types
+import typing as t
+
+
+class ConfigError(RuntimeError):
+    pass
+
+
+class GuardConfig(t.NamedTuple):
+    name: str
+    driver: str
+    options: t.Mapping[str, t.Any]
+    members: t.Tuple[str, ...] = ()
+    adaptive: bool = False
+    reorder_every: int = 100
+
+
+class AuthConfig(t.NamedTuple):
+    default_guard: str | None
+    guards: t.Mapping[str, GuardConfig]
+    raw: t.Mapping[str, t.Any]
+
+
+def freeze(data: t.Mapping[str, t.Any]) -> t.Mapping[str, t.Any]:
+    # all the way down, a nested options dict must not change under a
+    # compiled config either.
+    return types.MappingProxyType({key: _freeze_value(value) for key, value in data.items()})
+
+
+def _freeze_value(value: t.Any) -> t.Any:
+    if isinstance(value, t.Mapping):
+        return freeze(value)
+
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze_value(item) for item in value)
+
+    return value
+
+
+def _compile_guard(name: t.Any, guard_config: t.Any) -> GuardConfig:
+    if not isinstance(name, str):
+        raise ConfigError(f"Guard name `{name!r}` must be a string")
+
+    if not isinstance(guard_config, dict):
+        raise ConfigError(f"Guard `{name}` config must be a dict")
+
+    driver = guard_config.get("driver", None)
+
+    if not isinstance(driver, str) or not driver:
+        raise ConfigError(f"Guard `{name}` has no driver")
+
+    if driver != "chain":
+        return GuardConfig(name, driver, freeze(guard_config))
+
+    members = guard_config.get("guards", None)
+
+    if not isinstance(members, (list, tuple)) or not all(isinstance(member, str) for member in members):
+        raise ConfigError(f"Chain guard `{name}` needs a list of guard names")
+
+    if name in members:
+        raise ConfigError(f"Chain guard `{name}` can not contain itself")
+
+    reorder_every = guard_config.get("reorder_every", 100)
+
+    if not isinstance(reorder_every, int) or reorder_every < 1:
+        raise ConfigError(f"Chain guard `{name}` reorder_every must be a positive integer")
+
+    return GuardConfig(
+        name,
+        driver,
+        freeze(guard_config),
+        tuple(members),
+        bool(guard_config.get("adaptive", False)),
+        reorder_every
+    )
+
+
+def _check_chains(guards: t.Mapping[str, GuardConfig]) -> None:
+    for guard in guards.values():
+        for member in guard.members:
+            if member not in guards:
+                raise ConfigError(f"Chain guard `{guard.name}` refers to unknown guard `{member}`")
+
+    def visit(name: str, path: t.Tuple[str, ...]) -> None:
+        for member in guards[name].members:
+            if member in path:
+                raise ConfigError(f"Chain guard `{path[0]}` has a cycle through `{member}`")
+            visit(member, path + (member,))
+
+    for name, guard in guards.items():
+        if guard.members:
+            visit(name, (name,))
+
+
+def compile_auth_config(config: t.Mapping[str, t.Any]) -> AuthConfig:
+    if not isinstance(config, t.Mapping):
+        raise ConfigError("Auth config must be a dict")
+
+    raw_guards = config.get("guards", {})
+
+    if not isinstance(raw_guards, dict):
+        raise ConfigError("`guards` must be a dict")
+
+    guards = {name: _compile_guard(name, guard_config) for name, guard_config in raw_guards.items()}
+
+    _check_chains(guards)
+
+    defaults = config.get("defaults", {})
+    default_guard = defaults.get("guard", None) if isinstance(defaults, dict) else None
+
+    if default_guard is not None and default_guard not in guards:
+        raise ConfigError(f"Default guard `{default_guard}` is not configured")
+
+    return AuthConfig(default_guard, types.MappingProxyType(guards), freeze(config))
@@ -0,0 +1,245 @@
+import inspect
+import typing as t
+
+from ._types import Authenticatable
+
+AbilityResult = bool | None | t.Awaitable[bool | None]
+AbilityCallback = t.Callable[..., AbilityResult]
+
+_R = t.TypeVar("_R")
+_MISSING = object()
+
+
+class AuthorizationError(PermissionError):
+
+    def __init__(self, ability: str, message: str | None = None) -> None:
+        super().__init__(message or f"This action is unauthorized: `{ability}`")
+        self.ability = ability
+
+
+def _default_resource_key(resource: t.Any) -> t.Hashable:
+    try:
+        hash(resource)
+    except TypeError:
+        return _MISSING
+    return resource
+
+
+class Gate:
+
+    def __init__(self, resource_key: t.Callable[[t.Any], t.Hashable] | None = None) -> None:
+        self._abilities: t.Dict[str, AbilityCallback] = {}
+        self._policies: t.Dict[type, t.Any] = {}
+        self._before: t.List[AbilityCallback] = []
+        self._resource_key = resource_key or _default_resource_key
+
+    def define(self, ability: str) -> t.Callable[[AbilityCallback], AbilityCallback]:
+        def decorator(f: AbilityCallback) -> AbilityCallback:
+            self._abilities[ability] = f
+            return f
+        return decorator
+
+    def policy(self, resource_type: type) -> t.Callable[[type], type]:
+        def decorator(policy_cls: type) -> type:
+            self._policies[resource_type] = policy_cls()
+            return policy_cls
+        return decorator
+
+    def before(self, f: AbilityCallback) -> AbilityCallback:
+        self._before.append(f)
+        return f
+
+    def has(self, ability: str) -> bool:
+        return ability in self._abilities or any(hasattr(policy, ability) for policy in self._policies.values())
+
+    def for_user(self, user: Authenticatable | None) -> "UserGate":
+        return UserGate(self, user)
+
+    def allows(self, user: Authenticatable | None, ability: str, resource: t.Any = None) -> bool:
+        return self.for_user(user).allows(ability, resource)
+
+    async def async_allows(self, user: Authenticatable | None, ability: str, resource: t.Any = None) -> bool:
+        return await self.for_user(user).async_allows(ability, resource)
+
+    def _policy_for(self, resource: t.Any) -> t.Any:
+        if resource is None or not self._policies:
+            return None
+
+        for cls in type(resource).__mro__:
+            policy = self._policies.get(cls, None)
+            if policy is not None:
+                return policy
+
+        return None
+
+    def _callback(self, ability: str, resource: t.Any) -> AbilityCallback | None:
+        policy = self._policy_for(resource)
+
+        if policy is not None:
+            method = getattr(policy, ability, None)
+            if method is not None:
+                return t.cast(AbilityCallback, method)
+
+        return self._abilities.get(ability, None)
+
+    def _batch_callback(self, ability: str, resources: t.List[t.Any]) -> AbilityCallback | None:
+        # before hooks decide per resource, and mixed resources may belong
+        # to different policies, both fall back to one check per resource.
+        if self._before:
+            return None
+
+        resource_type = type(resources[0])
+
+        if any(type(resource) is not resource_type for resource in resources):
+            return None
+
+        policy = self._policy_for(resources[0])
+
+        if policy is None:
+            return None
+
+        return getattr(policy, f"{ability}_many", None)
+
+
+class UserGate:
+
+    def __init__(self, gate: Gate, user: Authenticatable | None) -> None:
+        self._gate = gate
+        self._user = user
+        self._decisions: t.Dict[t.Tuple[str, t.Hashable], bool] = {}
+
+    @property
+    def user(self) -> Authenticatable | None:
+        return self._user
+
+    def allows(self, ability: str, resource: t.Any = None) -> bool:
+        memo_key = self._memo_key(ability, resource)
+        decision = None if memo_key is None else self._decisions.get(memo_key, None)
+
+        if decision is not None:
+            return decision
+
+        for before in self._gate._before:
+            result = self._ensure_sync(before(self._user, ability, resource))
+            if result is not None:
+                return self._remember(memo_key, result)
+
+        callback = self._gate._callback(ability, resource)
+        result = False if callback is None else self._ensure_sync(self._invoke(callback, resource))
+
+        return self._remember(memo_key, result)
+
+    async def async_allows(self, ability: str, resource: t.Any = None) -> bool:
+        memo_key = self._memo_key(ability, resource)
+        decision = None if memo_key is None else self._decisions.get(memo_key, None)
+
+        if decision is not None:
+            return decision
+
+        for before in self._gate._before:
+            result = before(self._user, ability, resource)
+            if inspect.isawaitable(result):
+                result = await result
+            if result is not None:
+                return self._remember(memo_key, result)
+
+        callback = self._gate._callback(ability, resource)
+
+        if callback is None:
+            return self._remember(memo_key, False)
+
+        result = self._invoke(callback, resource)
+
+        if inspect.isawaitable(result):
+            result = await result
+
+        return self._remember(memo_key, result)
+
+    def denies(self, ability: str, resource: t.Any = None) -> bool:
+        return not self.allows(ability, resource)
+
+    async def async_denies(self, ability: str, resource: t.Any = None) -> bool:
+        return not await self.async_allows(ability, resource)
+
+    def authorize(self, ability: str, resource: t.Any = None) -> None:
+        if not self.allows(ability, resource):
+            raise AuthorizationError(ability)
+
+    async def async_authorize(self, ability: str, resource: t.Any = None) -> None:
+        if not await self.async_allows(ability, resource):
+            raise AuthorizationError(ability)
+
+    def allows_many(self, ability: str, resources: t.Sequence[t.Any]) -> t.List[bool]:
+        results = [self._memoized(ability, resource) for resource in resources]
+        pending = [index for index, decision in enumerate(results) if decision is None]
+
+        if pending:
+            batch_resources = [resources[i] for i in pending]
+            batch = self._gate._batch_callback(ability, batch_resources)
+
+            if batch is not None:
+                decisions = self._ensure_sync(batch(self._user, batch_resources))
+                for index, decision in zip(pending, decisions):
+                    results[index] = self._remember(self._memo_key(ability, resources[index]), decision)
+            else:
+                for index in pending:
+                    results[index] = self.allows(ability, resources[index])
+
+        return t.cast(t.List[bool], results)
+
+    async def async_allows_many(self, ability: str, resources: t.Sequence[t.Any]) -> t.List[bool]:
+        results = [self._memoized(ability, resource) for resource in resources]
+        pending = [index for index, decision in enumerate(results) if decision is None]
+
+        if pending:
+            batch_resources = [resources[i] for i in pending]
+            batch = self._gate._batch_callback(ability, batch_resources)
+
+            if batch is not None:
+                decisions = batch(self._user, batch_resources)
+                if inspect.isawaitable(decisions):
+                    decisions = await decisions
+                for index, decision in zip(pending, decisions):
+                    results[index] = self._remember(self._memo_key(ability, resources[index]), decision)
+            else:
+                for index in pending:
+                    results[index] = await self.async_allows(ability, resources[index])
+
+        return t.cast(t.List[bool], results)
+
+    def _memoized(self, ability: str, resource: t.Any) -> bool | None:
+        memo_key = self._memo_key(ability, resource)
+
+        if memo_key is None:
+            return None
+
+        return self._decisions.get(memo_key, None)
+
+    def _invoke(self, callback: AbilityCallback, resource: t.Any) -> AbilityResult:
+        if resource is None:
+            return callback(self._user)
+        return callback(self._user, resource)
+
+    def _memo_key(self, ability: str, resource: t.Any) -> t.Tuple[str, t.Hashable] | None:
+        if resource is None:
+            return (ability, None)
+
+        key = self._gate._resource_key(resource)
+
+        if key is _MISSING:
+            return None
+
+        return (ability, (type(resource), key))
+
+    def _remember(self, memo_key: t.Tuple[str, t.Hashable] | None, result: bool | None) -> bool:
+        decision = bool(result)
+        if memo_key is not None:
+            self._decisions[memo_key] = decision
+        return decision
+
+    def _ensure_sync(self, result: t.Awaitable[_R] | _R) -> _R:
+        if inspect.isawaitable(result):
+            if hasattr(result, "close"):
+                result.close()
+            raise ValueError("Cannot use awaitable return value from gate ability")
+        return result
@@ -1,5 +1,8 @@
 import typing as t
+import base64
+import binascii
 import hashlib
+import hmac
 import inspect
 
 from ._types import (
@@ -9,96 +12,501 @@ from ._types import (
     UserProvider,
     Session,
     Authenticatable,
-    AuthenticatableRetval
+    AuthenticatableRetval,
+    Guard,
+    Request,
+    Instrument
 )
+from ._throttle import LoginThrottler
+from ._recaller import Recaller
+from ._cache import TTLCache
+from ._signing import SignedTokenCodec, InvalidTokenError
+from ._user import TokenUser
+from ._random import randbytes
+from ._offload import Offloader
+from ._instrument import NULL_INSTRUMENT
+from ._permissions import (
+    PermissionRegistry,
+    HasPermissions,
+    store_permission_mask,
+    load_permission_mask
+)
+
+_T = t.TypeVar("_T")
+
+# keys the basic auth verification cache, regenerated on every process start
+# so cached entries can never be matched against a leaked credential pair.
+_BASIC_AUTH_SECRET = randbytes(32)
 
 class SessionGuard(StatefullGuard):
 
     _user: Authenticatable | None = None
     _remember: bool = False
+    _recaller: str | None = None
+    _queued_recaller: str | None = None
 
-    def __init__(self, name: str, user_provider: UserProvider, session: Session | None = None) -> None:
+    def __init__(
+        self,
+        name: str,
+        user_provider: UserProvider,
+        session: Session | None = None,
+        throttler: LoginThrottler | None = None,
+        permissions: PermissionRegistry | None = None,
+        offloader: Offloader | None = None,
+        instrument: Instrument | None = None
+    ) -> None:
         self._name = name
         self._user_provider = user_provider
         self._session = session
+        self._throttler = throttler
+        self._permissions = permissions
+        self._offloader = offloader
+        self._instrument: Instrument = NULL_INSTRUMENT if instrument is None else instrument
+        self._client_address: str | None = None
+        self._user_agent: str | None = None
 
     @property
     def name(self) -> str:
         cls_hash = hashlib.sha1(self.__class__.__name__.encode()).hexdigest()
         return f"login_{self._name}_{cls_hash}"
 
+    @property
+    def recaller_name(self) -> str:
+        cls_hash = hashlib.sha1(self.__class__.__name__.encode()).hexdigest()
+        return f"remember_{self._name}_{cls_hash}"
+
+    @property
+    def permissions_name(self) -> str:
+        return f"{self.name}_permissions"
+
+    @property
+    def epoch_name(self) -> str:
+        return f"{self.name}_epoch"
+
     @property
     def remember(self) -> bool:
         return self._remember
 
+    @property
+    def queued_recaller(self) -> str | None:
+        # None leaves the cookie untouched, an empty string expires it
+        return self._queued_recaller
+
     def set_session(self, session: Session) -> None:
         self._session = session
 
+    def set_client_address(self, client_address: str | None) -> None:
+        self._client_address = client_address
+
+    def set_recaller(self, recaller: str | None) -> None:
+        self._recaller = recaller
+
+    def set_user_agent(self, user_agent: str | None) -> None:
+        self._user_agent = user_agent
+
+    def check(self) -> GuardCheckRetval:
+        if self._user is not None:
+            return True
+
+        if self._session is None:
+            return False
+
+        try:
+            return self._session[self.name] is not None
+        except AttributeError:
+            return False
+
+    async def async_check(self) -> GuardCheckRetval:
+        return self.check()
+
+    def has_credentials(self) -> bool:
+        return bool(self._recaller) or self.check()
+
+    def permission_mask(self) -> int | None:
+        if self._permissions is None or self._session is None:
+            return None
+
+        mask = load_permission_mask(self._session, self.permissions_name, self._permissions)
+
+        if mask is None:
+            # missing or stale, the provider has the current permissions
+            mask = self._store_permission_mask(self.user())
+
+        return mask
+
+    async def async_permission_mask(self) -> int | None:
+        if self._permissions is None or self._session is None:
+            return None
+
+        mask = load_permission_mask(self._session, self.permissions_name, self._permissions)
+
+        if mask is None:
+            mask = self._store_permission_mask(await self.async_user())
+
+        return mask
+
+    def _store_permission_mask(self, user: Authenticatable | None) -> int | None:
+        assert self._session is not None and self._permissions is not None
+
+        if not isinstance(user, HasPermissions):
+            return None
+
+        store_permission_mask(self._session, self.permissions_name, self._permissions, user.permission_mask)
+        return user.permission_mask
+
+    def prefetch(self) -> bool:
+        if self._user is not None or self._session is None:
+            return False
+
+        prefetch = getattr(self._session, "prefetch", None)
+
+        if prefetch is None:
+            return False
+
+        try:
+            id = self._session[self.name]
+        except AttributeError:
+            return False
+
+        if id is None:
+            return False
+
+        prefetch(self.name, id, self._async_call(self._user_provider.retrieve_by_id, id))
+
+        return True
+
     def user(self) -> GuardUserRetval:
-        self._user = self._get_user() # type: ignore
+        # a user already resolved by this guard was validated on load, and
+        # may lag behind an epoch this guard bumped itself.
+        if self._user is None:
+            with self._instrument.span("guard.user"):
+                user = self._get_user()
+
+            self._user = self._validate_epoch(user) # type: ignore
+
+        if self._user is None and self._recaller is not None:
+            self._user = self._user_from_recaller()
+
         return self._user
 
     async def async_user(self) -> GuardUserRetval:
-        result: AuthenticatableRetval = self._get_user(_async=True)
+        if self._user is not None:
+            return self._user
 
-        if inspect.isawaitable(result):
-            self._user = await result
-        else:
-            # testcase: test_session_guard_async_user_from_sync_provider
-            self._user = result
+        with self._instrument.span("guard.user"):
+            result: AuthenticatableRetval = self._get_user(_async=True)
+
+            if inspect.isawaitable(result):
+                self._user = await result
+            else:
+                # testcase: test_session_guard_async_user_from_sync_provider
+                self._user = result
+
+        self._user = self._validate_epoch(self._user)
+
+        if self._user is None and self._recaller is not None:
+            self._user = await self._async_user_from_recaller()
 
         return self._user
 
     def attempt(self, credentials: t.Dict[str, t.Any], remember: bool = False) -> bool:
+        with self._instrument.span("guard.attempt"):
+            return self._attempt(credentials, remember)
+
+    async def async_attempt(self, credentials: t.Dict[str, t.Any], remember: bool = False) -> bool:
+        with self._instrument.span("guard.attempt"):
+            return await self._async_attempt(credentials, remember)
+
+    def _attempt(self, credentials: t.Dict[str, t.Any], remember: bool) -> bool:
+        throttler = self._throttler
+
+        if throttler is not None and throttler.too_many_attempts(credentials, self._client_address):
+            return False
+
         user = self._user_provider.retrieve_by_credentials(credentials)
 
         if user is not None and isinstance(user, Authenticatable):
-            validate_result = self._user_provider.validate_credentials(user, credentials)
+            with self._instrument.span("guard.validate"):
+                validate_result = self._user_provider.validate_credentials(user, credentials)
 
             if validate_result:
+                self._user_provider.rehash_password_if_required(user, credentials)
                 self._login(user, remember=remember)
+
+                if throttler is not None:
+                    throttler.clear(credentials)
+
                 return True
 
+        if throttler is not None:
+            throttler.hit(credentials, self._client_address)
+
         return False
 
-    async def async_attempt(self, credentials: t.Dict[str, t.Any], remember: bool = False) -> bool:
-        user = self._user_provider.retrieve_by_credentials(credentials)
+    async def _async_attempt(self, credentials: t.Dict[str, t.Any], remember: bool) -> bool:
+        throttler = self._throttler
+
+        if throttler is not None and await throttler.async_too_many_attempts(credentials, self._client_address):
+            return False
+
+        user = self._async_call(self._user_provider.retrieve_by_credentials, credentials)
 
         if inspect.isawaitable(user):
             user = await user
 
         if user is not None and isinstance(user, Authenticatable):
-            validate_result = self._user_provider.validate_credentials(user, credentials)
+            with self._instrument.span("guard.validate"):
+                validate_result = self._async_call(self._user_provider.validate_credentials, user, credentials)
 
-            if inspect.isawaitable(validate_result):
-                validate_result = await validate_result
+                if inspect.isawaitable(validate_result):
+                    validate_result = await validate_result
 
             if validate_result:
-                login_result: t.Awaitable[None] | None = self._login(user, remember=remember)
+                rehash_result = self._async_call(self._user_provider.rehash_password_if_required, user, credentials)
+
+                if inspect.isawaitable(rehash_result):
+                    await rehash_result
+
+                login_result: t.Awaitable[None] | None = self._login(user, remember=remember, _async=True)
                 if inspect.isawaitable(login_result):
                     await login_result
+
+                if throttler is not None:
+                    await throttler.async_clear(credentials)
+
                 return True
 
+        if throttler is not None:
+            await throttler.async_hit(credentials, self._client_address)
+
         return False
 
+    def logout(self) -> None:
+        assert self._session is not None
+
+        user = self.user()
+
+        if user is not None and user.remember_token:
+            # a fresh selector makes every remember cookie of this user useless
+            _ensure_sync(self._queue_recaller(user, Recaller.create()))
+
+        self._forget_login_state()
+        self._session.invalidate()
+        self._user = None
+        self._recaller = None
+        self._queued_recaller = ""
+
+    async def async_logout(self) -> None:
+        assert self._session is not None
+
+        user = await self.async_user()
+
+        if user is not None and user.remember_token:
+            update_result = self._queue_recaller(user, Recaller.create(), _async=True)
+
+            if inspect.isawaitable(update_result):
+                await update_result
+
+        self._forget_login_state()
+        await self._session.async_invalidate()
+        self._user = None
+        self._recaller = None
+        self._queued_recaller = ""
+
+    def logout_other_devices(self) -> bool:
+        assert self._session is not None
+
+        user = self.user()
+
+        if user is None:
+            return False
+
+        epoch = _ensure_sync(self._user_provider.increment_auth_epoch(user))
+
+        if epoch is None:
+            return False
+
+        self._session[self.epoch_name] = epoch
+
+        if user.remember_token:
+            _ensure_sync(self._cycle_remember_token(user))
+
+        return True
+
+    async def async_logout_other_devices(self) -> bool:
+        assert self._session is not None
+
+        user = await self.async_user()
+
+        if user is None:
+            return False
+
+        epoch = self._async_call(self._user_provider.increment_auth_epoch, user)
+
+        if inspect.isawaitable(epoch):
+            epoch = await epoch
+
+        if epoch is None:
+            return False
+
+        self._session[self.epoch_name] = epoch
+
+        if user.remember_token:
+            update_result = self._cycle_remember_token(user, _async=True)
+
+            if inspect.isawaitable(update_result):
+                await update_result
+
+        return True
+
     def _login(self, user: Authenticatable, remember: bool = False, _async: bool = False) -> t.Awaitable[None] | None:
         self._user = user
         self._remember = remember
         if _async:
-            return self._async_update_session(user.identifier)
+            return self._async_login(user, remember)
+        if remember:
+            _ensure_sync(self._queue_recaller(user, Recaller.create()))
+        self._store_login_state(user)
         self._update_session(user.identifier)
         return None
 
+    async def _async_login(self, user: Authenticatable, remember: bool) -> None:
+        if remember:
+            update_result = self._queue_recaller(user, Recaller.create(), _async=True)
+
+            if inspect.isawaitable(update_result):
+                await update_result
+
+        self._store_login_state(user)
+        await self._async_update_session(user.identifier)
+
+    def _cycle_remember_token(self, user: Authenticatable, _async: bool = False) -> t.Awaitable[None] | None:
+        # without this the remember cookie of a revoked device logs it back in.
+        # this device only gets the new cookie if it is remembered already.
+        remembered = self._remember or bool(self._recaller) or bool(self._queued_recaller)
+        result = self._queue_recaller(user, Recaller.create(), _async=_async)
+
+        if not remembered:
+            self._queued_recaller = None
+
+        return result
+
+    def _queue_recaller(self, user: Authenticatable, recaller: Recaller, _async: bool = False) -> t.Awaitable[None] | None:
+        if user.remember_token_name is None:
+            return None
+
+        user.remember_token = recaller.stored_token
+        self._queued_recaller = recaller.value
+
+        if _async:
+            return self._async_call(self._user_provider.update_remember_token, user, recaller.stored_token)
+
+        return self._user_provider.update_remember_token(user, recaller.stored_token)
+
+    def _user_from_recaller(self) -> Authenticatable | None:
+        recaller = Recaller.parse(self._recaller)
+        self._recaller = None
+
+        if recaller is None:
+            self._queued_recaller = ""
+            return None
+
+        user = _ensure_sync(self._user_provider.retrieve_by_remember_selector(recaller.selector))
+
+        if user is None or not recaller.matches(user.remember_token):
+            self._queued_recaller = ""
+            return None
+
+        _ensure_sync(self._queue_recaller(user, recaller.rotate()))
+        self._store_login_state(user)
+        self._update_session(user.identifier)
+
+        return user
+
+    async def _async_user_from_recaller(self) -> Authenticatable | None:
+        recaller = Recaller.parse(self._recaller)
+        self._recaller = None
+
+        if recaller is None:
+            self._queued_recaller = ""
+            return None
+
+        user = self._async_call(self._user_provider.retrieve_by_remember_selector, recaller.selector)
+
+        if inspect.isawaitable(user):
+            user = await user
+
+        if user is None or not recaller.matches(user.remember_token):
+            self._queued_recaller = ""
+            return None
+
+        update_result = self._queue_recaller(user, recaller.rotate(), _async=True)
+
+        if inspect.isawaitable(update_result):
+            await update_result
+
+        self._store_login_state(user)
+        await self._async_update_session(user.identifier)
+
+        return user
+
     def _update_session(self, id: str) -> None:
         assert self._session is not None
         self._session[self.name] = id
         self._session.migrate(True)
 
+        track = getattr(self._session, "track", None)
+
+        if track is not None:
+            track(id, self._user_agent)
+
     async def _async_update_session(self, id: str) -> None:
         assert self._session is not None
         self._session[self.name] = id
         await self._session.async_migrate(True)
 
+        track = getattr(self._session, "async_track", None)
+
+        if track is not None:
+            await track(id, self._user_agent)
+
+    def _async_call(self, fn: t.Callable[..., _T], *args: t.Any) -> t.Awaitable[_T] | _T:
+        return _async_call(self._offloader, fn, *args)
+
+    def _store_login_state(self, user: Authenticatable) -> None:
+        assert self._session is not None
+
+        epoch = getattr(user, "auth_epoch", None)
+
+        if epoch is not None:
+            self._session[self.epoch_name] = epoch
+
+        if self._permissions is not None and isinstance(user, HasPermissions):
+            store_permission_mask(self._session, self.permissions_name, self._permissions, user.permission_mask)
+
+    def _forget_login_state(self) -> None:
+        assert self._session is not None
+
+        for key in (self.name, self.epoch_name, self.permissions_name):
+            self._session.forget(key)
+
+    def _validate_epoch(self, user: Authenticatable | None) -> Authenticatable | None:
+        if user is None or self._session is None:
+            return user
+
+        try:
+            session_epoch = self._session[self.epoch_name]
+        except AttributeError:
+            # logged in before the user had an epoch, which a bump revokes too
+            session_epoch = None
+
+        # the user bumped their epoch after this session logged in
+        if getattr(user, "auth_epoch", None) != session_epoch:
+            self._forget_login_state()
+            return None
+
+        return user
+
     def _get_user(self, _async: bool = False) -> AuthenticatableRetval:
         assert self._session is not None
 
@@ -111,16 +519,533 @@ class SessionGuard(StatefullGuard):
             id = None
 
         if id is not None:
-            coro_or_authenticatable: AuthenticatableRetval = self._user_provider.retrieve_by_id(id)
+            take_prefetched = getattr(self._session, "take_prefetched", None)
+            prefetched = None if take_prefetched is None else take_prefetched(self.name, id)
+
+            if prefetched is not None:
+                if _async:
+                    return t.cast(AuthenticatableRetval, prefetched)
+                if prefetched.done() and not prefetched.cancelled():
+                    return t.cast(Authenticatable | None, prefetched.result())
+                prefetched.cancel()
+
+            if not _async:
+                return _ensure_sync(self._user_provider.retrieve_by_id(id))
+
+            return self._async_call(self._user_provider.retrieve_by_id, id)
+
+        return self._user
+
+
+class TokenGuard(Guard):
+
+    _user: Authenticatable | None = None
+
+    def __init__(
+        self,
+        name: str,
+        user_provider: UserProvider,
+        request: Request | None = None,
+        input_key: str = "api_token",
+        cache: TTLCache[str, Authenticatable] | None = None,
+        offloader: Offloader | None = None
+    ) -> None:
+        self._name = name
+        self._user_provider = user_provider
+        self._request = request
+        self._input_key = input_key
+        self._cache = cache
+        self._offloader = offloader
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def set_request(self, request: Request) -> None:
+        self._request = request
+        self._user = None
+
+    def has_credentials(self) -> bool:
+        return self.get_token_for_request() is not None
+
+    def get_token_for_request(self) -> str | None:
+        if self._request is None:
+            return None
+
+        token = bearer_token(self._request)
+
+        if token is None:
+            token = self._request.query.get(self._input_key, None) or None
+
+        return token
+
+    def user(self) -> GuardUserRetval:
+        if self._user is not None:
+            return self._user
+
+        token = self.get_token_for_request()
+
+        if token is None:
+            return None
+
+        token_hash = hash_token(token)
+
+        user = self._cached(token_hash)
+
+        if user is None:
+            user = self._cache_user(token_hash, _ensure_sync(self._user_provider.retrieve_by_token_hash(token_hash)))
+
+        self._user = user
+        return self._user
+
+    async def async_user(self) -> GuardUserRetval:
+        if self._user is not None:
+            return self._user
+
+        token = self.get_token_for_request()
+
+        if token is None:
+            return None
+
+        token_hash = hash_token(token)
+
+        # fast path, a cached verification never touches the provider
+        user = self._cached(token_hash)
+
+        if user is None:
+            result = _async_call(self._offloader, self._user_provider.retrieve_by_token_hash, token_hash)
+
+            if inspect.isawaitable(result):
+                result = await result
+
+            user = self._cache_user(token_hash, result)
+
+        self._user = user
+        return self._user
+
+    def forget(self, token: str) -> None:
+        if self._cache is not None:
+            self._cache.pop(hash_token(token))
+
+    def _cached(self, token_hash: str) -> Authenticatable | None:
+        if self._cache is None:
+            return None
+        return self._cache.get(token_hash)
+
+    def _cache_user(self, token_hash: str, user: Authenticatable | None) -> Authenticatable | None:
+        if user is not None and self._cache is not None:
+            self._cache.set(token_hash, user)
+        return user
+
+
+class SignedTokenGuard(Guard):
+
+    _user: TokenUser | None = None
+    _full_user: Authenticatable | None = None
+
+    def __init__(
+        self,
+        name: str,
+        codec: SignedTokenCodec,
+        user_provider: UserProvider | None = None,
+        request: Request | None = None,
+        offloader: Offloader | None = None
+    ) -> None:
+        self._name = name
+        self._codec = codec
+        self._user_provider = user_provider
+        self._request = request
+        self._offloader = offloader
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def set_request(self, request: Request) -> None:
+        self._request = request
+        self._user = None
+        self._full_user = None
+
+    def has_credentials(self) -> bool:
+        return self.get_token_for_request() is not None
+
+    def get_token_for_request(self) -> str | None:
+        if self._request is None:
+            return None
+
+        return bearer_token(self._request)
+
+    def user(self) -> TokenUser | None:
+        if self._user is not None:
+            return self._user
+
+        token = self.get_token_for_request()
+
+        if token is None:
+            return None
+
+        try:
+            self._user = TokenUser(self._codec.decode(token))
+        except InvalidTokenError:
+            return None
+
+        return self._user
+
+    async def async_user(self) -> TokenUser | None:
+        return self.user()
+
+    def full_user(self) -> GuardUserRetval:
+        if self._full_user is not None:
+            return self._full_user
+
+        token_user = self.user()
+
+        if token_user is None or self._user_provider is None:
+            return None
+
+        self._full_user = _ensure_sync(self._user_provider.retrieve_by_id(token_user.identifier))
+        return self._full_user
+
+    async def async_full_user(self) -> GuardUserRetval:
+        if self._full_user is not None:
+            return self._full_user
+
+        token_user = self.user()
+
+        if token_user is None or self._user_provider is None:
+            return None
+
+        result = _async_call(self._offloader, self._user_provider.retrieve_by_id, token_user.identifier)
+
+        if inspect.isawaitable(result):
+            result = await result
 
-            if not _async and inspect.isawaitable(coro_or_authenticatable):
-                # suppress coroutine was never awaited
-                # https://stackoverflow.com/questions/62045387/how-to-suppress-coroutine-was-never-awaited-warning
-                if hasattr(coro_or_authenticatable, "close"):
-                    coro_or_authenticatable.close()
-                    del coro_or_authenticatable
-                raise ValueError("Cannot use awaitable return value from user provider")
+        self._full_user = result
+        return self._full_user
 
-            return coro_or_authenticatable
 
+class BasicAuthGuard(Guard):
+
+    _user: Authenticatable | None = None
+
+    def __init__(
+        self,
+        name: str,
+        user_provider: UserProvider,
+        request: Request | None = None,
+        cache: TTLCache[str, str] | None = None,
+        identifier_name: str = "username",
+        password_name: str = "password",
+        offloader: Offloader | None = None
+    ) -> None:
+        self._name = name
+        self._user_provider = user_provider
+        self._request = request
+        self._cache = cache
+        self._identifier_name = identifier_name
+        self._password_name = password_name
+        self._offloader = offloader
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def set_request(self, request: Request) -> None:
+        self._request = request
+        self._user = None
+
+    def has_credentials(self) -> bool:
+        if self._request is None:
+            return False
+        authorization = authorization_header(self._request)
+        return authorization is not None and authorization[:6].lower() == "basic "
+
+    def get_credentials_for_request(self) -> t.Dict[str, str] | None:
+        if self._request is None:
+            return None
+
+        authorization = authorization_header(self._request)
+
+        if not authorization:
+            return None
+
+        scheme, _, encoded = authorization.partition(" ")
+
+        if scheme.lower() != "basic":
+            return None
+
+        try:
+            decoded = base64.b64decode(encoded.strip(), validate=True).decode()
+        except (binascii.Error, UnicodeDecodeError):
+            return None
+
+        identifier, sep, password = decoded.partition(":")
+
+        if not sep or not identifier:
+            return None
+
+        return {self._identifier_name: identifier, self._password_name: password}
+
+    def user(self) -> GuardUserRetval:
+        if self._user is not None:
+            return self._user
+
+        credentials = self.get_credentials_for_request()
+
+        if credentials is None:
+            return None
+
+        user = _ensure_sync(self._user_provider.retrieve_by_credentials(credentials))
+
+        if user is None:
+            return None
+
+        cache_key = self._cache_key(credentials)
+
+        if not self._cached(cache_key, user):
+            if not _ensure_sync(self._user_provider.validate_credentials(user, credentials)):
+                return None
+            self._remember_verified(cache_key, user)
+
+        self._user = user
         return self._user
+
+    async def async_user(self) -> GuardUserRetval:
+        if self._user is not None:
+            return self._user
+
+        credentials = self.get_credentials_for_request()
+
+        if credentials is None:
+            return None
+
+        user = _async_call(self._offloader, self._user_provider.retrieve_by_credentials, credentials)
+
+        if inspect.isawaitable(user):
+            user = await user
+
+        if user is None:
+            return None
+
+        cache_key = self._cache_key(credentials)
+
+        if not self._cached(cache_key, user):
+            validate_result = _async_call(self._offloader, self._user_provider.validate_credentials, user, credentials)
+
+            if inspect.isawaitable(validate_result):
+                validate_result = await validate_result
+
+            if not validate_result:
+                return None
+
+            self._remember_verified(cache_key, user)
+
+        self._user = user
+        return self._user
+
+    def _cache_key(self, credentials: t.Dict[str, str]) -> str:
+        message = f"{credentials[self._identifier_name]}\0{credentials[self._password_name]}"
+        return hmac.new(_BASIC_AUTH_SECRET, message.encode(), hashlib.sha256).hexdigest()
+
+    def _cached(self, cache_key: str, user: Authenticatable) -> bool:
+        if self._cache is None:
+            return False
+
+        password_hash = self._cache.get(cache_key)
+
+        if password_hash is None:
+            return False
+
+        # a changed password hash means the cached verification is stale
+        if not hmac.compare_digest(password_hash.encode(), user.password.encode()):
+            self._cache.pop(cache_key)
+            return False
+
+        return True
+
+    def _remember_verified(self, cache_key: str, user: Authenticatable) -> None:
+        if self._cache is not None:
+            self._cache.set(cache_key, user.password)
+
+
+class ChainStats:
+
+    def __init__(self, size: int, reorder_every: int = 100) -> None:
+        self._hits: t.List[int] = [0] * size
+        self._reorder_every = reorder_every
+        self._observed = 0
+        self._order: t.Tuple[int, ...] = tuple(range(size))
+
+    @property
+    def order(self) -> t.Tuple[int, ...]:
+        return self._order
+
+    @property
+    def hits(self) -> t.List[int]:
+        return list(self._hits)
+
+    def record(self, index: int) -> None:
+        self._hits[index] += 1
+        self._observed += 1
+
+        if self._observed >= self._reorder_every:
+            self._observed = 0
+            # sorted() is stable, so ties keep the configured priority
+            self._order = tuple(sorted(self._order, key=lambda i: -self._hits[i]))
+
+
+class ChainGuard(Guard):
+
+    _user: Authenticatable | None = None
+    _matched: Guard | None = None
+
+    def __init__(self, name: str, guards: t.Sequence[Guard], stats: ChainStats | None = None) -> None:
+        self._name = name
+        self._guards = list(guards)
+        self._stats = stats
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def guards(self) -> t.List[Guard]:
+        return self._guards
+
+    @property
+    def matched_guard(self) -> Guard | None:
+        return self._matched
+
+    def set_session(self, session: Session) -> None:
+        self._each("set_session", session)
+
+    def set_request(self, request: Request) -> None:
+        self._user = None
+        self._matched = None
+        self._each("set_request", request)
+
+    def set_client_address(self, client_address: str | None) -> None:
+        self._each("set_client_address", client_address)
+
+    def set_user_agent(self, user_agent: str | None) -> None:
+        self._each("set_user_agent", user_agent)
+
+    def has_credentials(self) -> bool:
+        return any(_has_credentials(guard) for guard in self._guards)
+
+    def check(self) -> GuardCheckRetval:
+        # the members' own checks, Guard.check would resolve the user
+        if self._user is not None:
+            return True
+        return any(guard.check() for guard in self._guards if _has_credentials(guard))
+
+    async def async_check(self) -> GuardCheckRetval:
+        if self._user is not None:
+            return True
+
+        for guard in self._guards:
+            if _has_credentials(guard) and await guard.async_check():
+                return True
+
+        return False
+
+    def user(self) -> GuardUserRetval:
+        if self._user is not None:
+            return self._user
+
+        for index in self._order():
+            guard = self._guards[index]
+
+            if not _has_credentials(guard):
+                continue
+
+            user = guard.user()
+
+            if user is not None:
+                return self._matched_user(index, user)
+
+        return None
+
+    async def async_user(self) -> GuardUserRetval:
+        if self._user is not None:
+            return self._user
+
+        for index in self._order():
+            guard = self._guards[index]
+
+            if not _has_credentials(guard):
+                continue
+
+            user = await guard.async_user()
+
+            if user is not None:
+                return self._matched_user(index, user)
+
+        return None
+
+    def _order(self) -> t.Iterable[int]:
+        if self._stats is None:
+            return range(len(self._guards))
+        return self._stats.order
+
+    def _matched_user(self, index: int, user: Authenticatable) -> Authenticatable:
+        self._user = user
+        self._matched = self._guards[index]
+
+        if self._stats is not None:
+            self._stats.record(index)
+
+        return user
+
+    def _each(self, method: str, value: t.Any) -> None:
+        for guard in self._guards:
+            setter = getattr(guard, method, None)
+            if setter is not None:
+                setter(value)
+
+
+def _async_call(offloader: Offloader | None, fn: t.Callable[..., _T], *args: t.Any) -> t.Awaitable[_T] | _T:
+    # without an offloader sync providers run inline, as they always did
+    if offloader is None:
+        return fn(*args)
+    return t.cast(t.Awaitable[_T], offloader.run(fn, *args))
+
+
+def _has_credentials(guard: Guard) -> bool:
+    # guards that can not tell cheaply are always asked
+    has_credentials = getattr(guard, "has_credentials", None)
+    return has_credentials is None or bool(has_credentials())
+
+
+def authorization_header(request: Request) -> str | None:
+    headers = request.headers
+    return headers.get("authorization", None) or headers.get("Authorization", None)
+
+
+def bearer_token(request: Request) -> str | None:
+    authorization = authorization_header(request)
+
+    if not authorization:
+        return None
+
+    scheme, _, token = authorization.partition(" ")
+    token = token.strip()
+
+    if scheme.lower() != "bearer" or not token:
+        return None
+
+    return token
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _ensure_sync(result: t.Awaitable[_T] | _T) -> _T:
+    if inspect.isawaitable(result):
+        # suppress coroutine was never awaited
+        # https://stackoverflow.com/questions/62045387/how-to-suppress-coroutine-was-never-awaited-warning
+        if hasattr(result, "close"):
+            result.close()
+        raise ValueError("Cannot use awaitable return value from user provider")
+    return result
@@ -0,0 +1,119 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import time
+import typing as t
+
+from ._types import Hasher
+from ._random import randbytes
+
+
+class PBKDF2Hasher(Hasher):
+
+    algorithm: str = "pbkdf2"
+
+    def __init__(self, iterations: int = 600000, digest: str = "sha256", salt_length: int = 16) -> None:
+        if iterations < 1:
+            raise ValueError("iterations must be a positive integer")
+
+        hashlib.new(digest)
+
+        self._iterations = iterations
+        self._digest = digest
+        self._salt_length = salt_length
+
+    @property
+    def iterations(self) -> int:
+        return self._iterations
+
+    @property
+    def digest(self) -> str:
+        return self._digest
+
+    def make(self, value: str) -> str:
+        salt = binascii.hexlify(randbytes(self._salt_length)).decode()
+        derived = self._derive(value, salt, self._digest, self._iterations)
+        return f"{self.algorithm}_{self._digest}${self._iterations}${salt}${derived}"
+
+    def check(self, value: str, hashed_value: str) -> bool:
+        parsed = self._parse(hashed_value)
+
+        if parsed is None:
+            return False
+
+        digest, iterations, salt, expected = parsed
+        derived = self._derive(value, salt, digest, iterations)
+
+        return hmac.compare_digest(derived, expected)
+
+    def needs_rehash(self, hashed_value: str) -> bool:
+        parsed = self._parse(hashed_value)
+
+        if parsed is None:
+            return True
+
+        digest, iterations, _, _ = parsed
+
+        return digest != self._digest or iterations != self._iterations
+
+    def _derive(self, value: str, salt: str, digest: str, iterations: int) -> str:
+        derived = hashlib.pbkdf2_hmac(digest, value.encode(), salt.encode(), iterations)
+        return base64.b64encode(derived).decode()
+
+    def _parse(self, hashed_value: str) -> t.Tuple[str, int, str, str] | None:
+        try:
+            prefix, rounds, salt, derived = hashed_value.split("$")
+            algorithm, digest = prefix.split("_", 1)
+            iterations = int(rounds)
+        except ValueError:
+            return None
+
+        # a corrupt row fails the check instead of raising from pbkdf2_hmac
+        if algorithm != self.algorithm or iterations < 1 or digest not in hashlib.algorithms_available:
+            return None
+
+        return digest, iterations, salt, derived
+
+
+class CalibrationResult(t.NamedTuple):
+    iterations: int
+    verify_seconds: float
+    logins_per_second: float
+
+
+def calibrate_pbkdf2(
+    target_seconds: float = 0.25,
+    logins_per_second: float | None = None,
+    digest: str = "sha256",
+    sample_iterations: int = 20000,
+    rounds: int = 3
+) -> CalibrationResult:
+    if logins_per_second is not None:
+        # a single core has to sustain the requested login rate, so the
+        # verify latency can never exceed its share of one second.
+        target_seconds = min(target_seconds, 1.0 / logins_per_second)
+
+    hasher = PBKDF2Hasher(iterations=sample_iterations, digest=digest)
+    sample_seconds = _measure_verify(hasher, rounds)
+
+    # round down to a readable number so recommendations stay stable
+    # between runs on the same host.
+    iterations = int(sample_iterations * target_seconds / sample_seconds) // 1000 * 1000
+    iterations = max(1000, iterations)
+
+    verify_seconds = _measure_verify(PBKDF2Hasher(iterations=iterations, digest=digest), rounds)
+
+    return CalibrationResult(iterations, verify_seconds, 1.0 / verify_seconds)
+
+
+def _measure_verify(hasher: PBKDF2Hasher, rounds: int) -> float:
+    hashed = hasher.make("calibration-password")
+    best = float("inf")
+
+    for _ in range(max(1, rounds)):
+        start = time.perf_counter()
+        hasher.check("calibration-password", hashed)
+        best = min(best, time.perf_counter() - start)
+
+    return best
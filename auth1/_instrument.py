@@ -0,0 +1,176 @@
+import bisect
+import math
+import threading
+import time
+import typing as t
+
+from ._types import Instrument
+
+DEFAULT_BUCKETS: t.Tuple[float, ...] = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5
+)
+
+
+class _NullSpan:
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: t.Any) -> None:
+        return None
+
+
+class NullInstrument(Instrument):
+
+    # one shared span, disabled instrumentation allocates nothing
+    _span = _NullSpan()
+
+    def span(self, operation: str) -> _NullSpan:
+        return self._span
+
+
+NULL_INSTRUMENT = NullInstrument()
+
+
+class OperationStats(t.NamedTuple):
+    buckets: t.Tuple[float, ...]
+    # cumulative, the last entry is the +Inf bucket
+    counts: t.Tuple[int, ...]
+    sum: float
+    count: int
+    errors: int
+
+    def quantile(self, q: float) -> float:
+        # upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+
+        for bound, count in zip(self.buckets, self.counts):
+            if count >= rank:
+                return bound
+
+        return math.inf
+
+
+class _Operation:
+
+    __slots__ = ("counts", "sum", "count", "errors")
+
+    def __init__(self, size: int) -> None:
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+        self.errors = 0
+
+
+class _TimedSpan:
+
+    __slots__ = ("_collector", "_operation", "_start")
+
+    def __init__(self, collector: "HistogramCollector", operation: str) -> None:
+        self._collector = collector
+        self._operation = operation
+
+    def __enter__(self) -> None:
+        self._start = self._collector._clock()
+
+    def __exit__(self, exc_type: t.Any, exc: t.Any, tb: t.Any) -> None:
+        self._collector.observe(self._operation, self._collector._clock() - self._start, exc_type is not None)
+
+
+class HistogramCollector(Instrument):
+
+    def __init__(self, buckets: t.Sequence[float] = DEFAULT_BUCKETS, clock: t.Callable[[], float] = time.perf_counter) -> None:
+        self._buckets = tuple(sorted(buckets))
+        self._clock = clock
+        self._operations: t.Dict[str, _Operation] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def buckets(self) -> t.Tuple[float, ...]:
+        return self._buckets
+
+    def span(self, operation: str) -> _TimedSpan:
+        return _TimedSpan(self, operation)
+
+    def observe(self, operation: str, seconds: float, error: bool = False) -> None:
+        index = bisect.bisect_left(self._buckets, seconds)
+
+        with self._lock:
+            stats = self._operations.get(operation, None)
+
+            if stats is None:
+                stats = self._operations[operation] = _Operation(len(self._buckets) + 1)
+
+            stats.counts[index] += 1
+            stats.sum += seconds
+            stats.count += 1
+
+            if error:
+                stats.errors += 1
+
+    def snapshot(self) -> t.Dict[str, OperationStats]:
+        with self._lock:
+            operations = [(name, list(stats.counts), stats.sum, stats.count, stats.errors) for name, stats in self._operations.items()]
+
+        result = {}
+
+        for name, counts, total, count, errors in operations:
+            cumulative = []
+            running = 0
+
+            for bucket_count in counts:
+                running += bucket_count
+                cumulative.append(running)
+
+            result[name] = OperationStats(self._buckets, tuple(cumulative), total, count, errors)
+
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._operations = {}
+
+
+def _format_float(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def prometheus_text(collector: HistogramCollector, namespace: str = "auth1") -> str:
+    """Render the collector in the Prometheus text exposition format."""
+    duration = f"{namespace}_operation_duration_seconds"
+    errors = f"{namespace}_operation_errors_total"
+    snapshot = sorted(collector.snapshot().items())
+
+    lines = [
+        f"# HELP {duration} Time spent in auth1 operations.",
+        f"# TYPE {duration} histogram"
+    ]
+
+    for name, stats in snapshot:
+        label = f'operation="{_escape_label(name)}"'
+
+        for bound, count in zip(stats.buckets + (math.inf,), stats.counts):
+            lines.append(f'{duration}_bucket{{{label},le="{_format_float(bound)}"}} {count}')
+
+        lines.append(f"{duration}_sum{{{label}}} {_format_float(stats.sum)}")
+        lines.append(f"{duration}_count{{{label}}} {stats.count}")
+
+    lines.append(f"# HELP {errors} auth1 operations that raised.")
+    lines.append(f"# TYPE {errors} counter")
+
+    for name, stats in snapshot:
+        lines.append(f'{errors}{{operation="{_escape_label(name)}"}} {stats.errors}')
+
+    return "\n".join(lines) + "\n"
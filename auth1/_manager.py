@@ -1,5 +1,11 @@
+import inspect
 import typing as t
-from ._types import AuthFactory, Guard
+from ._types import AuthFactory, Guard, Instrument
+from ._guards import ChainGuard, ChainStats
+from ._instrument import NULL_INSTRUMENT
+from ._config import AuthConfig, ConfigError, GuardConfig, compile_auth_config
+
+GuardFactory = t.Callable[[str], Guard | None]
 
 # config = {
 #     'defaults': {
@@ -10,49 +16,160 @@ from ._types import AuthFactory, Guard
 #         'web': {
 #             'driver': 'session',
 #             'factory': ...
+#         },
+#         'any': {
+#             'driver': 'chain',
+#             'guards': ['web', 'api'],
+#             'adaptive': False
 #         }
 #     }
 # }
 
+class _CompiledAuth(t.NamedTuple):
+    config: AuthConfig
+    # guard name -> driver factory, None while the driver is not registered
+    factories: t.Mapping[str, GuardFactory | None]
+
+
 class AuthManager(AuthFactory):
 
-    def __init__(self, config: t.Dict[str, t.Any]):
+    def __init__(
+        self,
+        config: t.Dict[str, t.Any],
+        instrument: Instrument | None = None,
+        factories: t.Mapping[str, GuardFactory] | None = None
+    ):
         self._config = config
-        self._driver_factory: t.Dict[str, t.Callable] = {} #type: ignore [type-arg]
+        self._instrument: Instrument = NULL_INSTRUMENT if instrument is None else instrument
+        self._driver_factory: t.Dict[str, t.Callable] = dict(factories or {}) #type: ignore [type-arg]
+        self._chain_stats: t.Dict[str, ChainStats] = {}
+        self._closers: t.List[t.Callable[[], t.Awaitable[None] | None]] = []
+        self._compiled = self._resolve(compile_auth_config(config))
+
+        # with the factories known up front a bad driver fails construction
+        if factories is not None:
+            self.validate()
 
     @property
     def config(self) -> t.Dict[str, t.Any]:
         return self._config
 
+    @property
+    def compiled(self) -> AuthConfig:
+        return self._compiled.config
+
+    @property
+    def instrument(self) -> Instrument:
+        # driver factories pass this on to the guards they build
+        return self._instrument
+
     def guard(self, name: str | None = None) -> Guard | None:
-        if name is None:
-            name = self._get_default_driver()
+        # one read of the compiled config, a concurrent reload swaps the
+        # whole object and never changes it under a running lookup.
+        compiled = self._compiled
 
-        guard_config = self._config['guards'][name]
-        driver_name = guard_config['driver']
+        if name is None:
+            name = compiled.config.default_guard
 
-        driver_factory = self._driver_factory[driver_name]
+            if name is None:
+                raise RuntimeError("No default guard specified")
 
-        guard: Guard | None = driver_factory(name)
+        self._instrument.annotate("guard", name)
 
-        return guard
+        with self._instrument.span("manager.guard"):
+            return self._create(compiled, name)
 
     def factory(self, name: str) -> t.Callable: # type: ignore [type-arg]
         def decorator(f: t.Callable) -> t.Callable: # type: ignore [type-arg]
             self._driver_factory[name] = f
+            self._compiled = self._resolve(self._compiled.config)
             return f
         return decorator
 
-    def _get_default_driver(self) -> str:
+    def on_close(self, f: t.Callable[[], t.Awaitable[None] | None]) -> t.Callable[[], t.Awaitable[None] | None]:
+        self._closers.append(f)
+        return f
+
+    def close(self) -> t.List[t.Awaitable[None]]:
+        # async closers are handed back, the caller decides where to await them
+        closers, self._closers = self._closers, []
+        pending = []
+
+        for closer in closers:
+            result = closer()
+            if inspect.isawaitable(result):
+                pending.append(result)
+
+        return pending
+
+    async def async_close(self) -> None:
+        for result in self.close():
+            await result
+
+    def validate(self) -> None:
+        self._check_drivers(self._compiled)
+
+    def reload(self, config: t.Dict[str, t.Any]) -> None:
+        compiled = self._resolve(compile_auth_config(config))
+        self._check_drivers(compiled)
+
+        previous = self._compiled.config.guards
+
+        for name in list(self._chain_stats):
+            if compiled.config.guards.get(name, None) != previous.get(name, None):
+                self._chain_stats.pop(name, None)
+
+        self._config = config
+        self._compiled = compiled
+
+    def _resolve(self, config: AuthConfig) -> _CompiledAuth:
+        factories = {
+            name: self._driver_factory.get(guard.driver, None)
+            for name, guard in config.guards.items()
+            if guard.driver != "chain"
+        }
+        return _CompiledAuth(config, factories)
+
+    def _check_drivers(self, compiled: _CompiledAuth) -> None:
+        unknown = sorted(
+            f"`{compiled.config.guards[name].driver}` (guard `{name}`)"
+            for name, factory in compiled.factories.items() if factory is None
+        )
+
+        if unknown:
+            raise ConfigError(f"Unknown guard drivers: {', '.join(unknown)}")
+
+    def _create(self, compiled: _CompiledAuth, name: str) -> Guard | None:
         try:
-            defaults = self._config['defaults']
+            guard_config = compiled.config.guards[name]
         except KeyError:
-            defaults = {}
+            raise ConfigError(f"Guard `{name}` is not configured")
+
+        if guard_config.driver == "chain":
+            return self._create_chain_guard(compiled, guard_config)
+
+        factory = compiled.factories[name]
+
+        if factory is None:
+            raise ConfigError(f"Guard `{name}` uses unknown driver `{guard_config.driver}`")
+
+        return factory(name)
+
+    def _create_chain_guard(self, compiled: _CompiledAuth, guard_config: GuardConfig) -> ChainGuard:
+        name = guard_config.name
+        members: t.List[Guard] = []
+
+        for member_name in guard_config.members:
+            member = self._create(compiled, member_name)
+            if member is not None:
+                members.append(member)
+
+        stats: ChainStats | None = None
 
-        if isinstance(defaults, dict):
+        if guard_config.adaptive:
             try:
-                return defaults['guard'] # type: ignore
+                stats = self._chain_stats[name]
             except KeyError:
-                pass
+                stats = self._chain_stats[name] = ChainStats(len(members), guard_config.reorder_every)
 
-        raise RuntimeError("No default guard specified")
+        return ChainGuard(name, members, stats)
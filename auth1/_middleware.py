@@ -0,0 +1,265 @@
+import typing as t
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qsl
+
+from ._types import AuthFactory, Authenticatable, Guard, Session
+from ._profiler import SlowRequestProfiler
+from ._tenant import TenantAuthManager
+
+Scope = t.MutableMapping[str, t.Any]
+Message = t.MutableMapping[str, t.Any]
+Receive = t.Callable[[], t.Awaitable[Message]]
+Send = t.Callable[[Message], t.Awaitable[None]]
+ASGIApp = t.Callable[[Scope, Receive, Send], t.Awaitable[None]]
+
+
+class ScopeRequest:
+
+    def __init__(self, scope: Scope) -> None:
+        self.headers: t.Dict[str, str] = {
+            key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope.get("headers", [])
+        }
+        self.query: t.Dict[str, str] = dict(parse_qsl(scope.get("query_string", b"").decode("latin-1")))
+        self.input: t.Dict[str, str] = {}
+        self.session: Session = scope.get("session", None) # type: ignore [assignment]
+        self._cookies: t.Dict[str, str] | None = None
+
+    @property
+    def cookies(self) -> t.Dict[str, str]:
+        if self._cookies is None:
+            cookie: SimpleCookie = SimpleCookie()
+            try:
+                cookie.load(self.headers.get("cookie", ""))
+            except Exception:
+                pass
+            self._cookies = {key: morsel.value for key, morsel in cookie.items()}
+        return self._cookies
+
+
+class LazyUser:
+
+    __slots__ = ("_guard", "_resolved", "_user")
+
+    def __init__(self, guard: Guard) -> None:
+        self._guard = guard
+        self._resolved = False
+        self._user: Authenticatable | None = None
+
+    @property
+    def guard(self) -> Guard:
+        return self._guard
+
+    @property
+    def is_authenticated(self) -> bool:
+        return self.check()
+
+    def check(self) -> bool:
+        if self._resolved:
+            return self._user is not None
+        return self._guard.check()
+
+    async def async_check(self) -> bool:
+        if self._resolved:
+            return self._user is not None
+        return await self._guard.async_check()
+
+    def resolve(self) -> Authenticatable | None:
+        if not self._resolved:
+            self._user = self._guard.user()
+            self._resolved = True
+        return self._user
+
+    async def async_resolve(self) -> Authenticatable | None:
+        if not self._resolved:
+            self._user = await self._guard.async_user()
+            self._resolved = True
+        return self._user
+
+    def __bool__(self) -> bool:
+        return self.check()
+
+    def __getattr__(self, name: str) -> t.Any:
+        user = self.resolve()
+
+        if user is None:
+            raise AttributeError(f"{self.__class__.__name__} object has no attribute {name}")
+
+        return getattr(user, name)
+
+    def __repr__(self) -> str:
+        if self._resolved:
+            return f"{self.__class__.__name__}({self._user!r})"
+        return f"{self.__class__.__name__}(<unresolved>)"
+
+
+def _recaller_guards(guard: Guard) -> t.List[t.Any]:
+    # every member of a chain has its own remember cookie
+    members = getattr(guard, "guards", None)
+
+    if members is not None:
+        return [recaller_guard for member in members for recaller_guard in _recaller_guards(member)]
+
+    if getattr(guard, "recaller_name", None) is None or not hasattr(guard, "set_recaller"):
+        return []
+
+    return [guard]
+
+
+class AuthenticateMiddleware:
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        auth_manager: AuthFactory,
+        guard: str | None = None,
+        redirect_to: str | None = None,
+        recaller_max_age: int = 5 * 365 * 24 * 60 * 60
+    ) -> None:
+        self.app = app
+        self.auth_manager = auth_manager
+        self.guard_name = guard
+        self.redirect_to = redirect_to
+        self.recaller_max_age = recaller_max_age
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        guard = self.auth_manager.guard(self.guard_name)
+
+        if guard is None:
+            raise RuntimeError(f"Guard `{self.guard_name}` is not available")
+
+        self._prepare_guard(guard, scope)
+
+        user = LazyUser(guard)
+
+        async def _send(message: Message) -> None:
+            if message['type'] == "http.response.start":
+                self._add_recaller_to_response(guard, message)
+            await send(message)
+
+        # check() only sees the session key, resolving also rejects a
+        # session revoked by logout_other_devices.
+        if self.redirect_to is not None and await user.async_resolve() is None:
+            await self._redirect(scope, _send)
+            return
+
+        scope['user'] = user
+        scope['auth'] = guard
+
+        await self.app(scope, receive, _send)
+
+    def _prepare_guard(self, guard: Guard, scope: Scope) -> None:
+        request = ScopeRequest(scope)
+
+        if request.session is not None and hasattr(guard, "set_session"):
+            guard.set_session(request.session)
+
+        if hasattr(guard, "set_request"):
+            guard.set_request(request)
+
+        for recaller_guard in _recaller_guards(guard):
+            recaller_guard.set_recaller(request.cookies.get(recaller_guard.recaller_name, None))
+
+        if hasattr(guard, "set_user_agent"):
+            guard.set_user_agent(request.headers.get("user-agent", None))
+
+        client = scope.get("client", None)
+
+        if client and hasattr(guard, "set_client_address"):
+            guard.set_client_address(client[0])
+
+    def _add_recaller_to_response(self, guard: Guard, message: Message) -> None:
+        headers = None
+
+        for recaller_guard in _recaller_guards(guard):
+            recaller = recaller_guard.queued_recaller
+
+            if recaller is None:
+                continue
+
+            name: str = recaller_guard.recaller_name
+
+            cookie: SimpleCookie = SimpleCookie()
+            cookie[name] = recaller
+            cookie[name]['path'] = "/"
+            cookie[name]['httponly'] = True
+            cookie[name]['samesite'] = "lax"
+            # an empty recaller means the cookie was rejected and has to go
+            cookie[name]['max-age'] = self.recaller_max_age if recaller else 0
+
+            if headers is None:
+                headers = list(message.get("headers", []))
+
+            headers.append((b"set-cookie", cookie.output(header="").strip().encode("latin-1")))
+
+        if headers is not None:
+            message['headers'] = headers
+
+    async def _redirect(self, scope: Scope, send: Send) -> None:
+        assert self.redirect_to is not None
+
+        if scope['type'] == "websocket":
+            await send({'type': "websocket.close", 'code': 1008})
+            return
+
+        await send({
+            'type': "http.response.start",
+            'status': 302,
+            'headers': [(b"location", self.redirect_to.encode("latin-1")), (b"content-length", b"0")]
+        })
+        await send({'type': "http.response.body", 'body': b""})
+
+
+class ProfileMiddleware:
+
+    # outermost, so session middleware phases fall inside the request
+    def __init__(self, app: ASGIApp, profiler: SlowRequestProfiler) -> None:
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        with self.profiler.request(f"{scope.get('method', 'WS')} {scope.get('path', '')}"):
+            await self.app(scope, receive, send)
+
+
+class TenantMiddleware:
+
+    # goes outside AuthenticateMiddleware, which then asks the tenant manager
+    # for a guard of the tenant activated here.
+    def __init__(self, app: ASGIApp, tenants: TenantAuthManager) -> None:
+        self.app = app
+        self.tenants = tenants
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        tenant_id = self.tenants.resolve(ScopeRequest(scope))
+
+        if tenant_id is None:
+            await self._not_found(scope, send)
+            return
+
+        with self.tenants.activate(tenant_id):
+            scope['tenant'] = tenant_id
+            await self.app(scope, receive, send)
+
+    async def _not_found(self, scope: Scope, send: Send) -> None:
+        if scope['type'] == "websocket":
+            await send({'type': "websocket.close", 'code': 1008})
+            return
+
+        await send({
+            'type': "http.response.start",
+            'status': 404,
+            'headers': [(b"content-length", b"0")]
+        })
+        await send({'type': "http.response.body", 'body': b""})
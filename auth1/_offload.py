@@ -0,0 +1,134 @@
+import asyncio
+import functools
+import inspect
+import threading
+import typing as t
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+
+_F = t.TypeVar("_F", bound=t.Callable[..., t.Any])
+
+
+class OffloadStats(t.NamedTuple):
+    max_workers: int
+    active: int
+    queued: int
+    peak_queued: int
+    submitted: int
+    completed: int
+    saturation: float
+
+
+def nonblocking(fn: _F) -> _F:
+    """Mark a plain function that never blocks, e.g. one returning a coroutine.
+
+    Offloader.run calls it on the event loop instead of in the pool.
+    """
+    setattr(fn, "__auth1_nonblocking__", True)
+    return fn
+
+
+class Offloader:
+
+    def __init__(self, max_workers: int = 8, thread_name_prefix: str = "auth1-offload") -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be a positive integer")
+
+        self._max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._pending = 0
+        self._peak_queued = 0
+        self._submitted = 0
+        self._completed = 0
+        # plain functions seen handing back an awaitable, these are async in
+        # all but name and are called on the loop instead of in the pool.
+        self._returns_awaitable: "weakref.WeakKeyDictionary[t.Any, bool]" = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def is_async(fn: t.Callable[..., t.Any]) -> bool:
+        return inspect.iscoroutinefunction(fn) or inspect.iscoroutinefunction(getattr(fn, "__call__", None))
+
+    async def run(self, fn: t.Callable[..., t.Any], *args: t.Any) -> t.Any:
+        if self.is_async(fn):
+            return await fn(*args)
+
+        key = getattr(fn, "__func__", fn)
+
+        if getattr(fn, "__auth1_nonblocking__", False):
+            result = fn(*args)
+            return (await result) if inspect.isawaitable(result) else result
+
+        if self._known_async(key):
+            result = fn(*args)
+
+            if inspect.isawaitable(result):
+                return await result
+
+            # it blocked on the loop once, back to the pool from now on
+            self._remember(key, False)
+            return result
+
+        with self._lock:
+            self._pending += 1
+            self._submitted += 1
+            self._peak_queued = max(self._peak_queued, self._pending - self._active)
+
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(self._call, fn, *args))
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+
+        # sync callables may still hand back an awaitable, it belongs to the loop
+        if inspect.isawaitable(result):
+            self._remember(key, True)
+            result = await result
+
+        return result
+
+    def stats(self) -> OffloadStats:
+        with self._lock:
+            active = self._active
+            queued = max(self._pending - self._active, 0)
+            return OffloadStats(
+                self._max_workers,
+                active,
+                queued,
+                self._peak_queued,
+                self._submitted,
+                self._completed,
+                (active + queued) / self._max_workers
+            )
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _known_async(self, key: t.Any) -> bool:
+        try:
+            return self._returns_awaitable.get(key, False)
+        except TypeError:
+            return False
+
+    def _remember(self, key: t.Any, returns_awaitable: bool) -> None:
+        try:
+            with self._lock:
+                if returns_awaitable:
+                    self._returns_awaitable[key] = True
+                else:
+                    self._returns_awaitable.pop(key, None)
+        except TypeError:
+            # not weak referenceable, it is offloaded every time
+            pass
+
+    def _call(self, fn: t.Callable[..., t.Any], *args: t.Any) -> t.Any:
+        with self._lock:
+            self._active += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._active -= 1
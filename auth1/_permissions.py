@@ -0,0 +1,145 @@
+import hashlib
+import time
+import typing as t
+
+from ._types import Session
+
+
+@t.runtime_checkable
+class HasPermissions(t.Protocol):
+    permission_mask: int
+
+
+class PermissionRegistry:
+
+    def __init__(
+        self,
+        permissions: t.Iterable[str] = (),
+        max_age: float | None = 300.0,
+        clock: t.Callable[[], float] = time.time
+    ) -> None:
+        self._max_age = max_age
+        self._clock = clock
+        self._bits: t.Dict[str, int] = {}
+        self._roles: t.Dict[str, int] = {}
+        self._compiled: t.Dict[t.Tuple[str, ...], int] = {}
+        # one fingerprint per registry prefix, each chained onto the last
+        self._fingerprint = _chain_fingerprint("", "")
+        self._layouts: t.Set[str] = {self._fingerprint}
+        self.register(*permissions)
+
+    def __len__(self) -> int:
+        return len(self._bits)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._bits
+
+    @property
+    def max_age(self) -> float | None:
+        return self._max_age
+
+    @property
+    def fingerprint(self) -> str:
+        return self._fingerprint
+
+    def register(self, *names: str) -> int:
+        # bits are only ever appended, so masks stored before a new
+        # permission was registered keep their meaning and their
+        # fingerprint stays known to load().
+        for name in names:
+            if name not in self._bits:
+                self._bits[name] = 1 << len(self._bits)
+                self._fingerprint = _chain_fingerprint(self._fingerprint, name)
+                self._layouts.add(self._fingerprint)
+        return self.mask(*names)
+
+    def role(self, name: str, *permissions: str) -> int:
+        self._roles[name] = self.mask(*permissions)
+        return self._roles[name]
+
+    def mask(self, *names: str) -> int:
+        try:
+            return self._compiled[names]
+        except KeyError:
+            pass
+
+        mask = 0
+
+        for name in names:
+            try:
+                mask |= self._bits[name]
+            except KeyError:
+                raise ValueError(f"Unknown permission `{name}`")
+
+        self._compiled[names] = mask
+        return mask
+
+    def role_mask(self, *roles: str) -> int:
+        mask = 0
+
+        for role in roles:
+            try:
+                mask |= self._roles[role]
+            except KeyError:
+                raise ValueError(f"Unknown role `{role}`")
+
+        return mask
+
+    def names(self, mask: int) -> t.List[str]:
+        return [name for name, bit in self._bits.items() if mask & bit]
+
+    def has_all(self, subject: HasPermissions | int, *names: str) -> bool:
+        return has_all(subject, self.mask(*names))
+
+    def has_any(self, subject: HasPermissions | int, *names: str) -> bool:
+        return has_any(subject, self.mask(*names))
+
+    def dump(self, mask: int) -> t.List[t.Any]:
+        return [self.fingerprint, mask, self._clock()]
+
+    def load(self, data: t.Any) -> int | None:
+        # None sends the caller back to the provider: for masks built against
+        # another registry layout, and for masks older than `max_age`, which
+        # bounds how long a revoked permission survives in a session.
+        if not isinstance(data, list) or len(data) != 3 or data[0] not in self._layouts:
+            return None
+
+        mask, stored_at = data[1], data[2]
+
+        if not isinstance(mask, int) or not isinstance(stored_at, (int, float)):
+            return None
+
+        if self._max_age is not None and self._clock() - stored_at >= self._max_age:
+            return None
+
+        return mask
+
+
+def _chain_fingerprint(previous: str, name: str) -> str:
+    return hashlib.sha1(f"{previous}\0{name}".encode()).hexdigest()[:16]
+
+
+def _mask_of(subject: HasPermissions | int) -> int:
+    if isinstance(subject, int):
+        return subject
+    return subject.permission_mask
+
+
+def has_all(subject: HasPermissions | int, required: int) -> bool:
+    return _mask_of(subject) & required == required
+
+
+def has_any(subject: HasPermissions | int, required: int) -> bool:
+    return _mask_of(subject) & required != 0
+
+
+def store_permission_mask(session: Session, key: str, registry: PermissionRegistry, mask: int) -> None:
+    session[key] = registry.dump(mask)
+
+
+def load_permission_mask(session: Session, key: str, registry: PermissionRegistry) -> int | None:
+    try:
+        data = session[key]
+    except AttributeError:
+        return None
+    return registry.load(data)
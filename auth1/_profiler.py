@@ -0,0 +1,207 @@
+import contextlib
+import contextvars
+import cProfile
+import heapq
+import io
+import itertools
+import pstats
+import threading
+import time
+import tracemalloc
+import typing as t
+
+from ._types import Instrument
+from ._instrument import _NullSpan
+
+ProfileMode = t.Literal["cprofile", "tracemalloc"]
+
+
+class SlowRequest(t.NamedTuple):
+    duration: float
+    label: str | None
+    guard: str | None
+    session_bytes: int
+    phases: t.Dict[str, float]
+    profile: str | None = None
+
+
+class _RequestProfile:
+
+    __slots__ = ("label", "guard", "session_bytes", "phases")
+
+    def __init__(self, label: str | None) -> None:
+        self.label = label
+        self.guard: str | None = None
+        self.session_bytes = 0
+        self.phases: t.Dict[str, float] = {}
+
+
+class _PhaseSpan:
+
+    __slots__ = ("_request", "_operation", "_clock", "_start")
+
+    def __init__(self, request: _RequestProfile, operation: str, clock: t.Callable[[], float]) -> None:
+        self._request = request
+        self._operation = operation
+        self._clock = clock
+
+    def __enter__(self) -> None:
+        self._start = self._clock()
+
+    def __exit__(self, *exc_info: t.Any) -> None:
+        phases = self._request.phases
+        phases[self._operation] = phases.get(self._operation, 0.0) + self._clock() - self._start
+
+
+_current: contextvars.ContextVar[_RequestProfile | None] = contextvars.ContextVar("auth1_request_profile", default=None)
+
+
+class SlowRequestProfiler(Instrument):
+    """Keeps the phase breakdown of the slowest `capacity` requests.
+
+    Spans outside of `request()` are ignored. With `profile` set, requests
+    are profiled while they run and the report is kept only for those
+    slower than `threshold`. cProfile and tracemalloc are process wide, so
+    only one request is profiled at a time and the others just get timed.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 20,
+        threshold: float | None = None,
+        profile: ProfileMode | None = None,
+        clock: t.Callable[[], float] = time.perf_counter
+    ) -> None:
+        if profile is not None and threshold is None:
+            raise ValueError("A profile mode requires a latency threshold")
+
+        self._capacity = capacity
+        self._threshold = threshold
+        self._profile = profile
+        self._clock = clock
+        self._heap: t.List[t.Tuple[float, int, SlowRequest]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._profiling = False
+        self._failed_profiles = 0
+        self._null_span = _NullSpan()
+
+    @property
+    def threshold(self) -> float | None:
+        return self._threshold
+
+    @property
+    def failed_profiles(self) -> int:
+        # requests that were only timed because the profiler did not start
+        return self._failed_profiles
+
+    def span(self, operation: str) -> _PhaseSpan | _NullSpan:
+        request = _current.get()
+
+        if request is None:
+            return self._null_span
+
+        return _PhaseSpan(request, operation, self._clock)
+
+    def annotate(self, key: str, value: t.Any) -> None:
+        request = _current.get()
+
+        if request is None:
+            return None
+
+        if key == "session.bytes":
+            request.session_bytes = max(request.session_bytes, value)
+        elif key == "guard" and request.guard is None:
+            request.guard = value
+
+    @contextlib.contextmanager
+    def request(self, label: str | None = None) -> t.Iterator[None]:
+        profiler = self._start_profile()
+        request = _RequestProfile(label)
+        token = _current.set(request)
+        start = self._clock()
+
+        try:
+            yield
+        finally:
+            duration = self._clock() - start
+            _current.reset(token)
+
+            report = None
+
+            if profiler is not None:
+                report = self._stop_profile(profiler, duration)
+
+            self._record(SlowRequest(duration, request.label, request.guard, request.session_bytes, request.phases, report))
+
+    def slowest(self) -> t.List[SlowRequest]:
+        with self._lock:
+            entries = list(self._heap)
+        return [entry for _, _, entry in sorted(entries, key=lambda e: (-e[0], e[1]))]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._heap = []
+
+    def _record(self, entry: SlowRequest) -> None:
+        item = (entry.duration, next(self._counter), entry)
+
+        with self._lock:
+            if len(self._heap) < self._capacity:
+                heapq.heappush(self._heap, item)
+            elif entry.duration > self._heap[0][0]:
+                heapq.heapreplace(self._heap, item)
+
+    def _start_profile(self) -> cProfile.Profile | bool | None:
+        if self._profile is None:
+            return None
+
+        with self._lock:
+            if self._profiling:
+                return None
+            self._profiling = True
+
+        try:
+            if self._profile == "tracemalloc":
+                # leave tracing that somebody else started running afterwards
+                started = not tracemalloc.is_tracing()
+                if started:
+                    tracemalloc.start()
+                return started
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+            return profiler
+        except Exception:
+            # e.g. another profiler is already active, the request still runs
+            with self._lock:
+                self._profiling = False
+                self._failed_profiles += 1
+            return None
+
+    def _stop_profile(self, profiler: cProfile.Profile | bool, duration: float) -> str | None:
+        assert self._threshold is not None
+
+        try:
+            if isinstance(profiler, cProfile.Profile):
+                profiler.disable()
+
+                if duration < self._threshold:
+                    return None
+
+                stream = io.StringIO()
+                pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(25)
+                return stream.getvalue()
+
+            try:
+                if duration < self._threshold:
+                    return None
+
+                snapshot = tracemalloc.take_snapshot()
+                return "\n".join(str(stat) for stat in snapshot.statistics("lineno")[:25])
+            finally:
+                if profiler:
+                    tracemalloc.stop()
+        finally:
+            with self._lock:
+                self._profiling = False
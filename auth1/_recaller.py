@@ -0,0 +1,57 @@
+import hmac
+import hashlib
+import typing as t
+
+from ._random import random_string
+
+
+class Recaller:
+
+    __slots__ = ("_selector", "_validator")
+
+    def __init__(self, selector: str, validator: str) -> None:
+        self._selector = selector
+        self._validator = validator
+
+    @classmethod
+    def create(cls, selector: str | None = None) -> "Recaller":
+        if selector is None:
+            selector = random_string(24)
+        return cls(selector, random_string(64))
+
+    @classmethod
+    def parse(cls, value: str | None) -> t.Optional["Recaller"]:
+        if not value:
+            return None
+
+        selector, sep, validator = value.partition(":")
+
+        if not sep or not selector or not validator:
+            return None
+
+        return cls(selector, validator)
+
+    @staticmethod
+    def selector_of(stored_token: str) -> str:
+        return stored_token.partition(":")[0]
+
+    @property
+    def selector(self) -> str:
+        return self._selector
+
+    @property
+    def value(self) -> str:
+        return f"{self._selector}:{self._validator}"
+
+    @property
+    def stored_token(self) -> str:
+        validator_hash = hashlib.sha256(self._validator.encode()).hexdigest()
+        return f"{self._selector}:{validator_hash}"
+
+    def rotate(self) -> "Recaller":
+        return self.create(self._selector)
+
+    def matches(self, stored_token: str | None) -> bool:
+        if not stored_token:
+            return False
+        return hmac.compare_digest(self.stored_token.encode(), stored_token.encode())
@@ -5,11 +5,47 @@ from ._handler import (
 from ._serializer import (
     JSONSerializer
 )
+from ._index import InMemorySessionIndex
+from ._sharded import HashRing, ShardedSessionHandler
+from ._resilient import (
+    SessionUnavailableError,
+    CircuitBreaker,
+    BreakerStats,
+    ResilienceStats,
+    ResilientSessionHandler
+)
+from ._transfer import (
+    TransferStats,
+    supports_scan,
+    scan_sessions,
+    export_sessions,
+    import_sessions
+)
+from ._budget import SessionBudget, SessionTooLargeError, BudgetStats
+from ._config import SessionConfig, compile_session_config
 from ._manager import SessionManager
 
 __all__ = [
     "SessionStore",
     "NullSessionHandler",
     "JSONSerializer",
+    "InMemorySessionIndex",
+    "HashRing",
+    "ShardedSessionHandler",
+    "SessionUnavailableError",
+    "CircuitBreaker",
+    "BreakerStats",
+    "ResilienceStats",
+    "ResilientSessionHandler",
+    "TransferStats",
+    "supports_scan",
+    "scan_sessions",
+    "export_sessions",
+    "import_sessions",
+    "SessionBudget",
+    "SessionTooLargeError",
+    "BudgetStats",
+    "SessionConfig",
+    "compile_session_config",
     "SessionManager"
 ]
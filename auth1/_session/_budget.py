@@ -0,0 +1,140 @@
+import threading
+import typing as t
+
+BudgetPolicy = t.Literal["reject", "drop"]
+
+
+class SessionTooLargeError(ValueError):
+
+    def __init__(self, size: int, limit: int) -> None:
+        super().__init__(f"Encoded session is {size} bytes, over the {limit} byte limit")
+        self.size = size
+        self.limit = limit
+
+
+class BudgetStats(t.NamedTuple):
+    saves: int
+    near_budget: int
+    over_budget: int
+    rejected: int
+    dropped_keys: int
+
+
+class SessionBudget:
+
+    def __init__(
+        self,
+        soft_limit: int | None = None,
+        hard_limit: int | None = None,
+        policy: BudgetPolicy = "reject",
+        droppable: t.Iterable[str] = ()
+    ) -> None:
+        if policy not in ("reject", "drop"):
+            raise ValueError(f"Unknown session budget policy `{policy}`")
+
+        if soft_limit is not None and hard_limit is not None and soft_limit > hard_limit:
+            raise ValueError("The soft limit can not be above the hard limit")
+
+        self._soft_limit = soft_limit
+        self._hard_limit = hard_limit
+        self._policy = policy
+        self._droppable = tuple(droppable)
+        self._lock = threading.Lock()
+        self._saves = 0
+        self._near_budget = 0
+        self._over_budget = 0
+        self._rejected = 0
+        self._dropped_keys = 0
+
+    @classmethod
+    def from_config(cls, config: t.Dict[str, t.Any]) -> "SessionBudget":
+        for key in ("soft_limit", "hard_limit"):
+            limit = config.get(key, None)
+
+            # bool is an int, but never a byte count
+            if limit is not None and (not isinstance(limit, int) or isinstance(limit, bool) or limit < 0):
+                raise ValueError(f"`{key}` must be a non-negative integer")
+
+        if not isinstance(config.get("policy", "reject"), str):
+            raise ValueError("`policy` must be a string")
+
+        droppable = config.get("droppable", ())
+
+        if not isinstance(droppable, (list, tuple)) or not all(isinstance(key, str) for key in droppable):
+            raise ValueError("`droppable` must be a list of session keys")
+
+        return cls(
+            soft_limit=config.get("soft_limit", None),
+            hard_limit=config.get("hard_limit", None),
+            policy=config.get("policy", "reject"),
+            droppable=droppable
+        )
+
+    @property
+    def soft_limit(self) -> int | None:
+        return self._soft_limit
+
+    @property
+    def hard_limit(self) -> int | None:
+        return self._hard_limit
+
+    @property
+    def policy(self) -> BudgetPolicy:
+        return self._policy
+
+    @property
+    def droppable(self) -> t.Tuple[str, ...]:
+        return self._droppable
+
+    def stats(self) -> BudgetStats:
+        with self._lock:
+            return BudgetStats(self._saves, self._near_budget, self._over_budget, self._rejected, self._dropped_keys)
+
+    def enforce(
+        self,
+        attributes: t.Dict[t.Any, t.Any],
+        serialized: bytes,
+        encode: t.Callable[[t.Dict[t.Any, t.Any]], bytes]
+    ) -> bytes:
+        """Return what may be written for `attributes`, encoded as `serialized`.
+
+        Over the hard limit the "drop" policy removes droppable keys from
+        `attributes`, in the configured order, until the encoding fits.
+        Anything still too large raises SessionTooLargeError and nothing
+        should be written.
+        """
+        size = len(serialized)
+        soft_limit, hard_limit = self._soft_limit, self._hard_limit
+
+        near = soft_limit is not None and size > soft_limit
+        over = hard_limit is not None and size > hard_limit
+        dropped = 0
+
+        if over and self._policy == "drop":
+            assert hard_limit is not None
+
+            for key in self._droppable:
+                if key not in attributes:
+                    continue
+
+                del attributes[key]
+                dropped += 1
+                serialized = encode(attributes)
+
+                if len(serialized) <= hard_limit:
+                    break
+
+        rejected = hard_limit is not None and len(serialized) > hard_limit
+
+        with self._lock:
+            self._saves += 1
+            self._near_budget += near
+            self._over_budget += over
+            self._rejected += rejected
+            self._dropped_keys += dropped
+
+        if rejected:
+            assert hard_limit is not None
+            raise SessionTooLargeError(len(serialized), hard_limit)
+
+        return serialized
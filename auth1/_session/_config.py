@@ -0,0 +1,43 @@
+import typing as t
+
+from .._config import ConfigError, freeze
+from ._budget import SessionBudget
+
+
+class SessionConfig(t.NamedTuple):
+    cookie: str
+    serializer: str | None
+    index: str | None
+    budget: SessionBudget | None
+    raw: t.Mapping[str, t.Any]
+
+
+def compile_session_config(config: t.Mapping[str, t.Any]) -> SessionConfig:
+    if not isinstance(config, t.Mapping):
+        raise ConfigError("Session config must be a dict")
+
+    cookie = config.get("cookie", None) or "PHPSESSID"
+
+    if not isinstance(cookie, str):
+        raise ConfigError("`cookie` must be a string")
+
+    names = {}
+
+    for key in ("serializer", "index"):
+        value = config.get(key, None)
+        if value is not None and not isinstance(value, str):
+            raise ConfigError(f"`{key}` must be a factory name")
+        names[key] = value
+
+    budget = None
+    budget_config = config.get("budget", None)
+
+    if budget_config is not None:
+        if not isinstance(budget_config, dict):
+            raise ConfigError("`budget` must be a dict")
+        try:
+            budget = SessionBudget.from_config(budget_config)
+        except ValueError as e:
+            raise ConfigError(f"Invalid session budget: {e}")
+
+    return SessionConfig(cookie, names['serializer'], names['index'], budget, freeze(config))
@@ -13,3 +13,7 @@ class NullSessionHandler(SessionHandler):
 
     def destroy(self, id: str) -> None:
         self.destroyed = True
+
+    async def scan(self, batch_size: int) -> t.AsyncIterator[t.Sequence[t.Tuple[str, bytes]]]:
+        return
+        yield
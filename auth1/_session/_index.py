@@ -0,0 +1,114 @@
+import time
+import heapq
+import threading
+import typing as t
+
+from .._types import SessionIndex, SessionInfo
+
+
+class InMemorySessionIndex(SessionIndex):
+
+    def __init__(self, max_age: float = 30 * 24 * 60 * 60, clock: t.Callable[[], float] = time.time) -> None:
+        self._max_age = max_age
+        self._clock = clock
+        self._users: t.Dict[str, t.Dict[str, SessionInfo]] = {}
+        self._owners: t.Dict[str, str] = {}
+        # (last_seen, session_id), outdated entries are skipped when popped
+        self._expiry: t.List[t.Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def max_age(self) -> float:
+        return self._max_age
+
+    def __len__(self) -> int:
+        return len(self._owners)
+
+    def add(self, info: SessionInfo) -> None:
+        with self._lock:
+            self._remove(info.session_id)
+            self._users.setdefault(info.user_id, {})[info.session_id] = info
+            self._owners[info.session_id] = info.user_id
+            self._schedule(info)
+            self._prune_expired()
+
+    def touch(self, session_id: str, last_seen: float) -> None:
+        with self._lock:
+            user_id = self._owners.get(session_id, None)
+
+            if user_id is None:
+                return None
+
+            sessions = self._users[user_id]
+            info = sessions[session_id] = sessions[session_id]._replace(last_seen=last_seen)
+            self._schedule(info)
+            self._prune_expired()
+
+    def rename(self, old_id: str, new_id: str) -> None:
+        with self._lock:
+            user_id = self._owners.pop(old_id, None)
+
+            if user_id is None:
+                return None
+
+            sessions = self._users[user_id]
+            info = sessions[new_id] = sessions.pop(old_id)._replace(session_id=new_id)
+            self._owners[new_id] = user_id
+            self._schedule(info)
+
+    def remove(self, session_id: str) -> None:
+        with self._lock:
+            self._remove(session_id)
+
+    def sessions(self, user_id: str) -> t.List[SessionInfo]:
+        with self._lock:
+            self._prune(user_id)
+            return sorted(self._users.get(user_id, {}).values(), key=lambda info: info.last_seen, reverse=True)
+
+    def _remove(self, session_id: str) -> None:
+        user_id = self._owners.pop(session_id, None)
+
+        if user_id is None:
+            return None
+
+        sessions = self._users[user_id]
+        sessions.pop(session_id, None)
+
+        if not sessions:
+            del self._users[user_id]
+
+    def _schedule(self, info: SessionInfo) -> None:
+        heapq.heappush(self._expiry, (info.last_seen, info.session_id))
+
+        # every touch leaves an outdated entry behind, rebuild before they
+        # outnumber the live sessions.
+        if len(self._expiry) > 2 * len(self._owners) + 64:
+            self._expiry = [
+                (info.last_seen, info.session_id)
+                for sessions in self._users.values()
+                for info in sessions.values()
+            ]
+            heapq.heapify(self._expiry)
+
+    def _prune_expired(self) -> None:
+        # oldest first, so users that never list their sessions are pruned too
+        expiry = self._expiry
+        expired_before = self._clock() - self._max_age
+
+        while expiry and expiry[0][0] < expired_before:
+            last_seen, session_id = heapq.heappop(expiry)
+            user_id = self._owners.get(session_id, None)
+
+            if user_id is not None and self._users[user_id][session_id].last_seen == last_seen:
+                self._remove(session_id)
+
+    def _prune(self, user_id: str) -> None:
+        sessions = self._users.get(user_id, None)
+
+        if sessions is None:
+            return None
+
+        expired_before = self._clock() - self._max_age
+
+        for session_id in [id for id, info in sessions.items() if info.last_seen < expired_before]:
+            self._remove(session_id)
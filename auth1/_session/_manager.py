@@ -1,38 +1,75 @@
 import typing as t
-from .._types import SessionHandler, SessionSerializer
+from .._types import SessionHandler, SessionSerializer, SessionIndex, Instrument
+from .._offload import Offloader
 from ._store import SessionStore
+from ._budget import SessionBudget
+from .._config import ConfigError
+from ._config import SessionConfig, compile_session_config
 
 class SessionManager:
 
-    def __init__(self, config: t.Dict[str, t.Any]):
+    def __init__(
+        self,
+        config: t.Dict[str, t.Any],
+        offloader: Offloader | None = None,
+        instrument: Instrument | None = None
+    ):
         self._config = config
+        self._offloader = offloader
+        self._instrument = instrument
         self._handler_factory: t.Dict[str, t.Callable] = {} # type: ignore[type-arg]
         self._serializer_factory: t.Dict[str, t.Callable] = {} # type: ignore[type-arg]
+        self._index_factory: t.Dict[str, t.Callable] = {} # type: ignore[type-arg]
+        self._indexes: t.Dict[str, SessionIndex] = {}
+        # the budget is built here too, shared so its counters cover every
+        # store this manager creates
+        self._compiled: SessionConfig = compile_session_config(config)
 
     @property
     def config(self) -> t.Dict[str, t.Any]:
         return self._config
 
-    def create(self, name: str) -> SessionStore:
-        session_name: str = "PHPSESSID"
+    @property
+    def compiled(self) -> SessionConfig:
+        return self._compiled
 
-        try:
-            session_name = self._config['cookie']
-        except KeyError:
-            pass
+    @property
+    def budget(self) -> SessionBudget | None:
+        return self._compiled.budget
 
-        if not session_name:
-            session_name = "PHPSESSID"
+    def create(self, name: str) -> SessionStore:
+        compiled = self._compiled
 
         handler = self._create_handler(name)
+        serializer = self._create_serializer(compiled.serializer)
+        index = self._get_index(compiled.index)
 
-        serializer_name = self._config.get("serializer", None)
+        session_store: SessionStore = SessionStore(
+            compiled.cookie,
+            handler,
+            id=None,
+            serializer=serializer,
+            offloader=self._offloader,
+            index=index,
+            instrument=self._instrument,
+            budget=compiled.budget
+        )
 
-        serializer = self._create_serializer(serializer_name)
+        return session_store
 
-        session_store: SessionStore = SessionStore(session_name, handler, id=None, serializer=serializer)
+    def validate(self) -> None:
+        self._check_factories(self._compiled)
 
-        return session_store
+    def reload(self, config: t.Dict[str, t.Any]) -> None:
+        compiled = compile_session_config(config)
+        self._check_factories(compiled)
+
+        # an unchanged budget keeps its counters
+        if compiled.raw.get("budget", None) == self._compiled.raw.get("budget", None):
+            compiled = compiled._replace(budget=self._compiled.budget)
+
+        self._config = config
+        self._compiled = compiled
 
     def handler_factory(self, name: str) -> t.Callable: # type: ignore [type-arg]
         def decorator(f: t.Callable) -> t.Callable: # type: ignore [type-arg]
@@ -46,14 +83,54 @@ class SessionManager:
             return f
         return decorator
 
+    def index_factory(self, name: str) -> t.Callable: # type: ignore [type-arg]
+        def decorator(f: t.Callable) -> t.Callable: # type: ignore [type-arg]
+            self._index_factory[name] = f
+            return f
+        return decorator
+
+    def _check_factories(self, compiled: SessionConfig) -> None:
+        if compiled.serializer is not None and compiled.serializer not in self._serializer_factory:
+            raise ConfigError(f"Unknown session serializer `{compiled.serializer}`")
+
+        if compiled.index is not None and compiled.index not in self._index_factory:
+            raise ConfigError(f"Unknown session index `{compiled.index}`")
+
     def _create_handler(self, name: str) -> SessionHandler:
-        handler_factory = self._handler_factory[name]
+        try:
+            handler_factory = self._handler_factory[name]
+        except KeyError:
+            raise ConfigError(f"Unknown session handler `{name}`")
+
         handler: SessionHandler = handler_factory()
         return handler
 
     def _create_serializer(self, name: str | None) -> SessionSerializer | None:
         if name is None:
             return None
-        serializer_factory = self._serializer_factory[name]
+        try:
+            serializer_factory = self._serializer_factory[name]
+        except KeyError:
+            raise ConfigError(f"Unknown session serializer `{name}`")
+
         serializer: SessionSerializer = serializer_factory()
         return serializer
+
+    def _get_index(self, name: str | None) -> SessionIndex | None:
+        if name is None:
+            return None
+
+        # unlike handlers the index is shared state, every store gets the same one
+        try:
+            return self._indexes[name]
+        except KeyError:
+            pass
+
+        try:
+            index_factory = self._index_factory[name]
+        except KeyError:
+            raise ConfigError(f"Unknown session index `{name}`")
+
+        index: SessionIndex = index_factory()
+        self._indexes[name] = index
+        return index
@@ -0,0 +1,370 @@
+import asyncio
+import inspect
+import threading
+import time
+import typing as t
+
+from .._types import Instrument, SessionHandler
+from .._cache import TTLCache
+from .._instrument import NULL_INSTRUMENT
+
+BreakerState = t.Literal["closed", "open", "half_open"]
+
+_T = t.TypeVar("_T")
+
+
+class SessionUnavailableError(ConnectionError):
+    pass
+
+
+class BreakerStats(t.NamedTuple):
+    state: BreakerState
+    failures: int
+    opened: int
+    rejected: int
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures.
+
+    While open every call is rejected. After `reset_timeout` a single trial
+    call is let through: success closes the breaker again, failure reopens
+    it for another `reset_timeout`.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: t.Callable[[], float] = time.monotonic
+    ) -> None:
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be a positive integer")
+
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state: BreakerState = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._opened = 0
+        self._rejected = 0
+
+    @property
+    def state(self) -> BreakerState:
+        with self._lock:
+            if self._state == "open" and self._clock() - self._opened_at >= self._reset_timeout:
+                return "half_open"
+            return self._state
+
+    def stats(self) -> BreakerStats:
+        state = self.state
+
+        with self._lock:
+            return BreakerStats(state, self._failures, self._opened, self._rejected)
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == "closed":
+                return True
+
+            if self._state == "open" and self._clock() - self._opened_at >= self._reset_timeout:
+                self._state = "half_open"
+                self._trial = False
+
+            if self._state == "half_open" and not self._trial:
+                self._trial = True
+                return True
+
+            self._rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+            self._trial = False
+
+    def record_abandoned(self) -> None:
+        # a cancelled trial says nothing about the backend, let the next call try
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+
+            if self._state == "half_open" or self._failures >= self._failure_threshold:
+                if self._state != "open":
+                    self._opened += 1
+                self._state = "open"
+                self._opened_at = self._clock()
+                self._trial = False
+
+
+class ResilienceStats(t.NamedTuple):
+    breaker: BreakerStats
+    calls: int
+    timeouts: int
+    failures: int
+    fallbacks: int
+    reads: int
+    hedged: int
+    hedge_wins: int
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedged / self.reads if self.reads else 0.0
+
+
+class _LatencyWindow:
+
+    __slots__ = ("_samples", "_index", "_size", "_quantile", "_every", "_pending", "value")
+
+    def __init__(self, size: int, quantile: float, every: int = 32) -> None:
+        self._samples: t.List[float] = []
+        self._index = 0
+        self._size = size
+        self._quantile = quantile
+        self._every = every
+        self._pending = 0
+        self.value: float | None = None
+
+    def add(self, sample: float) -> None:
+        if len(self._samples) < self._size:
+            self._samples.append(sample)
+        else:
+            self._samples[self._index] = sample
+            self._index = (self._index + 1) % self._size
+
+        self._pending += 1
+
+        # sorting on every read would cost more than the hedge saves
+        if self._pending >= self._every:
+            self._pending = 0
+            ordered = sorted(self._samples)
+            self.value = ordered[min(int(self._quantile * len(ordered)), len(ordered) - 1)]
+
+
+class ResilientSessionHandler(SessionHandler):
+    """Wraps an async session handler so a degraded backend fails fast.
+
+    Every call is bounded by a timeout and counted by a circuit breaker;
+    while the breaker is open calls raise SessionUnavailableError without
+    touching the backend. With a `fallback` cache, sessions read or written
+    by this process are served from it when the backend can not be
+    reached. With a `replica`, a read still running after the p95 read
+    latency is repeated on the replica and the first answer wins.
+
+    Its methods are coroutines, so it can only be used with the async
+    session API.
+    """
+
+    def __init__(
+        self,
+        handler: SessionHandler,
+        timeout: float = 1.0,
+        read_timeout: float | None = None,
+        write_timeout: float | None = None,
+        breaker: CircuitBreaker | None = None,
+        fallback: TTLCache[str, bytes] | None = None,
+        replica: SessionHandler | None = None,
+        hedge_quantile: float = 0.95,
+        hedge_min_delay: float = 0.002,
+        instrument: Instrument | None = None,
+        clock: t.Callable[[], float] = time.perf_counter
+    ) -> None:
+        self._handler = handler
+        self._read_timeout = timeout if read_timeout is None else read_timeout
+        self._write_timeout = timeout if write_timeout is None else write_timeout
+        self._breaker = breaker or CircuitBreaker()
+        self._fallback = fallback
+        self._replica = replica
+        self._hedge_min_delay = hedge_min_delay
+        self._latency = _LatencyWindow(1024, hedge_quantile)
+        self._instrument = instrument or NULL_INSTRUMENT
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._timeouts = 0
+        self._failures = 0
+        self._fallbacks = 0
+        self._reads = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self._breaker
+
+    @property
+    def hedge_delay(self) -> float | None:
+        if self._replica is None or self._latency.value is None:
+            return None
+        return max(self._latency.value, self._hedge_min_delay)
+
+    def stats(self) -> ResilienceStats:
+        breaker = self._breaker.stats()
+
+        with self._lock:
+            return ResilienceStats(
+                breaker,
+                self._calls,
+                self._timeouts,
+                self._failures,
+                self._fallbacks,
+                self._reads,
+                self._hedged,
+                self._hedge_wins
+            )
+
+    async def read(self, id: str) -> bytes:
+        with self._lock:
+            self._reads += 1
+
+        try:
+            with self._instrument.span("session.backend.read"):
+                data = await self._call(lambda: self._read(id))
+        except SessionUnavailableError:
+            cached = None if self._fallback is None else self._fallback.get(id)
+
+            if cached is None:
+                raise
+
+            with self._lock:
+                self._fallbacks += 1
+
+            return cached
+
+        if self._fallback is not None:
+            if data:
+                self._fallback.set(id, data)
+            else:
+                # destroyed elsewhere, an outage must not bring it back
+                self._fallback.pop(id)
+
+        return data
+
+    async def write(self, id: str, data: bytes) -> None:
+        # cached first, the latest state is still served during an outage
+        if self._fallback is not None:
+            self._fallback.set(id, data)
+
+        with self._instrument.span("session.backend.write"):
+            await self._call(lambda: self._timed(self._handler.write(id, data), self._write_timeout))
+
+    async def destroy(self, id: str) -> None:
+        if self._fallback is not None:
+            self._fallback.pop(id)
+
+        with self._instrument.span("session.backend.destroy"):
+            await self._call(lambda: self._timed(self._handler.destroy(id), self._write_timeout))
+
+    async def scan(self, batch_size: int) -> t.AsyncIterator[t.Sequence[t.Tuple[str, bytes]]]:
+        scan = getattr(self._handler, "scan", None)
+
+        if scan is None:
+            raise TypeError(f"{type(self._handler).__name__} does not support scanning sessions")
+
+        # bulk tooling, not on the request path: no timeout or breaker
+        async for batch in scan(batch_size):
+            yield batch
+
+    async def _call(self, f: t.Callable[[], t.Awaitable[_T]]) -> _T:
+        if not self._breaker.allow():
+            raise SessionUnavailableError("Session backend circuit is open")
+
+        with self._lock:
+            self._calls += 1
+
+        try:
+            result = await f()
+        except asyncio.TimeoutError as e:
+            self._breaker.record_failure()
+
+            with self._lock:
+                self._timeouts += 1
+
+            raise SessionUnavailableError("Session backend timed out") from e
+        except Exception as e:
+            self._breaker.record_failure()
+
+            with self._lock:
+                self._failures += 1
+
+            raise SessionUnavailableError("Session backend failed") from e
+        except BaseException:
+            self._breaker.record_abandoned()
+            raise
+
+        self._breaker.record_success()
+        return result
+
+    async def _timed(self, result: t.Awaitable[_T] | _T, timeout: float) -> _T:
+        if not inspect.isawaitable(result):
+            return result
+        return await asyncio.wait_for(result, timeout)
+
+    async def _read(self, id: str) -> bytes:
+        start = self._clock()
+        delay = self.hedge_delay
+
+        if delay is None:
+            data = await self._timed(self._handler.read(id), self._read_timeout)
+        else:
+            data = await asyncio.wait_for(self._hedged_read(id, delay), self._read_timeout)
+
+        self._latency.add(self._clock() - start)
+        return data
+
+    async def _hedged_read(self, id: str, delay: float) -> bytes:
+        assert self._replica is not None
+
+        primary = asyncio.ensure_future(_awaitable(self._handler.read(id)))
+        hedge: asyncio.Future[bytes] | None = None
+
+        try:
+            done, _ = await asyncio.wait((primary,), timeout=delay)
+
+            if done:
+                return primary.result()
+
+            with self._lock:
+                self._hedged += 1
+
+            hedge = asyncio.ensure_future(_awaitable(self._replica.read(id)))
+            pending: t.Set[asyncio.Future[bytes]] = {primary, hedge}
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+                # a failed leg still leaves the other one to answer
+                for task in done:
+                    if task.exception() is not None:
+                        continue
+
+                    if task is hedge:
+                        # a lagging replica may not have the session yet,
+                        # only the primary can say it does not exist.
+                        if not task.result():
+                            continue
+
+                        with self._lock:
+                            self._hedge_wins += 1
+
+                    return task.result()
+
+            # the primary failed and the replica had nothing better
+            return primary.result()
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+
+async def _awaitable(result: t.Awaitable[_T] | _T) -> _T:
+    if inspect.isawaitable(result):
+        return await result
+    return result
@@ -0,0 +1,275 @@
+import bisect
+import hashlib
+import inspect
+import time
+import typing as t
+
+from .._types import SessionHandler
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+
+    def __init__(self, nodes: t.Iterable[str] = (), vnodes: int = 160) -> None:
+        if vnodes < 1:
+            raise ValueError("vnodes must be a positive integer")
+
+        self._vnodes = vnodes
+        self._nodes: t.Set[str] = set()
+        self._positions: t.List[int] = []
+        self._owners: t.List[str] = []
+
+        for node in nodes:
+            self._nodes.add(node)
+
+        self._build()
+
+    @property
+    def nodes(self) -> t.FrozenSet[str]:
+        return frozenset(self._nodes)
+
+    @property
+    def vnodes(self) -> int:
+        return self._vnodes
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def with_node(self, node: str) -> "HashRing":
+        return HashRing(self._nodes | {node}, self._vnodes)
+
+    def without_node(self, node: str) -> "HashRing":
+        return HashRing(self._nodes - {node}, self._vnodes)
+
+    def node_for(self, key: str) -> str:
+        if not self._positions:
+            raise LookupError("The hash ring has no nodes")
+
+        index = bisect.bisect(self._positions, _hash(key))
+
+        if index == len(self._positions):
+            index = 0
+
+        return self._owners[index]
+
+    def _build(self) -> None:
+        # every node owns `vnodes` points on the ring, so adding or removing
+        # one only moves the keys between its points and their neighbours.
+        points = sorted(
+            (_hash(f"{node}#{replica}"), node)
+            for node in self._nodes
+            for replica in range(self._vnodes)
+        )
+        self._positions = [position for position, _ in points]
+        self._owners = [node for _, node in points]
+
+
+class _Routing(t.NamedTuple):
+    ring: HashRing
+    handlers: t.Mapping[str, SessionHandler]
+
+    def handler_for(self, id: str) -> SessionHandler:
+        return self.handlers[self.ring.node_for(id)]
+
+
+class ShardedSessionHandler(SessionHandler):
+    """Routes sessions by id across child handlers with a consistent hash ring.
+
+    After `add_shard` or `remove_shard` with `dual_read`, a session missing
+    from its new shard is read from the shard that owned it before, so
+    logged in users survive a rebalance. The next save writes it to the new
+    shard. The window ends with `finish_rebalance` or after
+    `rebalance_seconds`, and only one rebalance can be open at a time.
+    """
+
+    def __init__(
+        self,
+        shards: t.Mapping[str, SessionHandler],
+        vnodes: int = 160,
+        rebalance_seconds: float | None = None,
+        clock: t.Callable[[], float] = time.monotonic
+    ) -> None:
+        if not shards:
+            raise ValueError("At least one shard is required")
+
+        # ring and handlers are swapped together, a request running during
+        # add_shard or remove_shard sees either the old or the new pair.
+        self._routing = _Routing(HashRing(shards, vnodes), dict(shards))
+        self._rebalance_seconds = rebalance_seconds
+        self._clock = clock
+        self._previous: _Routing | None = None
+        self._rebalance_until: float | None = None
+
+    @property
+    def shards(self) -> t.Dict[str, SessionHandler]:
+        return dict(self._routing.handlers)
+
+    @property
+    def rebalancing(self) -> bool:
+        return self._previous_routing() is not None
+
+    def shard_for(self, id: str) -> str:
+        return self._routing.ring.node_for(id)
+
+    def add_shard(self, name: str, handler: SessionHandler, dual_read: bool = True) -> None:
+        routing = self._routing
+
+        if name in routing.handlers:
+            raise ValueError(f"Shard `{name}` already exists")
+
+        self._check_not_rebalancing()
+        self._rebalance(_Routing(routing.ring.with_node(name), {**routing.handlers, name: handler}), dual_read)
+
+    def remove_shard(self, name: str, dual_read: bool = True) -> SessionHandler:
+        routing = self._routing
+
+        if name not in routing.handlers:
+            raise ValueError(f"Unknown shard `{name}`")
+
+        if len(routing.handlers) == 1:
+            raise ValueError("Can not remove the last shard")
+
+        self._check_not_rebalancing()
+
+        handlers = dict(routing.handlers)
+        handler = handlers.pop(name)
+
+        self._rebalance(_Routing(routing.ring.without_node(name), handlers), dual_read)
+
+        return handler
+
+    def finish_rebalance(self) -> None:
+        self._previous = None
+        self._rebalance_until = None
+
+    def read(self, id: str) -> t.Awaitable[bytes] | bytes:
+        routing = self._routing
+        data = routing.handler_for(id).read(id)
+        previous = self._previous_handler(routing, id)
+
+        if previous is None:
+            return data
+
+        if inspect.isawaitable(data):
+            return self._async_dual_read(data, previous, id)
+
+        return data or previous.read(id)
+
+    def write(self, id: str, data: bytes) -> t.Awaitable[None] | None:
+        return self._routing.handler_for(id).write(id, data)
+
+    def destroy(self, id: str) -> t.Awaitable[None] | None:
+        routing = self._routing
+        result = routing.handler_for(id).destroy(id)
+        previous = self._previous_handler(routing, id)
+
+        if previous is None:
+            return result
+
+        # a stale copy on the old shard would come back through the dual read
+        previous_result = previous.destroy(id)
+
+        if inspect.isawaitable(result) or inspect.isawaitable(previous_result):
+            return self._async_wait(result, previous_result)
+
+        return None
+
+    async def scan(self, batch_size: int) -> t.AsyncIterator[t.Sequence[t.Tuple[str, bytes]]]:
+        # yields what read() would return: a copy is skipped unless its
+        # shard owns the id, or owned it before the rebalance and the new
+        # owner has nothing for it yet.
+        routing = self._routing
+        previous = self._previous_routing()
+        shards = dict(routing.handlers)
+
+        if previous is not None:
+            shards = {**previous.handlers, **shards}
+
+        for name, handler in shards.items():
+            scan = getattr(handler, "scan", None)
+
+            if scan is None:
+                raise TypeError(f"Shard `{name}` does not support scanning sessions")
+
+            async for batch in scan(batch_size):
+                owned = []
+
+                for id, data in batch:
+                    owner = routing.ring.node_for(id)
+
+                    if owner == name:
+                        owned.append((id, data))
+                        continue
+
+                    if previous is None or previous.ring.node_for(id) != name:
+                        continue
+
+                    current = routing.handlers[owner].read(id)
+
+                    if inspect.isawaitable(current):
+                        current = await current
+
+                    if not current:
+                        owned.append((id, data))
+
+                if owned:
+                    yield owned
+
+    def _check_not_rebalancing(self) -> None:
+        # a second ring change would strand sessions still on the first ring
+        if self.rebalancing:
+            raise RuntimeError("A rebalance is in progress, call finish_rebalance() first")
+
+    def _rebalance(self, routing: _Routing, dual_read: bool) -> None:
+        if dual_read:
+            # the old routing is in place before requests start using the new one
+            if self._rebalance_seconds is not None:
+                self._rebalance_until = self._clock() + self._rebalance_seconds
+
+            self._previous = self._routing
+
+        self._routing = routing
+
+    def _previous_routing(self) -> _Routing | None:
+        if self._previous is None:
+            return None
+
+        if self._rebalance_until is not None and self._clock() >= self._rebalance_until:
+            self.finish_rebalance()
+            return None
+
+        return self._previous
+
+    def _previous_handler(self, routing: _Routing, id: str) -> SessionHandler | None:
+        previous = self._previous_routing()
+
+        if previous is None:
+            return None
+
+        previous_node = previous.ring.node_for(id)
+
+        if previous_node == routing.ring.node_for(id):
+            return None
+
+        return previous.handlers[previous_node]
+
+    async def _async_dual_read(self, data: t.Awaitable[bytes], previous: SessionHandler, id: str) -> bytes:
+        result = await data
+
+        if result:
+            return result
+
+        previous_data = previous.read(id)
+
+        if inspect.isawaitable(previous_data):
+            previous_data = await previous_data
+
+        return previous_data
+
+    async def _async_wait(self, *results: t.Any) -> None:
+        for result in results:
+            if inspect.isawaitable(result):
+                await result
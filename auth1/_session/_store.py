@@ -2,10 +2,17 @@ import os
 import binascii
 import typing as t
 import inspect
+import asyncio
+import hashlib
+import time
 
-from .._types import SessionHandler, SessionSerializer
+from .._types import SessionHandler, SessionSerializer, SessionIndex, SessionInfo, Instrument
+from .._instrument import NULL_INSTRUMENT
+from ._budget import SessionBudget
 from .._random import random_string
+from .._offload import Offloader
 from ._serializer import JSONSerializer
+_T = t.TypeVar("_T")
 
 class SessionStore:
 
@@ -14,17 +21,30 @@ class SessionStore:
         name: str,
         handler: SessionHandler,
         id: str | None = None,
-        serializer: SessionSerializer | None = None
+        serializer: SessionSerializer | None = None,
+        offloader: Offloader | None = None,
+        index: SessionIndex | None = None,
+        touch_interval: float = 60.0,
+        clock: t.Callable[[], float] = time.time,
+        instrument: Instrument | None = None,
+        budget: SessionBudget | None = None
     ):
         self._name = name
         self._handler: SessionHandler = handler
         self._id: str | None = id
+        self._offloader = offloader
+        self._index = index
+        self._touch_interval = touch_interval
+        self._clock = clock
+        self._instrument: Instrument = NULL_INSTRUMENT if instrument is None else instrument
+        self._budget = budget
 
         if serializer is None:
             serializer = JSONSerializer()
 
         self._serializer: SessionSerializer = serializer
         self._attributes: t.Dict[t.Any, t.Any] = {}
+        self._prefetched: t.Dict[str, t.Tuple[t.Any, asyncio.Future[t.Any]]] = {}
 
     @property
     def name(self) -> str:
@@ -52,6 +72,14 @@ class SessionStore:
     def serializer(self) -> SessionSerializer:
         return self._serializer
 
+    @property
+    def index(self) -> SessionIndex | None:
+        return self._index
+
+    @property
+    def budget(self) -> SessionBudget | None:
+        return self._budget
+
     @property
     def token(self) -> str:
         return self._attributes['_token'] # type: ignore
@@ -59,7 +87,8 @@ class SessionStore:
     def start(self) -> None:
         assert self._id is not None
 
-        session_data = self._handler.read(self._id)
+        with self._instrument.span("session.read"):
+            session_data = self._handler.read(self._id)
 
         if inspect.isawaitable(session_data):
             raise TypeError("Cannot use awaitable return value from handler read")
@@ -67,7 +96,10 @@ class SessionStore:
         if not session_data:
             self._attributes = {}
         else:
-            self._attributes = self._serializer.decode(session_data)
+            self._instrument.annotate("session.bytes", len(session_data))
+
+            with self._instrument.span("session.decode"):
+                self._attributes = self._serializer.decode(session_data)
 
         if '_token' not in self._attributes:
             self.regenerate_token()
@@ -75,49 +107,266 @@ class SessionStore:
     async def async_start(self) -> None:
         assert self._id is not None
 
-        session_data: t.Awaitable[bytes] | bytes = self._handler.read(self._id)
+        with self._instrument.span("session.read"):
+            session_data: t.Awaitable[bytes] | bytes = self._async_call(self._handler.read, self._id)
 
-        if inspect.isawaitable(session_data):
-            session_data = await session_data
+            if inspect.isawaitable(session_data):
+                session_data = await session_data
 
         if not session_data:
             self._attributes = {}
         else:
-            self._attributes = self._serializer.decode(session_data)
+            self._instrument.annotate("session.bytes", len(session_data))
+
+            with self._instrument.span("session.decode"):
+                self._attributes = self._serializer.decode(session_data)
 
         if '_token' not in self._attributes:
             self.regenerate_token()
 
     def save(self) -> None:
         assert self._id is not None
-        serialized = self._serializer.encode(self._attributes)
-        self._handler.write(self._id, serialized)
+
+        last_seen = self._touch()
+
+        if last_seen is not None:
+            self._ensure_sync(self._index.touch(self._id, last_seen)) # type: ignore [union-attr]
+
+        serialized = self._encode()
+
+        with self._instrument.span("session.write"):
+            self._handler.write(self._id, serialized)
 
     async def async_save(self) -> None:
         assert self._id is not None
-        serialized = self._serializer.encode(self._attributes)
-        write_result: t.Awaitable[None] | None = self._handler.write(self._id, serialized)
 
-        if inspect.isawaitable(write_result):
-            await write_result
+        last_seen = self._touch()
+
+        if last_seen is not None:
+            touch_result = self._async_call(self._index.touch, self._id, last_seen) # type: ignore [union-attr]
+
+            if inspect.isawaitable(touch_result):
+                await touch_result
+
+        serialized = self._encode()
+
+        with self._instrument.span("session.write"):
+            write_result: t.Awaitable[None] | None = self._async_call(self._handler.write, self._id, serialized)
+
+            if inspect.isawaitable(write_result):
+                await write_result
+
+    def key_sizes(self) -> t.Dict[t.Any, int]:
+        # encoded one by one, so the sizes do not add up to the whole session
+        # exactly, but they point at the key that is growing.
+        sizes = {key: len(self._serializer.encode({key: value})) for key, value in self._attributes.items()}
+        return dict(sorted(sizes.items(), key=lambda item: item[1], reverse=True))
+
+    def _encode(self) -> bytes:
+        with self._instrument.span("session.encode"):
+            serialized = self._serializer.encode(self._attributes)
+
+            if self._budget is not None:
+                serialized = self._budget.enforce(self._attributes, serialized, self._serializer.encode)
+
+        self._instrument.annotate("session.bytes", len(serialized))
+
+        return serialized
 
     def migrate(self, destroy: bool = False) -> bool:
-        if destroy and self._id is not None:
-            self._handler.destroy(self._id)
+        old_id = self._id
+
+        if destroy and old_id is not None:
+            with self._instrument.span("session.destroy"):
+                self._handler.destroy(old_id)
         self._id = self.generate_session_id()
+
+        if self._index is not None and old_id is not None:
+            self._ensure_sync(self._migrate_index(old_id, self._id))
+
         return True
 
     async def async_migrate(self, destroy: bool = False) -> bool:
         if destroy and self._id is not None:
-            destroy_result = self._handler.destroy(self._id)
+            with self._instrument.span("session.destroy"):
+                destroy_result = self._async_call(self._handler.destroy, self._id)
+
+                if inspect.isawaitable(destroy_result):
+                    await destroy_result
+
+            old_id = self._id
+            self._id = self.generate_session_id()
+
+            if self._index is not None:
+                index_result = self._migrate_index(old_id, self._id, _async=True)
+
+                if inspect.isawaitable(index_result):
+                    await index_result
+
+        return True
+
+    def track(self, user_id: str, user_agent: str | None = None) -> None:
+        if self._index is None or self._id is None:
+            return None
+
+        self._ensure_sync(self._index.add(self._index_info(user_id, user_agent)))
+
+    async def async_track(self, user_id: str, user_agent: str | None = None) -> None:
+        if self._index is None or self._id is None:
+            return None
+
+        add_result = self._async_call(self._index.add, self._index_info(user_id, user_agent))
+
+        if inspect.isawaitable(add_result):
+            await add_result
+
+    def user_sessions(self, user_id: str) -> t.List[SessionInfo]:
+        if self._index is None:
+            return []
+        return self._ensure_sync(self._index.sessions(str(user_id)))
+
+    async def async_user_sessions(self, user_id: str) -> t.List[SessionInfo]:
+        if self._index is None:
+            return []
+
+        sessions = self._async_call(self._index.sessions, str(user_id))
+
+        if inspect.isawaitable(sessions):
+            sessions = await sessions
+
+        return sessions
+
+    def destroy_session(self, user_id: str, session_id: str) -> bool:
+        # only sessions indexed for this user can be destroyed, so a forged
+        # session id can not sign out somebody else.
+        if not any(info.session_id == session_id for info in self.user_sessions(user_id)):
+            return False
+
+        # the current session would be saved again at the end of the request
+        if session_id == self._id:
+            return self.invalidate()
+
+        with self._instrument.span("session.destroy"):
+            self._handler.destroy(session_id)
+
+        self._ensure_sync(self._index.remove(session_id)) # type: ignore [union-attr]
+        return True
+
+    async def async_destroy_session(self, user_id: str, session_id: str) -> bool:
+        if not any(info.session_id == session_id for info in await self.async_user_sessions(user_id)):
+            return False
+
+        if session_id == self._id:
+            return await self.async_invalidate()
+
+        with self._instrument.span("session.destroy"):
+            destroy_result = self._async_call(self._handler.destroy, session_id)
 
             if inspect.isawaitable(destroy_result):
                 await destroy_result
 
-            self._id = self.generate_session_id()
+        remove_result = self._async_call(self._index.remove, session_id) # type: ignore [union-attr]
+
+        if inspect.isawaitable(remove_result):
+            await remove_result
 
         return True
 
+    def _index_info(self, user_id: str, user_agent: str | None) -> SessionInfo:
+        assert self._id is not None
+
+        now = self._clock()
+        self._attributes['_indexed_at'] = now
+
+        user_agent_hash = None
+
+        if user_agent:
+            user_agent_hash = hashlib.sha1(user_agent.encode()).hexdigest()[:16]
+
+        return SessionInfo(self._id, str(user_id), now, user_agent_hash)
+
+    def _migrate_index(self, old_id: str, new_id: str, _async: bool = False) -> t.Awaitable[None] | None:
+        assert self._index is not None
+
+        call: t.Callable[..., t.Any] = self._async_call if _async else (lambda fn, *args: fn(*args))
+
+        # a flushed session lost its login, its old entry has no successor
+        if '_indexed_at' in self._attributes:
+            return call(self._index.rename, old_id, new_id) # type: ignore [no-any-return]
+        return call(self._index.remove, old_id) # type: ignore [no-any-return]
+
+    def _touch(self) -> float | None:
+        if self._index is None:
+            return None
+
+        indexed_at = self._attributes.get('_indexed_at', None)
+
+        if indexed_at is None:
+            return None
+
+        # last seen only has to be roughly right, most requests skip the write
+        now = self._clock()
+
+        if now - indexed_at < self._touch_interval:
+            return None
+
+        self._attributes['_indexed_at'] = now
+        return now
+
+    def _ensure_sync(self, result: t.Awaitable[_T] | _T) -> _T:
+        if inspect.isawaitable(result):
+            if hasattr(result, "close"):
+                result.close()
+            raise TypeError("Cannot use awaitable return value from session index")
+        return result
+
+    def _async_call(self, fn: t.Callable[..., _T], *args: t.Any) -> t.Awaitable[_T] | _T:
+        # without an offloader sync handlers run inline, as they always did
+        if self._offloader is None:
+            return fn(*args)
+        return t.cast(t.Awaitable[_T], self._offloader.run(fn, *args))
+
+    def prefetch(self, key: str, value: t.Any, result: t.Awaitable[t.Any] | t.Any) -> None:
+        self.cancel_prefetched(key)
+
+        if inspect.isawaitable(result):
+            future = asyncio.ensure_future(result)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(result)
+
+        self._prefetched[key] = (value, future)
+
+    def take_prefetched(self, key: str, value: t.Any) -> asyncio.Future[t.Any] | None:
+        try:
+            prefetched_value, future = self._prefetched.pop(key)
+        except KeyError:
+            return None
+
+        # the session changed since the fetch started, its result is useless
+        if prefetched_value != value:
+            self._discard(future)
+            return None
+
+        return future
+
+    def cancel_prefetched(self, key: str | None = None) -> None:
+        keys = list(self._prefetched) if key is None else [key]
+
+        for k in keys:
+            try:
+                _, future = self._prefetched.pop(k)
+            except KeyError:
+                continue
+            self._discard(future)
+
+    def _discard(self, future: asyncio.Future[t.Any]) -> None:
+        if not future.done():
+            future.cancel()
+        elif not future.cancelled():
+            # mark a failed fetch as retrieved so asyncio does not log it
+            future.exception()
+
     def generate_session_id(self) -> str:
         return random_string(40)
 
@@ -135,3 +384,19 @@ class SessionStore:
 
     def __setitem__(self, key: t.Any, data: t.Any) -> None:
         self._attributes[key] = data
+
+    def forget(self, key: t.Any) -> None:
+        self._attributes.pop(key, None)
+
+    def flush(self) -> None:
+        self._attributes = {}
+
+    def invalidate(self) -> bool:
+        self.flush()
+        self.regenerate_token()
+        return self.migrate(True)
+
+    async def async_invalidate(self) -> bool:
+        self.flush()
+        self.regenerate_token()
+        return await self.async_migrate(True)
@@ -0,0 +1,207 @@
+import asyncio
+import hashlib
+import json
+import os
+import struct
+import typing as t
+
+from .._offload import Offloader
+from .._types import SessionHandler
+
+# handlers that can enumerate their sessions implement
+#   scan(batch_size) -> AsyncIterator[Sequence[Tuple[str, bytes]]]
+# yielding batches of (session id, stored data).
+SessionBatch = t.Sequence[t.Tuple[str, bytes]]
+
+MAGIC = b"AUTH1SES\x01"
+
+# session id length, data length
+_RECORD_HEADER = struct.Struct(">HI")
+
+# bytes hashed to tell exports apart, besides their size
+_FINGERPRINT_BYTES = 65536
+
+
+class TransferStats(t.NamedTuple):
+    records: int
+    # bytes of the stream written or consumed, including the header
+    offset: int
+
+
+def supports_scan(handler: SessionHandler) -> bool:
+    return callable(getattr(handler, "scan", None))
+
+
+def scan_sessions(handler: SessionHandler, batch_size: int = 100) -> t.AsyncIterator[SessionBatch]:
+    scan = getattr(handler, "scan", None)
+
+    if scan is None:
+        raise TypeError(f"{type(handler).__name__} does not support scanning sessions")
+
+    return t.cast(t.AsyncIterator[SessionBatch], scan(batch_size))
+
+
+def write_record(stream: t.BinaryIO, id: str, data: bytes) -> int:
+    encoded_id = id.encode()
+    header = _RECORD_HEADER.pack(len(encoded_id), len(data))
+
+    stream.write(header)
+    stream.write(encoded_id)
+    stream.write(data)
+
+    return len(header) + len(encoded_id) + len(data)
+
+
+def read_record(stream: t.BinaryIO) -> t.Tuple[str, bytes, int] | None:
+    header = stream.read(_RECORD_HEADER.size)
+
+    if not header:
+        return None
+
+    if len(header) != _RECORD_HEADER.size:
+        raise ValueError("Truncated session record")
+
+    id_length, data_length = _RECORD_HEADER.unpack(header)
+    encoded_id = stream.read(id_length)
+    data = stream.read(data_length)
+
+    if len(encoded_id) != id_length or len(data) != data_length:
+        raise ValueError("Truncated session record")
+
+    return encoded_id.decode(), data, len(header) + id_length + data_length
+
+
+def _check_magic(stream: t.BinaryIO) -> None:
+    if stream.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not an auth1 session export")
+
+
+async def export_sessions(handler: SessionHandler, stream: t.BinaryIO, batch_size: int = 100) -> TransferStats:
+    """Write every session of `handler` to `stream`, one batch in memory at a time."""
+    stream.write(MAGIC)
+
+    records = 0
+    offset = len(MAGIC)
+
+    async for batch in scan_sessions(handler, batch_size):
+        for id, data in batch:
+            offset += write_record(stream, id, data)
+            records += 1
+
+    stream.flush()
+
+    return TransferStats(records, offset)
+
+
+def export_fingerprint(stream: t.BinaryIO) -> str:
+    position = stream.tell()
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(0)
+    head = stream.read(_FINGERPRINT_BYTES)
+    stream.seek(position)
+
+    return f"{size}:{hashlib.blake2b(head, digest_size=16).hexdigest()}"
+
+
+def load_checkpoint(path: str, fingerprint: str) -> TransferStats | None:
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    # resuming another export would seek to an unrelated offset
+    if checkpoint.get("export") != fingerprint:
+        raise ValueError(f"Checkpoint `{path}` belongs to another export")
+
+    return TransferStats(checkpoint["records"], checkpoint["offset"])
+
+
+def save_checkpoint(path: str, stats: TransferStats, fingerprint: str) -> None:
+    # replaced atomically, a crash leaves the previous checkpoint intact
+    temporary = f"{path}.tmp"
+
+    with open(temporary, "w") as f:
+        json.dump({**stats._asdict(), 'export': fingerprint}, f)
+
+    os.replace(temporary, path)
+
+
+def remove_checkpoint(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def import_sessions(
+    handler: SessionHandler,
+    stream: t.BinaryIO,
+    workers: int = 4,
+    batch_size: int = 100,
+    checkpoint: str | None = None,
+    offloader: Offloader | None = None
+) -> TransferStats:
+    """Write the sessions exported to `stream` into `handler`.
+
+    Records are read `batch_size` at a time and written by up to `workers`
+    concurrent writes. Writes of a sync handler block, so they run on
+    `offloader`, or on a pool of `workers` threads. With `checkpoint`, the
+    stream offset is saved after each batch and an interrupted import
+    resumes from there, which needs a seekable stream. Sessions of the
+    batch that was interrupted are written again, which is harmless as
+    writes are idempotent. The checkpoint is removed once the import
+    completes, and one saved for another export is rejected.
+    """
+    if workers < 1:
+        raise ValueError("workers must be a positive integer")
+
+    _check_magic(stream)
+
+    stats = TransferStats(0, len(MAGIC))
+    fingerprint = "" if checkpoint is None else export_fingerprint(stream)
+    resumed = None if checkpoint is None else load_checkpoint(checkpoint, fingerprint)
+
+    if resumed is not None:
+        stats = resumed
+        stream.seek(stats.offset)
+
+    semaphore = asyncio.Semaphore(workers)
+    pool = offloader or Offloader(workers, "auth1-import")
+
+    async def write(id: str, data: bytes) -> None:
+        async with semaphore:
+            await pool.run(handler.write, id, data)
+
+    try:
+        while True:
+            batch: t.List[t.Tuple[str, bytes]] = []
+            offset = stats.offset
+
+            while len(batch) < batch_size:
+                record = read_record(stream)
+
+                if record is None:
+                    break
+
+                id, data, size = record
+                batch.append((id, data))
+                offset += size
+
+            if not batch:
+                break
+
+            await asyncio.gather(*(write(id, data) for id, data in batch))
+
+            stats = TransferStats(stats.records + len(batch), offset)
+
+            if checkpoint is not None:
+                save_checkpoint(checkpoint, stats, fingerprint)
+    finally:
+        if offloader is None:
+            pool.shutdown(wait=False)
+
+    if checkpoint is not None:
+        remove_checkpoint(checkpoint)
+
+    return stats
@@ -0,0 +1,152 @@
+import base64
+import binascii
+import functools
+import hashlib
+import hmac
+import json
+import time
+import typing as t
+
+
+class InvalidTokenError(ValueError):
+    pass
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    try:
+        return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+    except (binascii.Error, ValueError):
+        raise InvalidTokenError("Malformed token encoding")
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_header(segment: str) -> t.Tuple[str, str | None]:
+    # every token signed with the same key carries the same header segment,
+    # so it is decoded once and reused.
+    try:
+        header = json.loads(_b64decode(segment))
+    except ValueError:
+        raise InvalidTokenError("Malformed token header")
+
+    if not isinstance(header, dict):
+        raise InvalidTokenError("Malformed token header")
+
+    algorithm, kid = header.get("alg", ""), header.get("kid", None)
+
+    # both come from the client, anything but strings is a forged header
+    if not isinstance(algorithm, str) or not (kid is None or isinstance(kid, str)):
+        raise InvalidTokenError("Malformed token header")
+
+    return algorithm, kid
+
+
+class SignedTokenCodec:
+
+    algorithm: str = "HS256"
+
+    def __init__(
+        self,
+        keys: t.Mapping[str, str | bytes],
+        default_kid: str | None = None,
+        leeway: float = 0.0,
+        clock: t.Callable[[], float] = time.time
+    ) -> None:
+        if not keys:
+            raise ValueError("At least one signing key is required")
+
+        if default_kid is None:
+            default_kid = next(iter(keys))
+
+        if default_kid not in keys:
+            raise ValueError(f"Unknown default key id `{default_kid}`")
+
+        # hmac objects keyed once per kid, each verification only copies the
+        # precomputed inner/outer state instead of rehashing the key.
+        self._macs: t.Dict[str, hmac.HMAC] = {
+            kid: hmac.new(key.encode() if isinstance(key, str) else key, digestmod=hashlib.sha256)
+            for kid, key in keys.items()
+        }
+        self._default_kid = default_kid
+        self._leeway = leeway
+        self._clock = clock
+        self._headers: t.Dict[str, str] = {
+            kid: _b64encode(json.dumps({'alg': self.algorithm, 'typ': "JWT", 'kid': kid}, separators=(",", ":")).encode())
+            for kid in keys
+        }
+
+    def encode(
+        self,
+        subject: str,
+        expires_in: float,
+        scopes: t.Iterable[str] = (),
+        claims: t.Dict[str, t.Any] | None = None,
+        kid: str | None = None
+    ) -> str:
+        if kid is None:
+            kid = self._default_kid
+
+        now = int(self._clock())
+
+        payload: t.Dict[str, t.Any] = dict(claims or {})
+        payload['sub'] = subject
+        payload['iat'] = now
+        payload['exp'] = now + int(expires_in)
+
+        scopes = " ".join(scopes)
+        if scopes:
+            payload['scope'] = scopes
+
+        signing_input = f"{self._headers[kid]}.{_b64encode(json.dumps(payload, separators=(',', ':')).encode())}"
+
+        return f"{signing_input}.{_b64encode(self._sign(kid, signing_input))}"
+
+    def decode(self, token: str) -> t.Dict[str, t.Any]:
+        try:
+            header_segment, payload_segment, signature_segment = token.split(".")
+        except ValueError:
+            raise InvalidTokenError("Token must have three segments")
+
+        algorithm, kid = _parse_header(header_segment)
+
+        if algorithm != self.algorithm:
+            raise InvalidTokenError(f"Unsupported token algorithm `{algorithm}`")
+
+        if kid is None:
+            kid = self._default_kid
+
+        if kid not in self._macs:
+            raise InvalidTokenError(f"Unknown key id `{kid}`")
+
+        expected = self._sign(kid, f"{header_segment}.{payload_segment}")
+
+        if not hmac.compare_digest(expected, _b64decode(signature_segment)):
+            raise InvalidTokenError("Token signature mismatch")
+
+        try:
+            claims = json.loads(_b64decode(payload_segment))
+        except ValueError:
+            raise InvalidTokenError("Malformed token claims")
+
+        if not isinstance(claims, dict) or not isinstance(claims.get("sub", None), str):
+            raise InvalidTokenError("Token has no subject")
+
+        now = self._clock()
+
+        exp = claims.get("exp", None)
+        if not isinstance(exp, (int, float)) or exp + self._leeway <= now:
+            raise InvalidTokenError("Token has expired")
+
+        nbf = claims.get("nbf", None)
+        if isinstance(nbf, (int, float)) and nbf - self._leeway > now:
+            raise InvalidTokenError("Token is not valid yet")
+
+        return claims
+
+    def _sign(self, kid: str, signing_input: str) -> bytes:
+        mac = self._macs[kid].copy()
+        mac.update(signing_input.encode())
+        return mac.digest()
@@ -0,0 +1,218 @@
+import asyncio
+import contextlib
+import contextvars
+import threading
+import time
+import typing as t
+from collections import OrderedDict
+
+from ._types import AuthFactory, Guard, Request
+from ._manager import AuthManager
+
+TenantFactory = t.Callable[[str], AuthManager]
+TenantResolver = t.Callable[[Request], str | None]
+
+_current_tenant: contextvars.ContextVar[str | None] = contextvars.ContextVar("auth1_tenant", default=None)
+_current_manager: contextvars.ContextVar[AuthManager | None] = contextvars.ContextVar("auth1_tenant_manager", default=None)
+
+
+class _Tenant:
+
+    __slots__ = ("manager", "last_used", "active", "evicted")
+
+    def __init__(self, manager: AuthManager, last_used: float) -> None:
+        self.manager = manager
+        self.last_used = last_used
+        # requests inside activate(), an evicted tenant is closed by the last one
+        self.active = 0
+        self.evicted = False
+
+
+class TenantAuthManager(AuthFactory):
+    """AuthManager per tenant, built on first use and evicted when idle.
+
+    `factory` builds a tenant's manager, with its config and providers,
+    and registers cleanup with AuthManager.on_close. At most `max_tenants`
+    stay loaded; the least recently used one is closed to make room, and
+    with `idle_seconds` set tenants unused for that long are closed too.
+    A tenant evicted while requests run inside `activate` is closed when
+    the last of them finishes.
+    """
+
+    def __init__(
+        self,
+        factory: TenantFactory,
+        resolver: TenantResolver,
+        max_tenants: int = 1000,
+        idle_seconds: float | None = None,
+        clock: t.Callable[[], float] = time.monotonic
+    ) -> None:
+        if max_tenants < 1:
+            raise ValueError("max_tenants must be a positive integer")
+
+        self._factory = factory
+        self._resolver = resolver
+        self._max_tenants = max_tenants
+        self._idle_seconds = idle_seconds
+        self._clock = clock
+        self._tenants: "OrderedDict[str, _Tenant]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._closing: t.Set[asyncio.Task[t.Any]] = set()
+
+    def __len__(self) -> int:
+        return len(self._tenants)
+
+    def __contains__(self, tenant_id: str) -> bool:
+        return tenant_id in self._tenants
+
+    @property
+    def current(self) -> str | None:
+        return _current_tenant.get()
+
+    def resolve(self, request: Request) -> str | None:
+        return self._resolver(request)
+
+    @contextlib.contextmanager
+    def activate(self, tenant_id: str) -> t.Iterator[AuthManager]:
+        tenant = self._get(tenant_id, acquire=True)
+        token = _current_tenant.set(tenant_id)
+        manager_token = _current_manager.set(tenant.manager)
+
+        try:
+            yield tenant.manager
+        finally:
+            _current_manager.reset(manager_token)
+            _current_tenant.reset(token)
+
+            with self._lock:
+                tenant.active -= 1
+                closing = tenant.evicted and not tenant.active
+
+            if closing:
+                self._close([tenant.manager])
+
+    def guard(self, name: str | None = None) -> Guard | None:
+        # the manager the request started with, even if evicted since
+        manager = _current_manager.get()
+
+        if manager is None:
+            raise RuntimeError("No tenant is active")
+
+        return manager.guard(name)
+
+    def tenant(self, tenant_id: str) -> AuthManager:
+        return self._get(tenant_id).manager
+
+    def evict(self, tenant_id: str) -> bool:
+        with self._lock:
+            tenant = self._tenants.pop(tenant_id, None)
+            closing = [] if tenant is None else self._retire([tenant])
+
+        self._close(closing)
+        return tenant is not None
+
+    async def async_close(self) -> None:
+        with self._lock:
+            managers = [tenant.manager for tenant in self._tenants.values()]
+            self._tenants.clear()
+
+        for manager in managers:
+            await manager.async_close()
+
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+    def _get(self, tenant_id: str, acquire: bool = False) -> _Tenant:
+        now = self._clock()
+
+        with self._lock:
+            tenant = self._tenants.get(tenant_id, None)
+
+            if tenant is not None:
+                tenant.last_used = now
+                tenant.active += 1 if acquire else 0
+                self._tenants.move_to_end(tenant_id)
+                closing = self._retire(self._evict_idle(now))
+            else:
+                closing = []
+
+        self._close(closing)
+
+        if tenant is not None:
+            return tenant
+
+        # built outside the lock, a slow tenant must not stall the others
+        created = _Tenant(self._factory(tenant_id), now)
+
+        with self._lock:
+            tenant = self._tenants.get(tenant_id, None)
+
+            if tenant is None:
+                tenant = self._tenants[tenant_id] = created
+                tenant.active += 1 if acquire else 0
+                evicted = self._evict_idle(now)
+
+                while len(self._tenants) > self._max_tenants:
+                    evicted.append(self._tenants.popitem(last=False)[1])
+
+                closing = self._retire(evicted)
+            else:
+                # another thread won the race, its manager is the one in use
+                tenant.active += 1 if acquire else 0
+                closing = [created.manager]
+
+        self._close(closing)
+
+        return tenant
+
+    def _retire(self, evicted: t.List[_Tenant]) -> t.List[AuthManager]:
+        # called with the lock held, managers still serving requests are
+        # closed when their last request leaves activate()
+        closing = []
+
+        for tenant in evicted:
+            tenant.evicted = True
+
+            if not tenant.active:
+                closing.append(tenant.manager)
+
+        return closing
+
+    def _evict_idle(self, now: float) -> t.List[_Tenant]:
+        if self._idle_seconds is None:
+            return []
+
+        evicted = []
+
+        # least recently used first, stop at the first tenant still in use
+        while self._tenants:
+            tenant_id, tenant = next(iter(self._tenants.items()))
+
+            if now - tenant.last_used < self._idle_seconds:
+                break
+
+            del self._tenants[tenant_id]
+            evicted.append(tenant)
+
+        return evicted
+
+    def _close(self, managers: t.List[AuthManager]) -> None:
+        for manager in managers:
+            pending = manager.close()
+
+            if not pending:
+                continue
+
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                asyncio.run(_gather(pending))
+                continue
+
+            task = loop.create_task(_gather(pending))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+
+async def _gather(pending: t.List[t.Awaitable[None]]) -> None:
+    await asyncio.gather(*pending)
@@ -0,0 +1,251 @@
+import time
+import heapq
+import inspect
+import threading
+import typing as t
+
+from ._types import ThrottleBackend
+
+_T = t.TypeVar("_T")
+
+
+class _Window:
+
+    __slots__ = ("start", "decay", "previous", "current", "locked_until", "scheduled")
+
+    def __init__(self, start: float, decay: float) -> None:
+        self.start = start
+        self.decay = decay
+        self.previous = 0
+        self.current = 0
+        self.locked_until = 0.0
+        self.scheduled = 0.0
+
+    def roll(self, now: float) -> None:
+        elapsed = now - self.start
+
+        if elapsed >= 2 * self.decay:
+            self.start = now
+            self.previous = 0
+            self.current = 0
+        elif elapsed >= self.decay:
+            self.start += self.decay
+            self.previous = self.current
+            self.current = 0
+
+    def estimate(self, now: float) -> float:
+        weight = 1.0 - (now - self.start) / self.decay
+        return self.previous * max(weight, 0.0) + self.current
+
+    def expires_at(self) -> float:
+        return max(self.locked_until, self.start + 2 * self.decay)
+
+
+class ThrottleStats(t.NamedTuple):
+    keys: int
+    # unlocked windows dropped to make room for a new key
+    evicted: int
+    # hits and lockouts of keys that found the table full of lockouts
+    untracked: int
+
+
+class InMemoryThrottleBackend(ThrottleBackend):
+    """Sliding window counters kept in memory, at most `max_keys` of them.
+
+    Expired windows are dropped in expiry order as new keys arrive. When
+    the table is still full, the oldest window without a lockout makes
+    room, so rotating keys can not push a locked out key out of the
+    table. A key that finds only lockouts is not tracked and never
+    throttled, which is counted in `stats().untracked`.
+    """
+
+    def __init__(self, max_keys: int = 100000, clock: t.Callable[[], float] = time.monotonic) -> None:
+        self._max_keys = max_keys
+        self._clock = clock
+        self._windows: t.Dict[str, _Window] = {}
+        # keys without a lockout, oldest first
+        self._evictable: t.Dict[str, None] = {}
+        # (expires_at, key), entries outdated by a later roll or lockout are skipped
+        self._expiry: t.List[t.Tuple[float, str]] = []
+        self._evicted = 0
+        self._untracked = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def stats(self) -> ThrottleStats:
+        with self._lock:
+            return ThrottleStats(len(self._windows), self._evicted, self._untracked)
+
+    def hit(self, key: str, decay_seconds: float) -> float:
+        now = self._clock()
+
+        with self._lock:
+            window = self._windows.get(key)
+
+            if window is None:
+                window = self._create(key, now, decay_seconds)
+
+                if window is None:
+                    return 0.0
+            else:
+                window.roll(now)
+
+            window.current += 1
+            self._schedule(key, window)
+
+            return window.estimate(now)
+
+    def lockout(self, key: str, seconds: float) -> None:
+        now = self._clock()
+
+        with self._lock:
+            window = self._windows.get(key)
+
+            if window is None:
+                window = self._create(key, now, seconds)
+
+                if window is None:
+                    return None
+
+            window.locked_until = now + seconds
+            self._evictable.pop(key, None)
+            self._schedule(key, window)
+
+    def available_in(self, key: str) -> float:
+        window = self._windows.get(key)
+
+        if window is None:
+            return 0.0
+
+        return max(window.locked_until - self._clock(), 0.0)
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._windows.pop(key, None)
+            self._evictable.pop(key, None)
+
+    def _create(self, key: str, now: float, decay_seconds: float) -> _Window | None:
+        self._prune(now)
+
+        if len(self._windows) >= self._max_keys:
+            if not self._evictable:
+                self._untracked += 1
+                return None
+
+            evicted = next(iter(self._evictable))
+            del self._evictable[evicted]
+            del self._windows[evicted]
+            self._evicted += 1
+
+        window = self._windows[key] = _Window(now, decay_seconds)
+        self._evictable[key] = None
+
+        return window
+
+    def _schedule(self, key: str, window: _Window) -> None:
+        expires_at = window.expires_at()
+
+        # a window only moves its expiry on a roll or a lockout
+        if expires_at != window.scheduled and self._windows.get(key) is window:
+            window.scheduled = expires_at
+            heapq.heappush(self._expiry, (expires_at, key))
+
+    def _prune(self, now: float) -> None:
+        expiry = self._expiry
+
+        while expiry and expiry[0][0] <= now:
+            expires_at, key = heapq.heappop(expiry)
+            window = self._windows.get(key)
+
+            if window is not None and window.scheduled == expires_at:
+                del self._windows[key]
+                self._evictable.pop(key, None)
+
+
+class LoginThrottler:
+
+    def __init__(
+        self,
+        backend: ThrottleBackend | None = None,
+        max_attempts: int = 5,
+        client_max_attempts: int = 20,
+        decay_seconds: float = 60.0,
+        identifier_name: str = "username"
+    ) -> None:
+        if backend is None:
+            backend = InMemoryThrottleBackend()
+
+        self._backend = backend
+        self._max_attempts = max_attempts
+        self._client_max_attempts = client_max_attempts
+        self._decay_seconds = decay_seconds
+        self._identifier_name = identifier_name
+
+    @property
+    def backend(self) -> ThrottleBackend:
+        return self._backend
+
+    def keys(self, credentials: t.Dict[str, t.Any], client: str | None = None) -> t.List[t.Tuple[str, int]]:
+        keys: t.List[t.Tuple[str, int]] = []
+
+        identifier = credentials.get(self._identifier_name, None)
+
+        if identifier is not None:
+            keys.append((f"login:id:{str(identifier).strip().lower()}", self._max_attempts))
+
+        if client is not None:
+            keys.append((f"login:client:{client}", self._client_max_attempts))
+
+        return keys
+
+    def available_in(self, credentials: t.Dict[str, t.Any], client: str | None = None) -> float:
+        return max((self._sync(self._backend.available_in(key)) for key, _ in self.keys(credentials, client)), default=0.0)
+
+    async def async_available_in(self, credentials: t.Dict[str, t.Any], client: str | None = None) -> float:
+        result = 0.0
+        for key, _ in self.keys(credentials, client):
+            result = max(result, await self._async(self._backend.available_in(key)))
+        return result
+
+    def too_many_attempts(self, credentials: t.Dict[str, t.Any], client: str | None = None) -> bool:
+        return self.available_in(credentials, client) > 0
+
+    async def async_too_many_attempts(self, credentials: t.Dict[str, t.Any], client: str | None = None) -> bool:
+        for key, _ in self.keys(credentials, client):
+            if await self._async(self._backend.available_in(key)) > 0:
+                return True
+        return False
+
+    def hit(self, credentials: t.Dict[str, t.Any], client: str | None = None) -> None:
+        for key, max_attempts in self.keys(credentials, client):
+            if self._sync(self._backend.hit(key, self._decay_seconds)) >= max_attempts:
+                self._sync(self._backend.lockout(key, self._decay_seconds))
+
+    async def async_hit(self, credentials: t.Dict[str, t.Any], client: str | None = None) -> None:
+        for key, max_attempts in self.keys(credentials, client):
+            if await self._async(self._backend.hit(key, self._decay_seconds)) >= max_attempts:
+                await self._async(self._backend.lockout(key, self._decay_seconds))
+
+    def clear(self, credentials: t.Dict[str, t.Any]) -> None:
+        # only the identifier is cleared on success, otherwise logging into
+        # an own account would reset the counter of a whole client address.
+        for key, _ in self.keys(credentials):
+            self._sync(self._backend.clear(key))
+
+    async def async_clear(self, credentials: t.Dict[str, t.Any]) -> None:
+        for key, _ in self.keys(credentials):
+            await self._async(self._backend.clear(key))
+
+    def _sync(self, result: t.Awaitable[_T] | _T) -> _T:
+        if inspect.isawaitable(result):
+            if hasattr(result, "close"):
+                result.close()
+            raise TypeError("Cannot use awaitable return value from throttle backend")
+        return result
+
+    async def _async(self, result: t.Awaitable[_T] | _T) -> _T:
+        if inspect.isawaitable(result):
+            return await result
+        return result
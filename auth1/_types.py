@@ -27,6 +27,22 @@ class UserProvider(abc.ABC):
     def validate_credentials(self, user: Authenticatable, credentials: t.Dict[str, t.Any]) -> t.Awaitable[bool] | bool:
         ...
 
+    def rehash_password_if_required(self, user: Authenticatable, credentials: t.Dict[str, t.Any]) -> t.Awaitable[None] | None:
+        return None
+
+    def retrieve_by_remember_selector(self, selector: str) -> AuthenticatableRetval:
+        return None
+
+    def update_remember_token(self, user: Authenticatable, token: str) -> t.Awaitable[None] | None:
+        return None
+
+    def retrieve_by_token_hash(self, token_hash: str) -> AuthenticatableRetval:
+        return None
+
+    def increment_auth_epoch(self, user: Authenticatable) -> t.Awaitable[int | None] | int | None:
+        # None means the provider keeps no auth epochs
+        return None
+
 
 GuardCheckRetval = bool
 GuardUserRetval = Authenticatable | None
@@ -41,9 +57,20 @@ class Guard(abc.ABC):
     async def async_user(self) -> Authenticatable | None:
         ...
 
+    def check(self) -> GuardCheckRetval:
+        return self.user() is not None
+
+    async def async_check(self) -> GuardCheckRetval:
+        return await self.async_user() is not None
+
 
 class StatefullGuard(Guard):
 
+    _session: "Session | None" = None
+
+    def set_session(self, session: "Session") -> None:
+        self._session = session
+
     @abc.abstractmethod
     def attempt(self, credentials: t.Dict[str, t.Any], remember: bool = False) -> bool:
         ...
@@ -52,6 +79,16 @@ class StatefullGuard(Guard):
     async def async_attempt(self, credentials: t.Dict[str, t.Any], remember: bool = False) -> bool:
         ...
 
+    # by default the login ends with the session it was kept in, guards
+    # keeping state elsewhere override these.
+    def logout(self) -> None:
+        if self._session is not None:
+            self._session.invalidate()
+
+    async def async_logout(self) -> None:
+        if self._session is not None:
+            await self._session.async_invalidate()
+
 class AuthFactory(abc.ABC):
 
     @abc.abstractmethod
@@ -59,6 +96,50 @@ class AuthFactory(abc.ABC):
         pass
 
 
+class Hasher(abc.ABC):
+
+    @abc.abstractmethod
+    def make(self, value: str) -> str:
+        ...
+
+    @abc.abstractmethod
+    def check(self, value: str, hashed_value: str) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def needs_rehash(self, hashed_value: str) -> bool:
+        ...
+
+
+class ThrottleBackend(abc.ABC):
+
+    @abc.abstractmethod
+    def hit(self, key: str, decay_seconds: float) -> t.Awaitable[float] | float:
+        ...
+
+    @abc.abstractmethod
+    def lockout(self, key: str, seconds: float) -> t.Awaitable[None] | None:
+        ...
+
+    @abc.abstractmethod
+    def available_in(self, key: str) -> t.Awaitable[float] | float:
+        ...
+
+    @abc.abstractmethod
+    def clear(self, key: str) -> t.Awaitable[None] | None:
+        ...
+
+
+class Instrument(abc.ABC):
+
+    @abc.abstractmethod
+    def span(self, operation: str) -> t.ContextManager[t.Any]:
+        ...
+
+    def annotate(self, key: str, value: t.Any) -> None:
+        return None
+
+
 class SessionHandler(abc.ABC):
 
     @abc.abstractmethod
@@ -74,6 +155,36 @@ class SessionHandler(abc.ABC):
         ...
 
 
+class SessionInfo(t.NamedTuple):
+    session_id: str
+    user_id: str
+    last_seen: float
+    user_agent_hash: str | None = None
+
+
+class SessionIndex(abc.ABC):
+
+    @abc.abstractmethod
+    def add(self, info: SessionInfo) -> t.Awaitable[None] | None:
+        ...
+
+    @abc.abstractmethod
+    def touch(self, session_id: str, last_seen: float) -> t.Awaitable[None] | None:
+        ...
+
+    @abc.abstractmethod
+    def rename(self, old_id: str, new_id: str) -> t.Awaitable[None] | None:
+        ...
+
+    @abc.abstractmethod
+    def remove(self, session_id: str) -> t.Awaitable[None] | None:
+        ...
+
+    @abc.abstractmethod
+    def sessions(self, user_id: str) -> t.Awaitable[t.List[SessionInfo]] | t.List[SessionInfo]:
+        ...
+
+
 class SessionSerializer(abc.ABC):
 
     @abc.abstractmethod
@@ -114,6 +225,15 @@ class Session(t.Protocol):
     def __setitem__(self, key: t.Any, data: t.Any) -> None:
         ...
 
+    def forget(self, key: t.Any) -> None:
+        ...
+
+    def invalidate(self) -> bool:
+        ...
+
+    async def async_invalidate(self) -> bool:
+        ...
+
 
 class Request(t.Protocol):
     cookies: t.Dict[str, str]
@@ -1,4 +1,5 @@
 import typing as t
+import operator
 from ._types import Authenticatable
 
 
@@ -43,3 +44,163 @@ class GenericUser(Authenticatable):
             return self._attributes[name]
         except KeyError:
             raise AttributeError(f"{self.__class__.__name__} object has no attribute {name}")
+
+
+class TokenUser(Authenticatable):
+
+    identifier_name: str = "sub"
+    password_name: str = "password"
+    remember_token_name: str | None = None
+
+    def __init__(self, claims: t.Dict[str, t.Any]):
+        self._claims = claims
+
+        scopes = claims.get("scope", claims.get("scopes", ()))
+
+        if isinstance(scopes, str):
+            scopes = scopes.split()
+
+        self._scopes: t.FrozenSet[str] = frozenset(scopes)
+
+    @property
+    def identifier(self) -> str:
+        return self._claims['sub']  # type: ignore
+
+    @property
+    def password(self) -> str:
+        return ""
+
+    @property
+    def remember_token(self) -> str | None:
+        return None
+
+    @property
+    def claims(self) -> t.Dict[str, t.Any]:
+        return self._claims
+
+    @property
+    def scopes(self) -> t.FrozenSet[str]:
+        return self._scopes
+
+    def has_scope(self, scope: str) -> bool:
+        return scope in self._scopes
+
+
+class SlotUser:
+
+    __slots__ = ()
+
+    identifier_name: str
+    password_name: str
+    remember_token_name: str | None
+    fields: t.Tuple[str, ...]
+    fallback: t.Type[GenericUser]
+
+    _field_set: t.FrozenSet[str]
+
+    _getter: t.Callable[[t.Any], t.Any]
+    _setters: t.Tuple[t.Callable[[t.Any, t.Any], None], ...]
+
+    def __init__(self, attributes: t.Dict[str, t.Any]) -> None:
+        for name, setter in zip(self.fields, self._setters):
+            setter(self, attributes.get(name, None))
+
+    @classmethod
+    def build(cls, attributes: t.Dict[str, t.Any]) -> "SlotUser | GenericUser":
+        # attributes outside the declared schema have no slot to live in
+        if not attributes.keys() <= cls._field_set:
+            return cls.fallback(attributes)
+        return cls(attributes)
+
+    @classmethod
+    def from_tuple(cls, values: t.Sequence[t.Any]) -> "SlotUser":
+        if len(values) != len(cls.fields):
+            raise ValueError(f"{cls.__name__} expects {len(cls.fields)} values, got {len(values)}")
+
+        user = cls.__new__(cls)
+
+        for setter, value in zip(cls._setters, values):
+            setter(user, value)
+
+        return user
+
+    def to_tuple(self) -> t.Tuple[t.Any, ...]:
+        return self._getter(self) # type: ignore [no-any-return]
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        return dict(zip(self.fields, self._getter(self)))
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_tuple() == t.cast(SlotUser, other).to_tuple()
+
+    def __hash__(self) -> int:
+        return hash((type(self), self.identifier)) # type: ignore [attr-defined]
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.identifier_name}={getattr(self, self.identifier_name)!r})"
+
+
+def _alias(field: str) -> property:
+    getter = operator.attrgetter(field)
+
+    def fset(self: t.Any, value: t.Any) -> None:
+        setattr(self, field, value)
+
+    return property(getter, fset)
+
+
+def make_user_class(
+    name: str,
+    fields: t.Iterable[str],
+    identifier_name: str = "userid",
+    password_name: str = "password",
+    remember_token_name: str | None = "remember_token"
+) -> t.Type[SlotUser]:
+    declared: t.List[str] = []
+
+    for field in [identifier_name, password_name, remember_token_name, *fields]:
+        if field is not None and field not in declared:
+            declared.append(field)
+
+    aliases = {'identifier': identifier_name, 'password': password_name, 'remember_token': remember_token_name}
+
+    for field in declared:
+        # class attributes set by make_user_class are only annotated on SlotUser
+        if not field.isidentifier() or field.startswith("_") or hasattr(SlotUser, field) or field in SlotUser.__annotations__:
+            raise ValueError(f"Invalid user field `{field}`")
+
+        # a field may only use a protocol name when it is the field behind it
+        if field in aliases and aliases[field] != field:
+            raise ValueError(f"Invalid user field `{field}`")
+
+    namespace: t.Dict[str, t.Any] = {
+        '__module__': __name__,
+        '__slots__': tuple(declared),
+        'identifier_name': identifier_name,
+        'password_name': password_name,
+        'remember_token_name': remember_token_name,
+        'fields': tuple(declared),
+        'fallback': type(f"Generic{name}", (GenericUser,), {
+            '__module__': __name__,
+            'identifier_name': identifier_name,
+            'password_name': password_name,
+            'remember_token_name': remember_token_name
+        }),
+        '_field_set': frozenset(declared),
+        # attrgetter with a single name does not return a tuple
+        '_getter': operator.attrgetter(*declared) if len(declared) > 1 else lambda user: (getattr(user, declared[0]),)
+    }
+
+    for alias, field in aliases.items():
+        if field is not None and field != alias:
+            namespace[alias] = _alias(field)
+
+    if remember_token_name is None:
+        namespace['remember_token'] = property(lambda self: None)
+
+    cls = type(name, (SlotUser,), namespace)
+    cls._setters = tuple(getattr(cls, field).__set__ for field in declared)
+
+    return t.cast(t.Type[SlotUser], cls)
@@ -0,0 +1,56 @@
+import argparse
+import fnmatch
+import sys
+import typing as t
+
+from . import asgi, micro
+from ._harness import BenchmarkResult, dump, format_table, load, regressions, run
+
+
+def main(argv: t.List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("-k", "--filter", default="*", help="glob over benchmark names, e.g. 'guard.*'")
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="few samples, for smoke testing the suite")
+    parser.add_argument("--json", dest="output", default=None, help="write machine readable results to this file")
+    parser.add_argument("--compare", default=None, help="results file of a previous run to compare against")
+    parser.add_argument("--fail-on-regression", type=float, default=None, metavar="FRACTION",
+                        help="exit 1 if any benchmark got slower than the baseline by more than FRACTION")
+    parser.add_argument("--list", action="store_true")
+
+    args = parser.parse_args(argv)
+
+    benchmarks = [b for b in micro.BENCHMARKS + asgi.BENCHMARKS if fnmatch.fnmatch(b.name, args.filter)]
+
+    if args.list:
+        for benchmark in benchmarks:
+            print(benchmark.name)
+        return 0
+
+    samples, warmup = (5, 1) if args.quick else (args.samples, args.warmup)
+
+    results: t.List[BenchmarkResult] = []
+
+    for benchmark in benchmarks:
+        results.append(run(benchmark, samples=samples, warmup=warmup, alloc_ops=20 if args.quick else 200))
+        print(f"  {benchmark.name} done", file=sys.stderr)
+
+    baseline = load(args.compare) if args.compare else None
+
+    print(format_table(results, baseline))
+
+    if args.output:
+        dump(results, args.output)
+
+    if baseline is not None and args.fail_on_regression is not None:
+        slower = regressions(results, baseline, args.fail_on_regression)
+        if slower:
+            print(f"regressed: {', '.join(slower)}", file=sys.stderr)
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+import asyncio
+import pickle
+import typing as t
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qsl
+
+from auth1 import (
+    AuthManager,
+    AuthenticateMiddleware,
+    Authenticatable,
+    AuthenticatableRetval,
+    GenericUser,
+    Guard,
+    SessionGuard,
+    SessionHandler,
+    SessionManager,
+    SessionSerializer,
+    StatefullGuard,
+    UserProvider
+)
+
+Scope = t.MutableMapping[str, t.Any]
+Message = t.MutableMapping[str, t.Any]
+Receive = t.Callable[[], t.Awaitable[Message]]
+Send = t.Callable[[Message], t.Awaitable[None]]
+ASGIApp = t.Callable[[Scope, Receive, Send], t.Awaitable[None]]
+
+SESSION_COOKIE = "auth1_bench"
+
+
+class MemorySessionHandler(SessionHandler):
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.data: t.Dict[str, bytes] = {}
+        self._latency = latency
+
+    def read(self, id: str) -> t.Awaitable[bytes] | bytes:
+        if self._latency:
+            return self._async_read(id)
+        return self.data.get(id, b"")
+
+    def write(self, id: str, data: bytes) -> t.Awaitable[None] | None:
+        if self._latency:
+            return self._async_write(id, data)
+        self.data[id] = data
+        return None
+
+    def destroy(self, id: str) -> t.Awaitable[None] | None:
+        self.data.pop(id, None)
+        return None
+
+    async def _async_read(self, id: str) -> bytes:
+        await asyncio.sleep(self._latency)
+        return self.data.get(id, b"")
+
+    async def _async_write(self, id: str, data: bytes) -> None:
+        await asyncio.sleep(self._latency)
+        self.data[id] = data
+
+
+class PickleSerializer(SessionSerializer):
+    """Only for comparing serializer cost locally, never for untrusted cookies."""
+
+    def encode(self, data: t.Dict[t.Any, t.Any]) -> bytes:
+        return pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, data: bytes) -> t.Dict[t.Any, t.Any]:
+        return t.cast(t.Dict[t.Any, t.Any], pickle.loads(data))
+
+
+class StaticUserProvider(UserProvider):
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self._latency = latency
+        self._users: t.Dict[str, GenericUser] = {}
+
+    def retrieve_by_id(self, id: str | int) -> AuthenticatableRetval:
+        return self._return(self._user(str(id)))
+
+    def retrieve_by_credentials(self, credentials: t.Dict[str, t.Any]) -> AuthenticatableRetval:
+        return self._return(self._user(credentials['username']))
+
+    def validate_credentials(self, user: Authenticatable, credentials: t.Dict[str, t.Any]) -> t.Awaitable[bool] | bool:
+        return t.cast(bool, self._return(credentials.get("password", None) == user.password))
+
+    def _user(self, username: str) -> GenericUser:
+        try:
+            return self._users[username]
+        except KeyError:
+            user = self._users[username] = GenericUser({
+                'userid': username,
+                'password': "Password123!",
+                'email': f"{username}@lundu.com"
+            })
+            return user
+
+    def _return(self, value: t.Any) -> t.Any:
+        if self._latency:
+            return self._async_return(value)
+        return value
+
+    async def _async_return(self, value: t.Any) -> t.Any:
+        await asyncio.sleep(self._latency)
+        return value
+
+
+class SessionMiddleware:
+    """Dependency free counterpart of the starlette example middleware."""
+
+    def __init__(self, app: ASGIApp, session_manager: SessionManager, handler: str = "memory") -> None:
+        self.app = app
+        self.session_manager = session_manager
+        self.handler = handler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        session_store = self.session_manager.create(self.handler)
+        session_store.id = _cookies(scope).get(session_store.name, None)
+
+        await session_store.async_start()
+
+        scope['session'] = session_store
+
+        async def _send(message: Message) -> None:
+            if message['type'] == "http.response.start":
+                await session_store.async_save()
+                headers = list(message.get("headers", []))
+                headers.append((b"set-cookie", f"{session_store.name}={session_store.id}; Path=/".encode("latin-1")))
+                message['headers'] = headers
+
+            await send(message)
+
+        await self.app(scope, receive, _send)
+
+
+def _cookies(scope: Scope) -> t.Dict[str, str]:
+    for key, value in scope.get("headers", []):
+        if key == b"cookie":
+            cookie: SimpleCookie = SimpleCookie()
+            cookie.load(value.decode("latin-1"))
+            return {key: morsel.value for key, morsel in cookie.items()}
+    return {}
+
+
+async def _respond(send: Send, status: int, body: bytes) -> None:
+    await send({'type': "http.response.start", 'status': status, 'headers': [(b"content-length", str(len(body)).encode())]})
+    await send({'type': "http.response.body", 'body': body})
+
+
+async def _read_body(receive: Receive) -> bytes:
+    body = b""
+
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+
+        if not message.get("more_body", False):
+            return body
+
+
+def create_app(
+    handler_latency: float = 0.0,
+    provider_latency: float = 0.0,
+    serializer: t.Callable[[], SessionSerializer] | None = None,
+    handler: SessionHandler | None = None
+) -> ASGIApp:
+    """Build the login + dashboard app the benchmarks and load generator drive.
+
+    It mirrors examples/starlette: `/login` accepts a form post like
+    LoginEndpoint, `/` sits behind AuthenticateMiddleware.
+    """
+    session_config: t.Dict[str, t.Any] = {'cookie': SESSION_COOKIE}
+
+    if serializer is not None:
+        session_config['serializer'] = "custom"
+
+    session_manager = SessionManager(session_config)
+
+    if handler is None:
+        handler = MemorySessionHandler(handler_latency)
+
+    @session_manager.handler_factory("memory")
+    def memory_handler() -> SessionHandler:
+        assert handler is not None
+        return handler
+
+    if serializer is not None:
+        session_manager.serializer_factory("custom")(serializer)
+
+    provider = StaticUserProvider(provider_latency)
+
+    auth_manager = AuthManager({
+        'defaults': {'guard': "web"},
+        'guards': {'web': {'driver': "session"}}
+    })
+
+    @auth_manager.factory("session")
+    def session_guard_factory(name: str) -> Guard:
+        return SessionGuard(name, provider)
+
+    async def dashboard(scope: Scope, receive: Receive, send: Send) -> None:
+        user = await scope['user'].async_resolve()
+        await _respond(send, 200, f"Hello {user.identifier}".encode())
+
+    async def login(scope: Scope, receive: Receive, send: Send) -> None:
+        credentials = dict(parse_qsl((await _read_body(receive)).decode()))
+
+        guard = t.cast(StatefullGuard, auth_manager.guard())
+
+        if hasattr(guard, "set_session"):
+            guard.set_session(scope['session'])
+
+        if await guard.async_attempt(credentials):
+            await _respond(send, 200, b"Hello world login")
+        else:
+            await _respond(send, 401, b"Invalid credentials")
+
+    protected = AuthenticateMiddleware(dashboard, auth_manager, redirect_to="/login")
+
+    async def router(scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['path'] == "/login" and scope['method'] == "POST":
+            await login(scope, receive, send)
+        else:
+            await protected(scope, receive, send)
+
+    return SessionMiddleware(router, session_manager)
+
+
+class Response(t.NamedTuple):
+    status: int
+    headers: t.List[t.Tuple[bytes, bytes]]
+    body: bytes
+
+
+async def request(
+    app: ASGIApp,
+    method: str,
+    path: str,
+    cookies: t.Dict[str, str] | None = None,
+    body: bytes = b""
+) -> Response:
+    """Run one request through `app` without a server or sockets."""
+    headers = [(b"host", b"bench")]
+
+    if cookies:
+        headers.append((b"cookie", "; ".join(f"{k}={v}" for k, v in cookies.items()).encode("latin-1")))
+
+    if body:
+        headers.append((b"content-type", b"application/x-www-form-urlencoded"))
+
+    scope: Scope = {
+        'type': "http",
+        'asgi': {'version': "3.0"},
+        'http_version': "1.1",
+        'scheme': "http",
+        'method': method,
+        'path': path,
+        'raw_path': path.encode(),
+        'root_path': "",
+        'query_string': b"",
+        'headers': headers,
+        'server': ("bench", 80),
+        'client': ("127.0.0.1", 50000)
+    }
+
+    sent = False
+
+    async def receive() -> Message:
+        nonlocal sent
+        if sent:
+            return {'type': "http.disconnect"}
+        sent = True
+        return {'type': "http.request", 'body': body, 'more_body': False}
+
+    status = 0
+    response_headers: t.List[t.Tuple[bytes, bytes]] = []
+    response_body = b""
+
+    async def send(message: Message) -> None:
+        nonlocal status, response_headers, response_body
+        if message['type'] == "http.response.start":
+            status = message['status']
+            response_headers = list(message.get("headers", []))
+        elif message['type'] == "http.response.body":
+            response_body += message.get("body", b"")
+
+    await app(scope, receive, send)
+
+    return Response(status, response_headers, response_body)
+
+
+def set_cookies(response: Response, jar: t.Dict[str, str]) -> None:
+    for key, value in response.headers:
+        if key == b"set-cookie":
+            cookie: SimpleCookie = SimpleCookie()
+            cookie.load(value.decode("latin-1"))
+            for name, morsel in cookie.items():
+                if morsel['max-age'] == "0":
+                    jar.pop(name, None)
+                else:
+                    jar[name] = morsel.value
@@ -0,0 +1,171 @@
+import asyncio
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import typing as t
+
+from ._histogram import Histogram
+
+
+class BenchmarkResult(t.NamedTuple):
+    name: str
+    ops_per_sec: float
+    p50_us: float
+    p99_us: float
+    alloc_bytes: float
+    samples: int
+    inner: int
+
+
+class Benchmark(t.NamedTuple):
+    name: str
+    # returns the callable to time, setup runs once outside the measurement
+    setup: t.Callable[[], t.Callable[[], t.Any]]
+    is_async: bool = False
+    inner: int = 100
+
+
+async def _time_async(fn: t.Callable[[], t.Awaitable[t.Any]], inner: int, histogram: Histogram) -> int:
+    clock = time.perf_counter_ns
+    total = 0
+    for _ in range(inner):
+        start = clock()
+        await fn()
+        elapsed = clock() - start
+        histogram.record(elapsed)
+        total += elapsed
+    return total
+
+
+def _time_sync(fn: t.Callable[[], t.Any], inner: int, histogram: Histogram) -> int:
+    clock = time.perf_counter_ns
+    total = 0
+    for _ in range(inner):
+        start = clock()
+        fn()
+        elapsed = clock() - start
+        histogram.record(elapsed)
+        total += elapsed
+    return total
+
+
+def run(benchmark: Benchmark, samples: int = 50, warmup: int = 5, alloc_ops: int = 200) -> BenchmarkResult:
+    """Time `samples` batches of `benchmark.inner` calls, each call on its own."""
+    fn = benchmark.setup()
+    loop = asyncio.new_event_loop() if benchmark.is_async else None
+
+    def timed(inner: int, histogram: Histogram) -> int:
+        if loop is not None:
+            return loop.run_until_complete(_time_async(fn, inner, histogram))
+        return _time_sync(fn, inner, histogram)
+
+    try:
+        timed(warmup * benchmark.inner, Histogram())
+
+        histogram = Histogram()
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+
+        try:
+            total_ns = sum(timed(benchmark.inner, histogram) for _ in range(samples))
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        # tracemalloc slows everything down, allocations get their own pass
+        alloc_bytes = _measure_allocations(fn, loop, alloc_ops)
+    finally:
+        if loop is not None:
+            loop.close()
+
+    return BenchmarkResult(
+        benchmark.name,
+        1e9 * histogram.total / total_ns,
+        histogram.percentile(50) / 1000,
+        histogram.percentile(99) / 1000,
+        alloc_bytes,
+        samples,
+        benchmark.inner
+    )
+
+
+def _measure_allocations(fn: t.Callable[[], t.Any], loop: asyncio.AbstractEventLoop | None, ops: int) -> float:
+    tracemalloc.start()
+
+    try:
+        total = 0
+
+        for _ in range(ops):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+
+            if loop is not None:
+                loop.run_until_complete(fn())
+            else:
+                fn()
+
+            _, peak = tracemalloc.get_traced_memory()
+            total += peak - before
+    finally:
+        tracemalloc.stop()
+
+    return total / ops
+
+
+def environment() -> t.Dict[str, t.Any]:
+    return {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'timestamp': time.time()
+    }
+
+
+def dump(results: t.List[BenchmarkResult], path: str) -> None:
+    with open(path, "w") as f:
+        json.dump({'environment': environment(), 'results': [result._asdict() for result in results]}, f, indent=2)
+
+
+def load(path: str) -> t.Dict[str, BenchmarkResult]:
+    with open(path) as f:
+        data = json.load(f)
+    return {entry['name']: BenchmarkResult(**entry) for entry in data['results']}
+
+
+def format_table(results: t.List[BenchmarkResult], baseline: t.Dict[str, BenchmarkResult] | None = None) -> str:
+    lines = [f"{'benchmark':<32} {'ops/sec':>12} {'p50 us':>10} {'p99 us':>10} {'alloc B':>10}" + ("  change" if baseline else "")]
+
+    for result in results:
+        line = (
+            f"{result.name:<32} {result.ops_per_sec:>12,.0f} {result.p50_us:>10.2f} "
+            f"{result.p99_us:>10.2f} {result.alloc_bytes:>10,.0f}"
+        )
+
+        if baseline:
+            previous = baseline.get(result.name, None)
+            if previous is not None:
+                line += f"  {change(previous, result):+.1%}"
+
+        lines.append(line)
+
+    return "\n".join(lines)
+
+
+def change(baseline: BenchmarkResult, current: BenchmarkResult) -> float:
+    # positive is faster
+    return current.ops_per_sec / baseline.ops_per_sec - 1
+
+
+def regressions(
+    results: t.List[BenchmarkResult],
+    baseline: t.Dict[str, BenchmarkResult],
+    threshold: float
+) -> t.List[str]:
+    return [
+        result.name for result in results
+        if result.name in baseline and change(baseline[result.name], result) < -threshold
+    ]
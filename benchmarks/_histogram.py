@@ -0,0 +1,94 @@
+import typing as t
+
+
+class Histogram:
+    """Log-linear latency histogram in the spirit of HdrHistogram.
+
+    Values below 2 * 2**sub_bucket_bits land in exact buckets. Above that,
+    every power of two is split into 2**sub_bucket_bits buckets, which
+    bounds the relative error of any recorded value by 2**-sub_bucket_bits
+    (under 1% with the default of 7 bits). Buckets are kept sparse.
+    """
+
+    def __init__(self, sub_bucket_bits: int = 7) -> None:
+        self._sub_bits = sub_bucket_bits
+        self._sub_count = 1 << sub_bucket_bits
+        self._linear = self._sub_count << 1
+        self._counts: t.Dict[int, int] = {}
+        self._total = 0
+        self._sum = 0
+        self._min: int | None = None
+        self._max = 0
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    @property
+    def max(self) -> int:
+        return self._max
+
+    @property
+    def min(self) -> int:
+        return self._min or 0
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self._total if self._total else 0.0
+
+    def record(self, value: int) -> None:
+        value = max(0, int(value))
+        index = self._index(value)
+        self._counts[index] = self._counts.get(index, 0) + 1
+        self._total += 1
+        self._sum += value
+        self._max = max(self._max, value)
+        self._min = value if self._min is None else min(self._min, value)
+
+    def merge(self, other: "Histogram") -> None:
+        if other._sub_bits != self._sub_bits:
+            raise ValueError("Can not merge histograms with different precision")
+
+        for index, count in other._counts.items():
+            self._counts[index] = self._counts.get(index, 0) + count
+
+        self._total += other._total
+        self._sum += other._sum
+        self._max = max(self._max, other._max)
+
+        if other._min is not None:
+            self._min = other._min if self._min is None else min(self._min, other._min)
+
+    def percentile(self, percentile: float) -> int:
+        if not self._total:
+            return 0
+
+        rank = max(1, round(percentile / 100 * self._total))
+        seen = 0
+
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+            if seen >= rank:
+                return min(self._highest(index), self._max)
+
+        return self._max
+
+    def distribution(self, percentiles: t.Sequence[float] = (50, 75, 90, 99, 99.9, 99.99, 100)) -> t.List[t.Tuple[float, int]]:
+        return [(percentile, self.percentile(percentile)) for percentile in percentiles]
+
+    def _index(self, value: int) -> int:
+        if value < self._linear:
+            return value
+
+        shift = value.bit_length() - self._sub_bits - 1
+        return self._linear + (shift - 1) * self._sub_count + (value >> shift) - self._sub_count
+
+    def _highest(self, index: int) -> int:
+        # report the upper edge of a bucket, percentiles never under-state
+        if index < self._linear:
+            return index
+
+        shift, offset = divmod(index - self._linear, self._sub_count)
+        shift += 1
+
+        return ((self._sub_count + offset + 1) << shift) - 1
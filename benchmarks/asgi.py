@@ -0,0 +1,39 @@
+import asyncio
+import typing as t
+
+from ._app import SESSION_COOKIE, create_app, request, set_cookies
+from ._harness import Benchmark
+
+
+def _logged_in_app() -> t.Tuple[t.Any, t.Dict[str, str]]:
+    app = create_app()
+    jar: t.Dict[str, str] = {}
+
+    response = asyncio.run(request(app, "POST", "/login", body=b"username=harianja&password=Password123!"))
+    set_cookies(response, jar)
+
+    assert response.status == 200 and SESSION_COOKIE in jar, "login failed while setting up the benchmark"
+
+    return app, jar
+
+
+def bench_authenticated_get() -> t.Callable[[], t.Any]:
+    app, jar = _logged_in_app()
+    return lambda: request(app, "GET", "/", cookies=jar)
+
+
+def bench_anonymous_redirect() -> t.Callable[[], t.Any]:
+    app = create_app()
+    return lambda: request(app, "GET", "/")
+
+
+def bench_login() -> t.Callable[[], t.Any]:
+    app = create_app()
+    return lambda: request(app, "POST", "/login", body=b"username=harianja&password=Password123!")
+
+
+BENCHMARKS: t.List[Benchmark] = [
+    Benchmark("asgi.authenticated_get", bench_authenticated_get, is_async=True, inner=100),
+    Benchmark("asgi.anonymous_redirect", bench_anonymous_redirect, is_async=True, inner=100),
+    Benchmark("asgi.login", bench_login, is_async=True, inner=100)
+]
@@ -0,0 +1,207 @@
+import argparse
+import asyncio
+import importlib
+import json
+import sys
+import time
+import typing as t
+
+from auth1 import JSONSerializer, SessionHandler, SessionSerializer
+
+from ._app import ASGIApp, MemorySessionHandler, PickleSerializer, create_app, request, set_cookies
+from ._harness import environment
+from ._histogram import Histogram
+
+SERIALIZERS: t.Dict[str, t.Callable[[], SessionSerializer]] = {
+    'json': JSONSerializer,
+    'pickle': PickleSerializer
+}
+
+
+class LevelResult(t.NamedTuple):
+    concurrency: int
+    requests: int
+    logins: int
+    errors: int
+    seconds: float
+    histogram: Histogram
+    login_histogram: Histogram
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        return {
+            'concurrency': self.concurrency,
+            'requests': self.requests,
+            'logins': self.logins,
+            'errors': self.errors,
+            'seconds': self.seconds,
+            'throughput': self.throughput,
+            'latency_us': dict((str(p), v) for p, v in self.histogram.distribution()),
+            'login_latency_us': dict((str(p), v) for p, v in self.login_histogram.distribution())
+        }
+
+
+class Client:
+    """One simulated browser: its own cookie jar, a login, then page views."""
+
+    def __init__(self, app: ASGIApp, username: str, password: str, path: str, think_time: float) -> None:
+        self.app = app
+        self.username = username
+        self.password = password
+        self.path = path
+        self.think_time = think_time
+        self.jar: t.Dict[str, str] = {}
+
+    async def login(self, histogram: Histogram) -> bool:
+        body = f"username={self.username}&password={self.password}".encode()
+
+        start = time.perf_counter_ns()
+        response = await request(self.app, "POST", "/login", cookies=self.jar, body=body)
+        histogram.record((time.perf_counter_ns() - start) // 1000)
+
+        set_cookies(response, self.jar)
+
+        return response.status == 200
+
+    async def run(self, deadline: float, histogram: Histogram, login_histogram: Histogram, counters: t.List[int]) -> None:
+        if not await self.login(login_histogram):
+            counters[2] += 1
+            return
+
+        counters[1] += 1
+
+        while time.perf_counter() < deadline:
+            start = time.perf_counter_ns()
+            response = await request(self.app, "GET", self.path, cookies=self.jar)
+            histogram.record((time.perf_counter_ns() - start) // 1000)
+
+            set_cookies(response, self.jar)
+
+            counters[0] += 1
+
+            # a redirect back to the login page means the session was lost
+            if response.status != 200:
+                counters[2] += 1
+
+            if self.think_time:
+                await asyncio.sleep(self.think_time)
+            else:
+                # let the other clients in, a memory backend never suspends
+                await asyncio.sleep(0)
+
+
+async def run_level(app: ASGIApp, concurrency: int, duration: float, args: argparse.Namespace) -> LevelResult:
+    histogram = Histogram()
+    login_histogram = Histogram()
+    counters = [0, 0, 0]
+
+    clients = [
+        Client(app, f"user{i % args.users}", args.password, args.path, args.think_ms / 1000)
+        for i in range(concurrency)
+    ]
+
+    start = time.perf_counter()
+    deadline = start + duration
+
+    await asyncio.gather(*(client.run(deadline, histogram, login_histogram, counters) for client in clients))
+
+    return LevelResult(concurrency, counters[0], counters[1], counters[2], time.perf_counter() - start, histogram, login_histogram)
+
+
+def _load_app(spec: str) -> ASGIApp:
+    module_name, _, attr = spec.partition(":")
+    module = importlib.import_module(module_name)
+    return t.cast(ASGIApp, getattr(module, attr or "app"))
+
+
+def _create_handler(args: argparse.Namespace) -> SessionHandler:
+    if args.session_backend == "file":
+        import tempfile
+        from examples.starlette.session import FileSessionHandler
+        return FileSessionHandler(tempfile.mkdtemp(prefix="auth1-loadgen-"))
+    return MemorySessionHandler(args.session_latency_ms / 1000)
+
+
+def _format_level(result: LevelResult) -> str:
+    h = result.histogram
+    return (
+        f"{result.concurrency:>8} {result.throughput:>10,.0f} {h.percentile(50):>9} {h.percentile(90):>9} "
+        f"{h.percentile(99):>9} {h.percentile(99.9):>9} {h.max:>9} {result.errors:>7}"
+    )
+
+
+def _format_distribution(histogram: Histogram) -> str:
+    lines = [f"{'percentile':>12} {'value us':>10}"]
+    lines += [f"{percentile:>12} {value:>10}" for percentile, value in histogram.distribution()]
+    lines.append(f"#[mean = {histogram.mean:.1f}, max = {histogram.max}, total = {histogram.total}]")
+    return "\n".join(lines)
+
+
+async def _main(args: argparse.Namespace) -> t.List[LevelResult]:
+    if args.app:
+        app = _load_app(args.app)
+    else:
+        app = create_app(
+            provider_latency=args.provider_latency_ms / 1000,
+            serializer=SERIALIZERS[args.serializer],
+            handler=_create_handler(args)
+        )
+
+    results = []
+
+    print(f"{'clients':>8} {'req/s':>10} {'p50 us':>9} {'p90 us':>9} {'p99 us':>9} {'p99.9 us':>9} {'max us':>9} {'errors':>7}")
+
+    for concurrency in args.concurrency:
+        result = await run_level(app, concurrency, args.duration, args)
+        results.append(result)
+        print(_format_level(result), flush=True)
+
+    print()
+    print(f"latency at {results[-1].concurrency} clients:")
+    print(_format_distribution(results[-1].histogram))
+
+    return results
+
+
+def main(argv: t.List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.loadgen",
+        description="Drive an ASGI app with simulated logged in clients on one event loop, without sockets."
+    )
+    parser.add_argument("--app", default=None, help="module:attribute of an ASGI app with a /login form endpoint, "
+                                                    "e.g. examples.starlette.main:app (needs starlette)")
+    parser.add_argument("-c", "--concurrency", type=int, nargs="+", default=[1, 10, 100, 1000],
+                        help="client counts to step through, one throughput point each")
+    parser.add_argument("-d", "--duration", type=float, default=5.0, help="seconds per concurrency level")
+    parser.add_argument("--users", type=int, default=1000, help="distinct accounts the clients log in as")
+    parser.add_argument("--password", default="Password123!")
+    parser.add_argument("--path", default="/", help="authenticated route to hit after logging in")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="pause between a client's requests")
+    parser.add_argument("--session-backend", choices=["memory", "file"], default="memory")
+    parser.add_argument("--session-latency-ms", type=float, default=0.0,
+                        help="simulated round trip of the memory backend, turns it into an async handler")
+    parser.add_argument("--serializer", choices=sorted(SERIALIZERS), default="json")
+    parser.add_argument("--provider-latency-ms", type=float, default=0.0,
+                        help="simulated user provider round trip, turns it into an async provider")
+    parser.add_argument("--json", dest="output", default=None, help="write the throughput curve to this file")
+
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(_main(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                'environment': environment(),
+                'config': vars(args),
+                'levels': [result.to_dict() for result in results]
+            }, f, indent=2)
+
+    return 1 if any(result.errors for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import typing as t
+
+from auth1 import (
+    JSONSerializer,
+    SessionGuard,
+    SessionStore,
+    random_string
+)
+
+from ._app import MemorySessionHandler, StaticUserProvider
+from ._harness import Benchmark
+
+# roughly what a logged in session carries in the example app
+SESSION_DATA: t.Dict[str, t.Any] = {
+    '_token': "a" * 40,
+    'login_web_0123456789abcdef0123456789abcdef01234567': "harianja",
+    'cart': [{'sku': f"SKU-{i}", 'qty': i} for i in range(5)],
+    'flash': {'message': "Welcome back", 'level': "info"}
+}
+
+
+def bench_random_string() -> t.Callable[[], t.Any]:
+    return lambda: random_string(40)
+
+
+def bench_json_encode() -> t.Callable[[], t.Any]:
+    serializer = JSONSerializer()
+    return lambda: serializer.encode(SESSION_DATA)
+
+
+def bench_json_decode() -> t.Callable[[], t.Any]:
+    serializer = JSONSerializer()
+    data = serializer.encode(SESSION_DATA)
+    return lambda: serializer.decode(data)
+
+
+def bench_session_async_start() -> t.Callable[[], t.Any]:
+    handler = MemorySessionHandler()
+    handler.data['12345'] = JSONSerializer().encode(SESSION_DATA)
+
+    def start() -> t.Awaitable[None]:
+        return SessionStore("auth1", handler, id="12345").async_start()
+
+    return start
+
+
+def bench_session_async_save() -> t.Callable[[], t.Any]:
+    handler = MemorySessionHandler()
+    session = SessionStore("auth1", handler, id="12345")
+    session._attributes = dict(SESSION_DATA)
+    return session.async_save
+
+
+def _logged_in_session() -> t.Tuple[StaticUserProvider, SessionStore]:
+    provider = StaticUserProvider()
+    session = SessionStore("auth1", MemorySessionHandler(), id="12345")
+    session.regenerate_token()
+    session[SessionGuard("web", provider).name] = "harianja"
+    return provider, session
+
+
+def bench_guard_async_user() -> t.Callable[[], t.Any]:
+    provider, session = _logged_in_session()
+
+    def user() -> t.Awaitable[t.Any]:
+        # guards are built per request, a reused guard would only hit its cache
+        return SessionGuard("web", provider, session).async_user()
+
+    return user
+
+
+def bench_guard_async_attempt() -> t.Callable[[], t.Any]:
+    provider = StaticUserProvider()
+    session = SessionStore("auth1", MemorySessionHandler(), id="12345")
+    credentials = {'username': "harianja", 'password': "Password123!"}
+
+    def attempt() -> t.Awaitable[bool]:
+        return SessionGuard("web", provider, session).async_attempt(credentials)
+
+    return attempt
+
+
+BENCHMARKS: t.List[Benchmark] = [
+    Benchmark("random_string", bench_random_string, inner=1000),
+    Benchmark("json.encode", bench_json_encode, inner=1000),
+    Benchmark("json.decode", bench_json_decode, inner=1000),
+    Benchmark("session.async_start", bench_session_async_start, is_async=True, inner=200),
+    Benchmark("session.async_save", bench_session_async_save, is_async=True, inner=200),
+    Benchmark("guard.async_user", bench_guard_async_user, is_async=True, inner=200),
+    Benchmark("guard.async_attempt", bench_guard_async_attempt, is_async=True, inner=200)
+]
@@ -15,10 +15,11 @@ from auth1 import (
     Guard,
     SessionGuard,
     UserProvider,
-    StatefullGuard
+    StatefullGuard,
+    AuthenticateMiddleware
 )
 
-from .middleware import SessionMiddleware, AuthenticateMiddleware
+from .middleware import SessionMiddleware
 from .session import FileSessionHandler, create_file_session_handler
 from .user import NoopUserProvider1
 
@@ -30,7 +31,8 @@ async def dashboard(request: Request):
     #     'local1': "asa denggan sude",
     #     'local2': 355
     # }
-    print(f"request.user: {request.user}")
+    # request.user is resolved from the provider on first attribute access
+    print(f"request.user: {request.user.identifier}")
     return Response("Hello world")
 
 class LoginEndpoint(HTTPEndpoint):
@@ -93,7 +95,7 @@ routes = [
         dashboard,
         methods=["GET"],
         middleware=[
-            Middleware(SessionMiddleware, session_manager),
+            Middleware(SessionMiddleware, session_manager, prefetch_user=auth_manager),
             Middleware(AuthenticateMiddleware, auth_manager, redirect_to="/login")
         ]
     ),
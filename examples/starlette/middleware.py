@@ -10,20 +10,19 @@ from starlette.types import (
 
 from starlette.requests import HTTPConnection
 from starlette.datastructures import MutableHeaders
-from starlette.responses import RedirectResponse
 
 from auth1 import (
     SessionManager,
     SessionStore,
-    AuthManager,
-    Guard
+    AuthManager
 )
 
 class SessionMiddleware:
 
-    def __init__(self, app: ASGIApp, session_manager: SessionManager) -> None:
+    def __init__(self, app: ASGIApp, session_manager: SessionManager, prefetch_user: AuthManager | None = None) -> None:
         self.app = app
         self.session_manager = session_manager
+        self.prefetch_user = prefetch_user
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         if scope['type'] not in ("http", "websocket"):
@@ -38,6 +37,14 @@ class SessionMiddleware:
 
         scope['session'] = session_store
 
+        if self.prefetch_user is not None:
+            # start loading the logged in user while the rest of the
+            # middleware stack runs, SessionGuard.async_user picks it up.
+            guard = self.prefetch_user.guard()
+            if hasattr(guard, "prefetch"):
+                guard.set_session(session_store)
+                guard.prefetch()
+
         async def _send(message: Message):
             if message['type'] == "http.response.start":
                 headers = MutableHeaders(scope=message)
@@ -47,7 +54,10 @@ class SessionMiddleware:
 
             await send(message)
 
-        await self.app(scope, receive, _send)
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            session_store.cancel_prefetched()
 
     def _add_cookie_to_response(self, session_store: SessionStore, http_conn: HTTPConnection, headers: MutableHeaders) -> None:
         cookie_config = self.session_manager.config.get("cookie_params", {})
@@ -74,31 +84,3 @@ class SessionMiddleware:
         session_store.id = http_conn.cookies.get(session_store.name, None)
         return session_store
 
-
-class AuthenticateMiddleware:
-
-    def __init__(self, app: ASGIApp, auth_manager: AuthManager, redirect_to: str | None = None) -> None:
-        self.app = app
-        self.auth_manager = auth_manager
-        self.redirect_to = redirect_to
-
-    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
-        if scope['type'] not in ("http", "websocket"):
-            await self.app(scope, receive, send)
-            return
-
-        guard: Guard = self.auth_manager.guard()
-
-        if hasattr(guard, "set_session"):
-            guard.set_session(scope['session'])
-
-        user: Authenticatable | None = await guard.async_user()
-
-        if user is None:
-            response = RedirectResponse(self.redirect_to)
-            await response(scope, receive, send)
-            return
-
-        scope['user'] = user
-
-        await self.app(scope, receive, send)
@@ -4,7 +4,8 @@ from auth1 import (
     UserProvider,
     AuthenticatableRetval,
     Authenticatable,
-    SessionHandler
+    SessionHandler,
+    Session
 )
 
 class NoopUserProvider1(UserProvider):
@@ -70,3 +71,18 @@ class NoopReadSessionHandler(NoopSaveSessionHandler):
     def read(self, id: str) -> t.Awaitable[bytes] | bytes:
         self.read_id = id
         return self._data
+
+
+class FakeRequest:
+
+    def __init__(
+        self,
+        headers: t.Dict[str, str] | None = None,
+        query: t.Dict[str, str] | None = None,
+        cookies: t.Dict[str, str] | None = None
+    ) -> None:
+        self.cookies: t.Dict[str, str] = cookies or {}
+        self.query: t.Dict[str, str] = query or {}
+        self.input: t.Dict[str, str] = {}
+        self.headers: t.Dict[str, str] = headers or {}
+        self.session: Session
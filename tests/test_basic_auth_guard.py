@@ -0,0 +1,116 @@
+import typing as t
+import base64
+import pytest
+
+from auth1 import (
+    Guard,
+    BasicAuthGuard,
+    TTLCache,
+    UserProvider,
+    Authenticatable,
+    AuthenticatableRetval,
+    GenericUser,
+    PBKDF2Hasher
+)
+
+from ._helpers import FakeRequest
+
+
+class HashingUserProvider(UserProvider):
+
+    validate_credentials_called: int = 0
+
+    def __init__(self, _async: bool = False) -> None:
+        self._async = _async
+        self.hasher = PBKDF2Hasher(iterations=1000)
+        self.user = GenericUser({'userid': "harianja", 'password': self.hasher.make("Harianja710433!")})
+
+    def retrieve_by_id(self, id: str | int) -> AuthenticatableRetval:
+        return None
+
+    def retrieve_by_credentials(self, credentials: t.Dict[str, t.Any]) -> AuthenticatableRetval:
+        user = self.user if credentials['username'] == "harianja" else None
+        if self._async:
+            return self._async_return(user)
+        return user
+
+    def validate_credentials(self, user: Authenticatable, credentials: t.Dict[str, t.Any]) -> t.Awaitable[bool] | bool:
+        self.validate_credentials_called += 1
+        result = self.hasher.check(credentials['password'], user.password)
+        if self._async:
+            return self._async_return(result)
+        return result
+
+    async def _async_return(self, value: t.Any) -> t.Any:
+        return value
+
+
+def _basic(username: str, password: str) -> FakeRequest:
+    encoded = base64.b64encode(f"{username}:{password}".encode()).decode()
+    return FakeRequest(headers={'Authorization': f"Basic {encoded}"})
+
+
+def test_basic_auth_guard_credentials() -> None:
+    guard = BasicAuthGuard("tools", HashingUserProvider())
+
+    assert isinstance(guard, Guard)
+    assert guard.get_credentials_for_request() is None
+
+    guard.set_request(_basic("harianja", "pass:word"))
+    assert {'username': "harianja", 'password': "pass:word"} == guard.get_credentials_for_request()
+
+    for header in ["Bearer abc", "Basic !!!", "Basic " + base64.b64encode(b"nocolon").decode()]:
+        guard.set_request(FakeRequest(headers={'authorization': header}))
+        assert guard.get_credentials_for_request() is None
+
+
+def test_basic_auth_guard_user() -> None:
+    user_provider = HashingUserProvider()
+
+    assert BasicAuthGuard("tools", user_provider, _basic("harianja", "Harianja710433!")).user() is user_provider.user
+    assert BasicAuthGuard("tools", user_provider, _basic("harianja", "wrong")).user() is None
+    assert BasicAuthGuard("tools", user_provider, _basic("unknown", "Harianja710433!")).user() is None
+
+    # without a cache every request verifies the password again
+    assert BasicAuthGuard("tools", user_provider, _basic("harianja", "Harianja710433!")).user() is user_provider.user
+    assert 3 == user_provider.validate_credentials_called
+
+
+def test_basic_auth_guard_verified_cache() -> None:
+    cache: TTLCache[str, str] = TTLCache(ttl=30)
+    user_provider = HashingUserProvider()
+
+    for _ in range(3):
+        assert BasicAuthGuard("tools", user_provider, _basic("harianja", "Harianja710433!"), cache=cache).user() is not None
+
+    assert 1 == user_provider.validate_credentials_called
+
+    # the cache only holds keyed hashes, never the credentials themselves
+    (cache_key, (_, password_hash)), = cache._entries.items()
+    assert "Harianja710433!" not in cache_key
+    assert password_hash == user_provider.user.password
+
+    # a wrong password is a different key and is verified, not served from cache
+    assert BasicAuthGuard("tools", user_provider, _basic("harianja", "wrong"), cache=cache).user() is None
+    assert 2 == user_provider.validate_credentials_called
+
+    # changing the password hash invalidates the cached verification
+    user_provider.user = GenericUser({'userid': "harianja", 'password': user_provider.hasher.make("NewPassword1!")})
+
+    assert BasicAuthGuard("tools", user_provider, _basic("harianja", "Harianja710433!"), cache=cache).user() is None
+    assert 3 == user_provider.validate_credentials_called
+    assert 0 == len(cache)
+
+
+@pytest.mark.asyncio
+async def test_basic_auth_guard_async_user() -> None:
+    cache: TTLCache[str, str] = TTLCache(ttl=30)
+    user_provider = HashingUserProvider(_async=True)
+
+    for _ in range(2):
+        user = await BasicAuthGuard("tools", user_provider, _basic("harianja", "Harianja710433!"), cache=cache).async_user()
+        assert user is user_provider.user
+
+    assert 1 == user_provider.validate_credentials_called
+
+    assert await BasicAuthGuard("tools", user_provider, _basic("harianja", "wrong"), cache=cache).async_user() is None
@@ -0,0 +1,164 @@
+import typing as t
+import pytest
+
+from auth1 import (
+    AuthManager,
+    Guard,
+    ChainGuard,
+    ChainStats,
+    SessionGuard,
+    TokenGuard,
+    SessionStore,
+    NullSessionHandler,
+    GuardUserRetval,
+    Authenticatable,
+    GenericUser
+)
+
+from ._helpers import NoopUserProvider1, FakeRequest
+
+
+class StaticGuard(Guard):
+
+    def __init__(self, user: Authenticatable | None, present: bool | None = None) -> None:
+        self._user = user
+        self._present = present
+        self.user_called = 0
+        self.requests: t.List[t.Any] = []
+
+        if present is None:
+            # behaves like a guard without a cheap presence check
+            self.has_credentials = None # type: ignore [assignment]
+
+    def has_credentials(self) -> bool:
+        return bool(self._present)
+
+    def set_request(self, request: t.Any) -> None:
+        self.requests.append(request)
+
+    def user(self) -> GuardUserRetval:
+        self.user_called += 1
+        return self._user
+
+    async def async_user(self) -> Authenticatable | None:
+        self.user_called += 1
+        return self._user
+
+
+def _user(name: str) -> GenericUser:
+    return GenericUser({'userid': name, 'password': ""})
+
+
+def test_chain_guard_first_hit() -> None:
+    first = StaticGuard(None, present=True)
+    second = StaticGuard(_user("second"), present=True)
+    third = StaticGuard(_user("third"), present=True)
+
+    guard = ChainGuard("any", [first, second, third])
+
+    assert isinstance(guard, Guard)
+
+    user = guard.user()
+
+    assert user is not None
+    assert "second" == user.identifier
+    assert guard.matched_guard is second
+    assert (1, 1, 0) == (first.user_called, second.user_called, third.user_called)
+
+    assert guard.user() is user
+    assert 1 == second.user_called
+
+
+def test_chain_guard_skips_absent_credentials() -> None:
+    absent = StaticGuard(_user("absent"), present=False)
+    unknown = StaticGuard(_user("unknown"))
+
+    guard = ChainGuard("any", [absent, unknown])
+
+    user = guard.user()
+
+    assert user is not None
+    assert "unknown" == user.identifier
+    assert 0 == absent.user_called
+    assert True == guard.has_credentials()
+
+    request = FakeRequest()
+    guard.set_request(request)
+
+    assert [request] == absent.requests == unknown.requests
+
+
+@pytest.mark.asyncio
+async def test_chain_guard_async_user() -> None:
+    first = StaticGuard(None, present=True)
+    second = StaticGuard(_user("second"), present=True)
+
+    guard = ChainGuard("any", [first, second])
+
+    user = await guard.async_user()
+
+    assert user is not None
+    assert "second" == user.identifier
+    assert await ChainGuard("any", [first]).async_user() is None
+
+
+def test_chain_guard_adaptive_order() -> None:
+    stats = ChainStats(2, reorder_every=3)
+
+    for _ in range(3):
+        ChainGuard("any", [StaticGuard(None, True), StaticGuard(_user("token"), True)], stats).user()
+
+    assert (1, 0) == stats.order
+    assert [0, 3] == stats.hits
+
+    first = StaticGuard(_user("session"), present=True)
+    second = StaticGuard(_user("token"), present=True)
+
+    user = ChainGuard("any", [first, second], stats).user()
+
+    assert user is not None
+    assert "token" == user.identifier
+    assert 0 == first.user_called
+
+
+def test_auth_manager_chain_guard() -> None:
+    auth = AuthManager({
+        'defaults': {'guard': "any"},
+        'guards': {
+            'web': {'driver': "session"},
+            'api': {'driver': "token"},
+            'any': {'driver': "chain", 'guards': ["web", "api"], 'adaptive': True}
+        }
+    })
+
+    @auth.factory("session")
+    def session_guard_factory(name: str) -> SessionGuard:
+        return SessionGuard(name, NoopUserProvider1(), SessionStore("session1", NullSessionHandler()))
+
+    @auth.factory("token")
+    def token_guard_factory(name: str) -> TokenGuard:
+        return TokenGuard(name, NoopUserProvider1())
+
+    guard = auth.guard()
+
+    assert isinstance(guard, ChainGuard)
+    assert isinstance(guard.guards[0], SessionGuard)
+    assert isinstance(guard.guards[1], TokenGuard)
+
+    # nothing in the session and no bearer token, no member is asked
+    assert False == guard.has_credentials()
+    assert guard.user() is None
+
+    guard.set_request(FakeRequest(headers={'authorization': "Bearer abc"}))
+    assert True == guard.has_credentials()
+
+    # adaptive statistics are shared between guards of the same chain
+    assert guard._stats is t.cast(ChainGuard, auth.guard("any"))._stats
+
+
+def test_auth_manager_chain_guard_contains_itself() -> None:
+    # caught while compiling the config, before any request
+    with pytest.raises(RuntimeError) as exc_info:
+        AuthManager({'guards': {'any': {'driver': "chain", 'guards': ["any"]}}})
+
+    assert "Chain guard `any` can not contain itself" == exc_info.value.args[0]
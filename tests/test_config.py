@@ -0,0 +1,206 @@
+import typing as t
+import pytest
+
+from auth1 import (
+    AuthManager,
+    ChainGuard,
+    ConfigError,
+    Guard,
+    JSONSerializer,
+    NullSessionHandler,
+    SessionGuard,
+    SessionManager,
+    compile_auth_config,
+    compile_session_config
+)
+
+from ._helpers import NoopUserProvider1
+
+
+def _session_guard(name: str) -> Guard:
+    return SessionGuard(name, NoopUserProvider1())
+
+
+def test_compile_auth_config() -> None:
+    config = compile_auth_config({
+        'defaults': {'guard': "any"},
+        'guards': {
+            'web': {'driver': "session"},
+            'any': {'driver': "chain", 'guards': ["web"], 'adaptive': True, 'reorder_every': 10}
+        }
+    })
+
+    assert "any" == config.default_guard
+    assert "session" == config.guards['web'].driver
+    assert ("web",) == config.guards['any'].members
+    assert True == config.guards['any'].adaptive
+    assert 10 == config.guards['any'].reorder_every
+
+    with pytest.raises(TypeError):
+        config.guards['web'].options['driver'] = "token" # type: ignore [index]
+
+
+def test_compile_auth_config_freezes_nested_options() -> None:
+    config = compile_auth_config({'guards': {'web': {'driver': "session", 'cookie': {'secure': True}, 'hosts': ["a"]}}})
+    options = config.guards['web'].options
+
+    with pytest.raises(TypeError):
+        options['cookie']['secure'] = False
+
+    assert ("a",) == options['hosts']
+
+
+def test_auth_manager_empty_chain() -> None:
+    auth = AuthManager({'defaults': {'guard': "any"}, 'guards': {'any': {'driver': "chain", 'guards': []}}})
+
+    auth.validate()
+    guard = auth.guard()
+
+    assert isinstance(guard, ChainGuard)
+    assert [] == guard.guards
+
+
+@pytest.mark.parametrize("config, message", [
+    ({'guards': []}, "`guards` must be a dict"),
+    ({'guards': {'web': {}}}, "Guard `web` has no driver"),
+    ({'defaults': {'guard': "api"}, 'guards': {'web': {'driver': "session"}}}, "Default guard `api` is not configured"),
+    ({'guards': {'any': {'driver': "chain", 'guards': ["api"]}}}, "Chain guard `any` refers to unknown guard `api`"),
+    ({'guards': {'a': {'driver': "chain", 'guards': ["b"]}, 'b': {'driver': "chain", 'guards': ["a"]}}}, "Chain guard `a` has a cycle through `a`"),
+    ({'guards': {'any': {'driver': "chain", 'guards': "web"}}}, "Chain guard `any` needs a list of guard names")
+])
+def test_compile_auth_config_invalid(config: t.Dict[str, t.Any], message: str) -> None:
+    with pytest.raises(ConfigError) as exc_info:
+        compile_auth_config(config)
+
+    assert message == exc_info.value.args[0]
+
+
+def test_auth_manager_unknown_driver() -> None:
+    config = {'defaults': {'guard': "web"}, 'guards': {'web': {'driver': "session"}, 'api': {'driver': "token"}}}
+
+    with pytest.raises(ConfigError) as exc_info:
+        AuthManager(config, factories={'session': _session_guard})
+
+    assert "Unknown guard drivers: `token` (guard `api`)" == exc_info.value.args[0]
+
+    auth = AuthManager(config)
+    auth.factory("session")(_session_guard)
+
+    assert isinstance(auth.guard(), SessionGuard)
+
+    with pytest.raises(ConfigError) as exc_info:
+        auth.guard("api")
+
+    assert "Guard `api` uses unknown driver `token`" == exc_info.value.args[0]
+
+    with pytest.raises(ConfigError) as exc_info:
+        auth.guard("nope")
+
+    assert "Guard `nope` is not configured" == exc_info.value.args[0]
+
+    with pytest.raises(ConfigError):
+        auth.validate()
+
+
+def test_auth_manager_reload() -> None:
+    auth = AuthManager({'defaults': {'guard': "web"}, 'guards': {'web': {'driver': "session"}}}, factories={'session': _session_guard})
+
+    guard = t.cast(SessionGuard, auth.guard())
+    assert guard.name.startswith("login_web_")
+
+    new_config = {'defaults': {'guard': "admin"}, 'guards': {'admin': {'driver': "session"}}}
+    auth.reload(new_config)
+
+    assert new_config == auth.config
+    assert "admin" == auth.compiled.default_guard
+    assert t.cast(SessionGuard, auth.guard()).name.startswith("login_admin_")
+
+    # a broken config never replaces the running one
+    with pytest.raises(ConfigError):
+        auth.reload({'defaults': {'guard': "admin"}, 'guards': {'admin': {'driver': "token"}}})
+
+    assert "admin" == auth.compiled.default_guard
+
+
+def test_auth_manager_reload_resets_changed_chain_stats() -> None:
+    config = {
+        'guards': {
+            'web': {'driver': "session"},
+            'any': {'driver': "chain", 'guards': ["web"], 'adaptive': True}
+        }
+    }
+    auth = AuthManager(config, factories={'session': _session_guard})
+
+    auth.guard("any")
+    stats = auth._chain_stats['any']
+
+    auth.reload(dict(config))
+    auth.guard("any")
+
+    assert stats is auth._chain_stats['any']
+
+    auth.reload({'guards': {**config['guards'], 'any': {'driver': "chain", 'guards': ["web"], 'adaptive': True, 'reorder_every': 5}}})
+
+    assert 'any' not in auth._chain_stats
+
+
+def test_compile_session_config() -> None:
+    config = compile_session_config({'cookie': "", 'budget': {'hard_limit': 100}})
+
+    assert "PHPSESSID" == config.cookie
+    assert config.serializer is None
+    assert config.budget is not None and 100 == config.budget.hard_limit
+
+    with pytest.raises(ConfigError) as exc_info:
+        compile_session_config({'budget': {'policy': "truncate"}})
+
+    assert "Invalid session budget: Unknown session budget policy `truncate`" == exc_info.value.args[0]
+
+    with pytest.raises(ConfigError):
+        compile_session_config({'cookie': 123})
+
+
+@pytest.mark.parametrize("budget, message", [
+    ({'hard_limit': "100"}, "`hard_limit` must be a non-negative integer"),
+    ({'soft_limit': -1}, "`soft_limit` must be a non-negative integer"),
+    ({'soft_limit': True}, "`soft_limit` must be a non-negative integer"),
+    ({'policy': ["drop"]}, "`policy` must be a string"),
+    ({'droppable': "cart"}, "`droppable` must be a list of session keys")
+])
+def test_compile_session_config_invalid_budget(budget: t.Dict[str, t.Any], message: str) -> None:
+    with pytest.raises(ConfigError) as exc_info:
+        compile_session_config({'budget': budget})
+
+    assert f"Invalid session budget: {message}" == exc_info.value.args[0]
+
+
+def test_session_manager_reload() -> None:
+    session_manager = SessionManager({'cookie': "first", 'budget': {'hard_limit': 100}})
+
+    @session_manager.handler_factory("null")
+    def create_handler() -> NullSessionHandler:
+        return NullSessionHandler()
+
+    @session_manager.serializer_factory("json")
+    def create_serializer() -> JSONSerializer:
+        return JSONSerializer()
+
+    budget = session_manager.budget
+
+    assert "first" == session_manager.create("null").name
+
+    with pytest.raises(ConfigError) as exc_info:
+        session_manager.create("redis")
+
+    assert "Unknown session handler `redis`" == exc_info.value.args[0]
+
+    session_manager.reload({'cookie': "second", 'serializer': "json", 'budget': {'hard_limit': 100}})
+
+    assert "second" == session_manager.create("null").name
+    assert budget is session_manager.budget
+
+    with pytest.raises(ConfigError) as exc_info:
+        session_manager.reload({'cookie': "third", 'serializer': "msgpack"})
+
+    assert "Unknown session serializer `msgpack`" == exc_info.value.args[0]
+    assert "second" == session_manager.create("null").name
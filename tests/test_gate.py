@@ -0,0 +1,165 @@
+import typing as t
+import pytest
+
+from auth1 import (
+    Gate,
+    UserGate,
+    AuthorizationError,
+    Authenticatable,
+    GenericUser
+)
+
+
+class Post:
+
+    def __init__(self, id: int, author: str) -> None:
+        self.id = id
+        self.author = author
+
+
+class Draft(Post):
+    pass
+
+
+def _user(name: str) -> GenericUser:
+    return GenericUser({'userid': name, 'password': ""})
+
+
+def _gate(calls: t.List[t.Any]) -> Gate:
+    gate = Gate()
+
+    @gate.define("view-dashboard")
+    def view_dashboard(user: Authenticatable | None) -> bool:
+        calls.append(("view-dashboard", None))
+        return user is not None
+
+    @gate.policy(Post)
+    class PostPolicy:
+
+        def update(self, user: Authenticatable | None, post: Post) -> bool:
+            calls.append(("update", post.id))
+            return user is not None and user.identifier == post.author
+
+        def delete_many(self, user: Authenticatable | None, posts: t.List[Post]) -> t.List[bool]:
+            calls.append(("delete_many", [post.id for post in posts]))
+            return [user is not None and user.identifier == post.author for post in posts]
+
+        async def publish(self, user: Authenticatable | None, post: Post) -> bool:
+            calls.append(("publish", post.id))
+            return post.author == "harianja"
+
+    return gate
+
+
+def test_gate_abilities_and_policies() -> None:
+    calls: t.List[t.Any] = []
+    gate = _gate(calls)
+
+    assert True == gate.has("view-dashboard")
+    assert True == gate.has("update")
+    assert False == gate.has("unknown")
+
+    assert True == gate.allows(_user("harianja"), "view-dashboard")
+    assert False == gate.allows(None, "view-dashboard")
+
+    assert True == gate.allows(_user("harianja"), "update", Post(1, "harianja"))
+    assert False == gate.allows(_user("lundu"), "update", Post(1, "harianja"))
+
+    # policies resolve through the resource type hierarchy
+    assert True == gate.allows(_user("harianja"), "update", Draft(2, "harianja"))
+
+    # unknown abilities are denied
+    assert False == gate.allows(_user("harianja"), "unknown")
+
+
+def test_user_gate_memoizes_decisions() -> None:
+    calls: t.List[t.Any] = []
+    user_gate = _gate(calls).for_user(_user("harianja"))
+
+    assert isinstance(user_gate, UserGate)
+
+    post = Post(1, "harianja")
+
+    for _ in range(3):
+        assert True == user_gate.allows("update", post)
+        assert False == user_gate.denies("view-dashboard")
+
+    assert [("update", 1), ("view-dashboard", None)] == calls
+
+    user_gate.authorize("update", post)
+
+    with pytest.raises(AuthorizationError) as exc_info:
+        user_gate.authorize("update", Post(2, "lundu"))
+
+    assert "update" == exc_info.value.ability
+    assert "This action is unauthorized: `update`" == exc_info.value.args[0]
+
+
+def test_user_gate_custom_resource_key() -> None:
+    calls: t.List[t.Any] = []
+    gate = _gate(calls)
+    gate._resource_key = lambda post: post.id
+
+    user_gate = gate.for_user(_user("harianja"))
+
+    # distinct objects for the same row share one decision
+    assert True == user_gate.allows("update", Post(1, "harianja"))
+    assert True == user_gate.allows("update", Post(1, "harianja"))
+    assert 1 == len(calls)
+
+
+def test_gate_before() -> None:
+    calls: t.List[t.Any] = []
+    gate = _gate(calls)
+
+    @gate.before
+    def admin(user: Authenticatable | None, ability: str, resource: t.Any) -> bool | None:
+        return True if user is not None and user.identifier == "admin" else None
+
+    assert True == gate.allows(_user("admin"), "update", Post(1, "harianja"))
+    assert [] == calls
+    assert False == gate.allows(_user("lundu"), "update", Post(1, "harianja"))
+
+
+def test_user_gate_allows_many() -> None:
+    calls: t.List[t.Any] = []
+    user_gate = _gate(calls).for_user(_user("harianja"))
+
+    posts = [Post(1, "harianja"), Post(2, "lundu"), Post(3, "harianja")]
+
+    assert [True, False, True] == user_gate.allows_many("update", posts)
+    assert [("update", 1), ("update", 2), ("update", 3)] == calls
+
+    # policies with a batch method are asked once for every pending resource
+    calls.clear()
+    assert [True, False, True] == user_gate.allows_many("delete", posts)
+    assert [("delete_many", [1, 2, 3])] == calls
+
+    calls.clear()
+    assert [True, False, True] == user_gate.allows_many("delete", posts)
+    assert [] == calls
+
+
+@pytest.mark.asyncio
+async def test_user_gate_async() -> None:
+    calls: t.List[t.Any] = []
+    user_gate = _gate(calls).for_user(_user("harianja"))
+
+    post = Post(1, "harianja")
+
+    assert True == await user_gate.async_allows("publish", post)
+    assert True == await user_gate.async_allows("publish", post)
+    assert False == await user_gate.async_denies("publish", post)
+    assert [("publish", 1)] == calls
+
+    await user_gate.async_authorize("update", post)
+
+    with pytest.raises(AuthorizationError):
+        await user_gate.async_authorize("publish", Post(2, "lundu"))
+
+    assert [True, False] == await user_gate.async_allows_many("publish", [post, Post(2, "lundu")])
+
+    with pytest.raises(ValueError) as exc_info:
+        user_gate.allows("publish", Post(3, "harianja"))
+
+    assert "Cannot use awaitable return value from gate ability" == exc_info.value.args[0]
@@ -2,6 +2,7 @@ import typing as t
 import pytest
 import pytest_asyncio
 import hashlib
+import asyncio
 
 from auth1 import (
     SessionGuard,
@@ -319,3 +320,143 @@ async def test_session_guard_async_attempt() -> None:
 @pytest.mark.asyncio
 async def test_session_guard_async_attempt_remember() -> None:
     await _do_test_session_guard_async_attempt(remember=True)
+
+class RehashUserProvider(NoopUserProvider2):
+
+    def __init__(self, _async: bool = False) -> None:
+        super().__init__(_async)
+        self.rehashed: t.List[t.Tuple[Authenticatable, t.Dict[str, t.Any]]] = []
+
+    def validate_credentials(self, user: Authenticatable, credentials: t.Dict[str, t.Any]) -> t.Awaitable[bool] | bool:
+        if not self._async:
+            return credentials['password'] == "Harianja710433!"
+        return self._async_validate(credentials)
+
+    async def _async_validate(self, credentials: t.Dict[str, t.Any]) -> bool:
+        return credentials['password'] == "Harianja710433!"
+
+    def rehash_password_if_required(self, user: Authenticatable, credentials: t.Dict[str, t.Any]) -> t.Awaitable[None] | None:
+        if not self._async:
+            self.rehashed.append((user, credentials))
+            return None
+        return self._async_rehash(user, credentials)
+
+    async def _async_rehash(self, user: Authenticatable, credentials: t.Dict[str, t.Any]) -> None:
+        self.rehashed.append((user, credentials))
+
+
+def test_session_guard_attempt_rehash() -> None:
+    user_provider = RehashUserProvider()
+    guard = SessionGuard("horas", user_provider, SessionStore("auth1", NullSessionHandler(), id="12345"))
+
+    assert False == guard.attempt({'username': "harianja", 'password': "wrong"})
+    assert [] == user_provider.rehashed
+
+    credentials = {'username': "harianja", 'password': "Harianja710433!"}
+
+    assert True == guard.attempt(credentials)
+    assert 1 == len(user_provider.rehashed)
+    assert credentials is user_provider.rehashed[0][1]
+
+
+@pytest.mark.asyncio
+async def test_session_guard_async_attempt_rehash() -> None:
+    user_provider = RehashUserProvider(_async=True)
+    guard = SessionGuard("horas", user_provider, SessionStore("auth1", NullSessionHandler(), id="12345"))
+
+    assert False == await guard.async_attempt({'username': "harianja", 'password': "wrong"})
+    assert [] == user_provider.rehashed
+
+    assert True == await guard.async_attempt({'username': "harianja", 'password': "Harianja710433!"})
+    assert 1 == len(user_provider.rehashed)
+
+
+class SlowUserProvider(NoopUserProvider2):
+
+    def __init__(self) -> None:
+        super().__init__(_async=True)
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.cancelled = False
+
+    async def _do_retrieve_by_id(self, id: str | int) -> Authenticatable | None:
+        self.started.set()
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return GenericUser({'userid': id, 'password': ""})
+
+
+@pytest.mark.asyncio
+async def test_session_guard_prefetch() -> None:
+    session_store = SessionStore("auth1", NullSessionHandler())
+    user_provider = SlowUserProvider()
+
+    guard = SessionGuard("horas", user_provider, session_store)
+
+    assert False == guard.prefetch()
+
+    session_store[guard.name] = "harianja"
+
+    assert True == guard.prefetch()
+
+    # the fetch runs while the request is still being handled elsewhere
+    await user_provider.started.wait()
+
+    user_provider.release.set()
+
+    # a separate guard instance picks up the running fetch
+    user = await SessionGuard("horas", user_provider, session_store).async_user()
+
+    assert user is not None
+    assert "harianja" == user.identifier
+    assert 1 == user_provider.retrieve_by_id_called
+
+
+@pytest.mark.asyncio
+async def test_session_guard_prefetch_cancelled() -> None:
+    session_store = SessionStore("auth1", NullSessionHandler())
+    user_provider = SlowUserProvider()
+
+    guard = SessionGuard("horas", user_provider, session_store)
+    session_store[guard.name] = "harianja"
+    guard.prefetch()
+
+    await user_provider.started.wait()
+
+    # the response finished without anyone asking for the user
+    session_store.cancel_prefetched()
+    await asyncio.sleep(0)
+
+    assert True == user_provider.cancelled
+
+
+@pytest.mark.asyncio
+async def test_session_guard_prefetch_stale() -> None:
+    session_store = SessionStore("auth1", NullSessionHandler())
+    user_provider = NoopUserProvider2(_async=True)
+
+    guard = SessionGuard("horas", user_provider, session_store)
+    session_store[guard.name] = "harianja"
+    guard.prefetch()
+
+    session_store[guard.name] = "lundu"
+
+    # the prefetched login key no longer matches, the provider is asked again
+    assert await SessionGuard("horas", user_provider, session_store).async_user() is not None
+    assert 2 == user_provider.retrieve_by_id_called
+
+
+@pytest.mark.asyncio
+async def test_session_guard_prefetch_sync_provider() -> None:
+    session_store = SessionStore("auth1", NullSessionHandler())
+    user_provider = NoopUserProvider2()
+
+    guard = SessionGuard("horas", user_provider, session_store)
+    session_store[guard.name] = "harianja"
+    guard.prefetch()
+
+    assert SessionGuard("horas", user_provider, session_store).user() is not None
+    assert 1 == user_provider.retrieve_by_id_called
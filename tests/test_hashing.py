@@ -0,0 +1,70 @@
+import pytest
+
+from auth1 import Hasher, PBKDF2Hasher, calibrate_pbkdf2
+
+from auth1.__main__ import main
+
+
+def test_pbkdf2_hasher() -> None:
+    hasher: Hasher = PBKDF2Hasher(iterations=1000)
+
+    assert isinstance(hasher, Hasher)
+
+    hashed = hasher.make("Harianja710433!")
+
+    assert hashed.startswith("pbkdf2_sha256$1000$")
+    assert hashed != hasher.make("Harianja710433!")
+
+    assert True == hasher.check("Harianja710433!", hashed)
+    assert False == hasher.check("harianja710433!", hashed)
+    assert False == hasher.check("Harianja710433!", "not a hash")
+
+
+@pytest.mark.parametrize("hashed", [
+    "pbkdf2_sha256$0$salt$derived",
+    "pbkdf2_sha256$-5$salt$derived",
+    "pbkdf2_nope$1000$salt$derived",
+    "argon2_sha256$1000$salt$derived"
+])
+def test_pbkdf2_hasher_corrupt_hash(hashed: str) -> None:
+    hasher = PBKDF2Hasher(iterations=1000)
+
+    assert False == hasher.check("Harianja710433!", hashed)
+    assert True == hasher.needs_rehash(hashed)
+
+
+def test_pbkdf2_hasher_needs_rehash() -> None:
+    hashed = PBKDF2Hasher(iterations=1000).make("Harianja710433!")
+
+    assert False == PBKDF2Hasher(iterations=1000).needs_rehash(hashed)
+    assert True == PBKDF2Hasher(iterations=2000).needs_rehash(hashed)
+    assert True == PBKDF2Hasher(iterations=1000, digest="sha512").needs_rehash(hashed)
+    assert True == PBKDF2Hasher(iterations=1000).needs_rehash("$2y$10$legacy")
+
+    # the old hash still verifies with the upgraded hasher
+    assert True == PBKDF2Hasher(iterations=2000).check("Harianja710433!", hashed)
+
+
+def test_pbkdf2_hasher_invalid_iterations() -> None:
+    with pytest.raises(ValueError) as exc_info:
+        PBKDF2Hasher(iterations=0)
+
+    assert "iterations must be a positive integer" == exc_info.value.args[0]
+
+
+def test_calibrate_pbkdf2() -> None:
+    result = calibrate_pbkdf2(target_seconds=0.005, sample_iterations=2000, rounds=1)
+
+    assert result.iterations >= 1000
+    assert 0 == result.iterations % 1000
+    assert result.verify_seconds > 0
+    assert result.logins_per_second == pytest.approx(1.0 / result.verify_seconds)
+
+
+def test_calibrate_command(capsys: pytest.CaptureFixture[str]) -> None:
+    assert 0 == main(["calibrate", "--target-ms", "5", "--logins-per-second", "400"])
+
+    output = capsys.readouterr().out
+
+    assert "iterations:" in output
+    assert "PBKDF2Hasher(iterations=" in output
@@ -0,0 +1,152 @@
+import math
+import typing as t
+import pytest
+
+from auth1 import (
+    AuthManager,
+    Guard,
+    GenericUser,
+    HistogramCollector,
+    Instrument,
+    NullInstrument,
+    SessionGuard,
+    SessionManager,
+    SessionStore,
+    NullSessionHandler,
+    prometheus_text
+)
+
+from ._helpers import NoopUserProvider1, NoopReadSessionHandler
+
+
+class Clock:
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        self.now += 0.002
+        return self.now
+
+
+class UserProvider(NoopUserProvider1):
+
+    def retrieve_by_id(self, id: str | int) -> GenericUser:
+        return GenericUser({'userid': id, 'password': ""})
+
+    def retrieve_by_credentials(self, credentials: t.Dict[str, t.Any]) -> GenericUser:
+        return GenericUser({'userid': credentials['username'], 'password': ""})
+
+
+def test_null_instrument() -> None:
+    instrument = NullInstrument()
+
+    assert isinstance(instrument, Instrument)
+    assert instrument.span("a") is instrument.span("b")
+
+    with instrument.span("session.read"):
+        pass
+
+
+def test_histogram_collector() -> None:
+    collector = HistogramCollector(buckets=(0.001, 0.01), clock=Clock())
+
+    with collector.span("session.read"):
+        pass
+
+    with pytest.raises(RuntimeError):
+        with collector.span("session.read"):
+            raise RuntimeError("handler down")
+
+    collector.observe("session.read", 0.001)
+    collector.observe("session.read", 0.5)
+
+    stats = collector.snapshot()['session.read']
+
+    assert (0.001, 0.01) == stats.buckets
+    assert (1, 3, 4) == stats.counts
+    assert 4 == stats.count
+    assert 1 == stats.errors
+    assert 0.505 == pytest.approx(stats.sum)
+    assert 0.01 == stats.quantile(0.5)
+    assert math.inf == stats.quantile(1.0)
+
+    collector.reset()
+
+    assert {} == collector.snapshot()
+
+
+def test_prometheus_text() -> None:
+    collector = HistogramCollector(buckets=(0.001, 0.01))
+    collector.observe("guard.user", 0.005)
+    collector.observe("guard.user", 0.02, error=True)
+
+    assert prometheus_text(collector) == (
+        "# HELP auth1_operation_duration_seconds Time spent in auth1 operations.\n"
+        "# TYPE auth1_operation_duration_seconds histogram\n"
+        'auth1_operation_duration_seconds_bucket{operation="guard.user",le="0.001"} 0\n'
+        'auth1_operation_duration_seconds_bucket{operation="guard.user",le="0.01"} 1\n'
+        'auth1_operation_duration_seconds_bucket{operation="guard.user",le="+Inf"} 2\n'
+        'auth1_operation_duration_seconds_sum{operation="guard.user"} 0.025\n'
+        'auth1_operation_duration_seconds_count{operation="guard.user"} 2\n'
+        "# HELP auth1_operation_errors_total auth1 operations that raised.\n"
+        "# TYPE auth1_operation_errors_total counter\n"
+        'auth1_operation_errors_total{operation="guard.user"} 1\n'
+    )
+
+
+def test_session_store_instrumented() -> None:
+    collector = HistogramCollector()
+
+    session_manager = SessionManager({}, instrument=collector)
+
+    @session_manager.handler_factory("read")
+    def create_handler() -> NoopReadSessionHandler:
+        return NoopReadSessionHandler(b'{"_token": "abc"}')
+
+    session = session_manager.create("read")
+    session.id = "12345"
+    session.start()
+    session.save()
+    session.migrate(True)
+
+    counts = {name: stats.count for name, stats in collector.snapshot().items()}
+
+    assert {'session.read': 1, 'session.decode': 1, 'session.encode': 1, 'session.write': 1, 'session.destroy': 1} == counts
+
+
+@pytest.mark.asyncio
+async def test_session_guard_instrumented() -> None:
+    collector = HistogramCollector()
+
+    auth_manager = AuthManager({'defaults': {'guard': "web"}, 'guards': {'web': {'driver': "session"}}}, instrument=collector)
+
+    @auth_manager.factory("session")
+    def create_guard(name: str) -> Guard:
+        return SessionGuard(name, UserProvider(), instrument=auth_manager.instrument)
+
+    session = SessionStore("auth1", NullSessionHandler(), id="12345", instrument=collector)
+
+    guard = t.cast(SessionGuard, auth_manager.guard())
+    guard.set_session(session)
+
+    assert True == guard.attempt({'username': "harianja"})
+    assert True == await guard.async_attempt({'username': "harianja"})
+
+    guard = t.cast(SessionGuard, auth_manager.guard())
+    guard.set_session(session)
+
+    assert guard.user() is not None
+
+    guard = t.cast(SessionGuard, auth_manager.guard())
+    guard.set_session(session)
+
+    assert await guard.async_user() is not None
+
+    counts = {name: stats.count for name, stats in collector.snapshot().items()}
+
+    assert 3 == counts['manager.guard']
+    assert 2 == counts['guard.attempt']
+    assert 2 == counts['guard.validate']
+    assert 2 == counts['guard.user']
+    assert 2 == counts['session.destroy']
@@ -0,0 +1,246 @@
+import typing as t
+import pytest
+
+from auth1 import (
+    SessionGuard,
+    SessionStore,
+    StatefullGuard,
+    NullSessionHandler,
+    UserProvider,
+    Authenticatable,
+    AuthenticatableRetval,
+    GenericUser,
+    Recaller
+)
+
+from ._helpers import NoopUserProvider1
+
+
+class EpochUserProvider(UserProvider):
+
+    def __init__(self, _async: bool = False, epoch: int | None = 0) -> None:
+        self._async = _async
+        self.user = GenericUser({'userid': "harianja", 'password': "", 'auth_epoch': epoch})
+        self.remember_tokens: t.List[str] = []
+
+    def retrieve_by_id(self, id: str | int) -> AuthenticatableRetval:
+        return self._return(self.user)
+
+    def retrieve_by_credentials(self, credentials: t.Dict[str, t.Any]) -> AuthenticatableRetval:
+        return self._return(self.user)
+
+    def validate_credentials(self, user: Authenticatable, credentials: t.Dict[str, t.Any]) -> t.Awaitable[bool] | bool:
+        return t.cast(bool, self._return(True))
+
+    def update_remember_token(self, user: Authenticatable, token: str) -> t.Awaitable[None] | None:
+        self.remember_tokens.append(token)
+        self.user.remember_token = token
+        return t.cast(None, self._return(None))
+
+    def retrieve_by_remember_selector(self, selector: str) -> AuthenticatableRetval:
+        token = self.user.remember_token
+        return self._return(self.user if token and Recaller.selector_of(token) == selector else None)
+
+    def increment_auth_epoch(self, user: Authenticatable) -> t.Awaitable[int | None] | int | None:
+        # a single write, sessions are never scanned
+        self.user = GenericUser({**self.user._attributes, 'auth_epoch': (self.user.auth_epoch or 0) + 1})
+        return t.cast(int, self._return(self.user.auth_epoch))
+
+    def _return(self, value: t.Any) -> t.Any:
+        if self._async:
+            return self._async_return(value)
+        return value
+
+    async def _async_return(self, value: t.Any) -> t.Any:
+        return value
+
+
+def _logged_in(user_provider: EpochUserProvider, remember: bool = False) -> t.Tuple[SessionGuard, SessionStore]:
+    session = SessionStore("auth1", NullSessionHandler(), id="12345")
+    guard = SessionGuard("horas", user_provider, session)
+    assert True == guard.attempt({'username': "harianja"}, remember=remember)
+    return guard, session
+
+
+def test_session_guard_logout() -> None:
+    user_provider = EpochUserProvider()
+    guard, session = _logged_in(user_provider, remember=True)
+
+    assert isinstance(guard, StatefullGuard)
+
+    session['cart'] = [1, 2, 3]
+    session.regenerate_token()
+    session_id = session.id
+    token = session.token
+
+    guard.logout()
+
+    assert guard.user() is None
+    assert session_id != session.id
+    assert token != session.token
+    assert False == guard.check()
+
+    with pytest.raises(AttributeError):
+        session['cart']
+
+    # the remember token was cycled and the cookie is cleared
+    assert 2 == len(user_provider.remember_tokens)
+    assert "" == guard.queued_recaller
+
+
+def test_session_guard_epoch_stored_at_login() -> None:
+    user_provider = EpochUserProvider()
+    guard, session = _logged_in(user_provider)
+
+    assert 0 == session[guard.epoch_name]
+
+
+def test_session_guard_logout_other_devices() -> None:
+    user_provider = EpochUserProvider()
+
+    _, other_session = _logged_in(user_provider)
+    guard, session = _logged_in(user_provider)
+
+    assert True == guard.logout_other_devices()
+    assert 1 == session[guard.epoch_name]
+
+    # this device stays logged in
+    assert SessionGuard("horas", user_provider, session).user() is not None
+
+    # the other device notices the epoch change on its next request
+    other_guard = SessionGuard("horas", user_provider, other_session)
+
+    assert other_guard.user() is None
+    assert False == other_guard.check()
+
+
+def test_session_guard_logout_other_devices_before_first_epoch() -> None:
+    user_provider = EpochUserProvider(epoch=None)
+
+    # logged in before the user had an epoch, nothing is stored
+    _, other_session = _logged_in(user_provider)
+    guard, session = _logged_in(user_provider)
+
+    with pytest.raises(AttributeError):
+        session[guard.epoch_name]
+
+    assert SessionGuard("horas", user_provider, other_session).user() is not None
+    assert True == guard.logout_other_devices()
+    assert 1 == session[guard.epoch_name]
+    assert SessionGuard("horas", user_provider, session).user() is not None
+    assert SessionGuard("horas", user_provider, other_session).user() is None
+
+
+def test_session_guard_logout_other_devices_unsupported() -> None:
+    session = SessionStore("auth1", NullSessionHandler())
+    guard = SessionGuard("horas", NoopUserProvider1(), session)
+
+    assert False == guard.logout_other_devices()
+
+    # a provider without auth epochs can not revoke other sessions
+    guard._user = GenericUser({'userid': "harianja", 'password': ""})
+
+    assert False == guard.logout_other_devices()
+
+    with pytest.raises(AttributeError):
+        session[guard.epoch_name]
+
+
+def test_session_guard_logout_other_devices_revokes_recaller() -> None:
+    user_provider = EpochUserProvider()
+
+    other_guard, _ = _logged_in(user_provider, remember=True)
+    other_recaller = other_guard.queued_recaller
+
+    guard, _ = _logged_in(user_provider)
+
+    assert True == guard.logout_other_devices()
+    # this device was not remembered and gets no remember cookie
+    assert guard.queued_recaller is None
+
+    # the other device comes back with only its remember cookie
+    session = SessionStore("auth1", NullSessionHandler(), id="67890")
+    returning_guard = SessionGuard("horas", user_provider, session)
+    returning_guard.set_recaller(other_recaller)
+
+    assert returning_guard.user() is None
+    assert "" == returning_guard.queued_recaller
+
+
+def test_session_guard_logout_other_devices_keeps_own_recaller() -> None:
+    user_provider = EpochUserProvider()
+    guard, _ = _logged_in(user_provider, remember=True)
+    old_recaller = guard.queued_recaller
+
+    assert True == guard.logout_other_devices()
+
+    new_recaller = guard.queued_recaller
+    assert new_recaller and new_recaller != old_recaller
+
+    session = SessionStore("auth1", NullSessionHandler(), id="67890")
+    returning_guard = SessionGuard("horas", user_provider, session)
+    returning_guard.set_recaller(new_recaller)
+
+    assert returning_guard.user() is not None
+
+
+@pytest.mark.asyncio
+async def test_session_guard_async_logout() -> None:
+    user_provider = EpochUserProvider(_async=True)
+
+    other_session = SessionStore("auth1", NullSessionHandler(), id="12345")
+    assert True == await SessionGuard("horas", user_provider, other_session).async_attempt({'username': "harianja"})
+
+    session = SessionStore("auth1", NullSessionHandler(), id="67890")
+    guard = SessionGuard("horas", user_provider, session)
+    assert True == await guard.async_attempt({'username': "harianja"}, remember=True)
+
+    assert True == await guard.async_logout_other_devices()
+    assert await SessionGuard("horas", user_provider, other_session).async_user() is None
+    assert await SessionGuard("horas", user_provider, session).async_user() is not None
+
+    await guard.async_logout()
+
+    assert await guard.async_user() is None
+    # cycled at login, when revoking other devices and at logout
+    assert 3 == len(user_provider.remember_tokens)
+
+
+@pytest.mark.asyncio
+async def test_statefull_guard_default_logout() -> None:
+    class LegacyGuard(StatefullGuard):
+
+        def user(self) -> None:
+            return None
+
+        async def async_user(self) -> None:
+            return None
+
+        def attempt(self, credentials: t.Dict[str, t.Any], remember: bool = False) -> bool:
+            return False
+
+        async def async_attempt(self, credentials: t.Dict[str, t.Any], remember: bool = False) -> bool:
+            return False
+
+    guard = LegacyGuard()
+
+    # without a session there is nothing to end
+    guard.logout()
+    await guard.async_logout()
+
+    session = SessionStore("auth1", NullSessionHandler(), id="12345")
+    session['login'] = "harianja"
+    guard.set_session(session)
+
+    guard.logout()
+
+    assert "12345" != session.id
+
+    with pytest.raises(AttributeError):
+        session['login']
+
+    session['login'] = "harianja"
+    await guard.async_logout()
+
+    with pytest.raises(AttributeError):
+        session['login']
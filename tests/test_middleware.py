@@ -0,0 +1,272 @@
+import typing as t
+import pytest
+
+from auth1 import (
+    AuthManager,
+    AuthenticateMiddleware,
+    ChainGuard,
+    LazyUser,
+    ScopeRequest,
+    SessionGuard,
+    SessionStore,
+    NullSessionHandler,
+    UserProvider,
+    Authenticatable,
+    AuthenticatableRetval,
+    GenericUser
+)
+
+
+class CountingUserProvider(UserProvider):
+
+    retrieve_by_id_called: int = 0
+
+    def retrieve_by_id(self, id: str | int) -> AuthenticatableRetval:
+        self.retrieve_by_id_called += 1
+        return self._async_retrieve(id)
+
+    async def _async_retrieve(self, id: str | int) -> Authenticatable | None:
+        return GenericUser({'userid': id, 'password': "", 'email': "harianja@lundu.com"})
+
+    def retrieve_by_credentials(self, credentials: t.Dict[str, t.Any]) -> AuthenticatableRetval:
+        return None
+
+    def validate_credentials(self, user: Authenticatable, credentials: t.Dict[str, t.Any]) -> bool:
+        return False
+
+
+def _auth_manager(user_provider: UserProvider) -> AuthManager:
+    auth = AuthManager({'defaults': {'guard': "web"}, 'guards': {'web': {'driver': "session"}}})
+
+    @auth.factory("session")
+    def session_guard_factory(name: str) -> SessionGuard:
+        return SessionGuard(name, user_provider)
+
+    return auth
+
+
+def _scope(session: SessionStore, cookie: str = "") -> t.Dict[str, t.Any]:
+    return {
+        'type': "http",
+        'headers': [(b"cookie", cookie.encode()), (b"x-test", b"1")],
+        'query_string': b"a=1&b=2",
+        'client': ("10.0.0.1", 5000),
+        'session': session
+    }
+
+
+async def _receive() -> t.Dict[str, t.Any]:
+    return {'type': "http.request"}
+
+
+def test_scope_request() -> None:
+    session = SessionStore("auth1", NullSessionHandler())
+    request = ScopeRequest(_scope(session, "a=b; remember=xyz"))
+
+    assert "1" == request.headers['x-test']
+    assert {'a': "1", 'b': "2"} == request.query
+    assert {'a': "b", 'remember': "xyz"} == request.cookies
+    assert request.session is session
+
+
+@pytest.mark.asyncio
+async def test_authenticate_middleware_lazy_user() -> None:
+    user_provider = CountingUserProvider()
+    session = SessionStore("auth1", NullSessionHandler())
+    seen: t.Dict[str, t.Any] = {}
+
+    async def app(scope: t.Any, receive: t.Any, send: t.Any) -> None:
+        seen['user'] = scope['user']
+        seen['check'] = scope['user'].check()
+        seen['called_before_read'] = user_provider.retrieve_by_id_called
+        seen['resolved'] = await scope['user'].async_resolve()
+        await send({'type': "http.response.start", 'status': 200, 'headers': []})
+
+    middleware = AuthenticateMiddleware(app, _auth_manager(user_provider))
+
+    sent: t.List[t.Any] = []
+
+    async def send(message: t.Any) -> None:
+        sent.append(message)
+
+    guard = t.cast(SessionGuard, middleware.auth_manager.guard())
+    session[guard.name] = "harianja"
+
+    await middleware(_scope(session), _receive, send)
+
+    assert isinstance(seen['user'], LazyUser)
+    assert True == seen['check']
+    assert 0 == seen['called_before_read']
+    assert "harianja" == seen['resolved'].identifier
+    assert 1 == user_provider.retrieve_by_id_called
+    assert 200 == sent[0]['status']
+
+
+@pytest.mark.asyncio
+async def test_authenticate_middleware_redirect() -> None:
+    user_provider = CountingUserProvider()
+    called: t.List[bool] = []
+
+    async def app(scope: t.Any, receive: t.Any, send: t.Any) -> None:
+        called.append(True)
+
+    middleware = AuthenticateMiddleware(app, _auth_manager(user_provider), redirect_to="/login")
+
+    sent: t.List[t.Any] = []
+
+    async def send(message: t.Any) -> None:
+        sent.append(message)
+
+    await middleware(_scope(SessionStore("auth1", NullSessionHandler())), _receive, send)
+
+    assert [] == called
+    assert 302 == sent[0]['status']
+    assert (b"location", b"/login") in sent[0]['headers']
+    assert 0 == user_provider.retrieve_by_id_called
+
+
+@pytest.mark.asyncio
+async def test_authenticate_middleware_redirects_revoked_session() -> None:
+    called: t.List[bool] = []
+
+    async def app(scope: t.Any, receive: t.Any, send: t.Any) -> None:
+        called.append(True)
+
+    middleware = AuthenticateMiddleware(app, _auth_manager(CountingUserProvider()), redirect_to="/login")
+    guard = t.cast(SessionGuard, middleware.auth_manager.guard())
+
+    # logged in before the user's epoch was bumped on another device
+    session = SessionStore("auth1", NullSessionHandler())
+    session[guard.name] = "harianja"
+    session[guard.epoch_name] = 1
+
+    sent: t.List[t.Any] = []
+
+    async def send(message: t.Any) -> None:
+        sent.append(message)
+
+    await middleware(_scope(session), _receive, send)
+
+    assert [] == called
+    assert 302 == sent[0]['status']
+
+
+@pytest.mark.asyncio
+async def test_authenticate_middleware_clears_invalid_recaller() -> None:
+    middleware = AuthenticateMiddleware(None, _auth_manager(CountingUserProvider()), redirect_to="/login") # type: ignore [arg-type]
+    guard = t.cast(SessionGuard, middleware.auth_manager.guard())
+
+    sent: t.List[t.Any] = []
+
+    async def send(message: t.Any) -> None:
+        sent.append(message)
+
+    await middleware(_scope(SessionStore("auth1", NullSessionHandler()), f"{guard.recaller_name}=garbage"), _receive, send)
+
+    assert 302 == sent[0]['status']
+
+    cookies = [value for key, value in sent[0]['headers'] if key == b"set-cookie"]
+
+    assert 1 == len(cookies)
+    assert cookies[0].startswith(f"{guard.recaller_name}=\"\"".encode())
+    assert b"Max-Age=0" in cookies[0]
+
+
+@pytest.mark.asyncio
+async def test_authenticate_middleware_chain_guard() -> None:
+    auth = AuthManager({
+        'defaults': {'guard': "any"},
+        'guards': {
+            'web': {'driver': "session"},
+            'admin': {'driver': "session"},
+            'any': {'driver': "chain", 'guards': ["web", "admin"]}
+        }
+    })
+
+    created: t.Dict[str, SessionGuard] = {}
+
+    @auth.factory("session")
+    def session_guard_factory(name: str) -> SessionGuard:
+        created[name] = SessionGuard(name, CountingUserProvider())
+        return created[name]
+
+    middleware = AuthenticateMiddleware(None, auth, redirect_to="/login") # type: ignore [arg-type]
+    assert isinstance(auth.guard(), ChainGuard)
+    recaller_name = created['admin'].recaller_name
+
+    sent: t.List[t.Any] = []
+
+    async def send(message: t.Any) -> None:
+        sent.append(message)
+
+    # each member reads and clears its own remember cookie
+    await middleware(_scope(SessionStore("auth1", NullSessionHandler()), f"{recaller_name}=garbage"), _receive, send)
+
+    web, admin = created['web'], created['admin']
+
+    assert web.queued_recaller is None
+    assert "" == admin.queued_recaller
+    assert 302 == sent[0]['status']
+
+    cookies = [value for key, value in sent[0]['headers'] if key == b"set-cookie"]
+
+    assert 1 == len(cookies)
+    assert cookies[0].startswith(f"{admin.recaller_name}=\"\"".encode())
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("redirect_to", [None, "/login"])
+async def test_authenticate_middleware_chain_guard_async_provider(redirect_to: str | None) -> None:
+    auth = AuthManager({
+        'defaults': {'guard': "any"},
+        'guards': {
+            'web': {'driver': "session"},
+            'admin': {'driver': "session"},
+            'any': {'driver': "chain", 'guards': ["admin", "web"]}
+        }
+    })
+    user_provider = CountingUserProvider()
+
+    @auth.factory("session")
+    def session_guard_factory(name: str) -> SessionGuard:
+        return SessionGuard(name, user_provider)
+
+    seen: t.Dict[str, t.Any] = {}
+
+    async def app(scope: t.Any, receive: t.Any, send: t.Any) -> None:
+        seen['check'] = scope['user'].check()
+        seen['async_check'] = await scope['user'].async_check()
+        seen['identifier'] = (await scope['user'].async_resolve()).identifier
+        await send({'type': "http.response.start", 'status': 200, 'headers': []})
+
+    middleware = AuthenticateMiddleware(app, auth, redirect_to=redirect_to)
+
+    session = SessionStore("auth1", NullSessionHandler())
+    session[SessionGuard("web", user_provider).name] = "harianja"
+
+    sent: t.List[t.Any] = []
+
+    async def send(message: t.Any) -> None:
+        sent.append(message)
+
+    await middleware(_scope(session), _receive, send)
+
+    assert 200 == sent[0]['status']
+    assert {'check': True, 'async_check': True, 'identifier': "harianja"} == seen
+
+
+def test_lazy_user() -> None:
+    user_provider = CountingUserProvider()
+    session = SessionStore("auth1", NullSessionHandler())
+    guard = SessionGuard("web", user_provider, session)
+
+    user = LazyUser(guard)
+
+    assert False == user.check()
+    assert False == bool(user)
+    assert "LazyUser(<unresolved>)" == repr(user)
+
+    with pytest.raises(AttributeError):
+        user.email
+
+    assert 0 == user_provider.retrieve_by_id_called
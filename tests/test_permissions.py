@@ -0,0 +1,194 @@
+import typing as t
+import json
+import pytest
+
+from auth1 import (
+    HasPermissions,
+    PermissionRegistry,
+    has_all,
+    has_any,
+    store_permission_mask,
+    load_permission_mask,
+    SessionGuard,
+    SessionStore,
+    NullSessionHandler,
+    UserProvider,
+    Authenticatable,
+    AuthenticatableRetval,
+    GenericUser
+)
+
+
+def test_permission_registry() -> None:
+    registry = PermissionRegistry(["posts.read", "posts.write"])
+
+    assert 2 == len(registry)
+    assert "posts.read" in registry
+
+    assert 0b01 == registry.mask("posts.read")
+    assert 0b11 == registry.mask("posts.read", "posts.write")
+    assert 0b100 == registry.register("posts.delete")
+
+    # registering again keeps the original bit
+    assert 0b01 == registry.register("posts.read")
+
+    assert ["posts.read", "posts.delete"] == registry.names(0b101)
+
+    with pytest.raises(ValueError) as exc_info:
+        registry.mask("unknown")
+
+    assert "Unknown permission `unknown`" == exc_info.value.args[0]
+
+
+def test_permission_registry_roles() -> None:
+    registry = PermissionRegistry(["posts.read", "posts.write", "users.manage"])
+
+    registry.role("editor", "posts.read", "posts.write")
+    registry.role("admin", "posts.read", "posts.write", "users.manage")
+
+    mask = registry.role_mask("editor")
+
+    assert True == registry.has_all(mask, "posts.read", "posts.write")
+    assert False == registry.has_all(mask, "posts.read", "users.manage")
+    assert True == registry.has_any(mask, "users.manage", "posts.write")
+    assert False == registry.has_any(mask, "users.manage")
+
+    with pytest.raises(ValueError) as exc_info:
+        registry.role_mask("owner")
+
+    assert "Unknown role `owner`" == exc_info.value.args[0]
+
+
+def test_has_permissions_user() -> None:
+    registry = PermissionRegistry(["posts.read", "posts.write"])
+
+    user = GenericUser({'userid': "harianja", 'password': "", 'permission_mask': registry.mask("posts.read")})
+
+    assert isinstance(user, HasPermissions)
+    assert isinstance(user, Authenticatable)
+
+    assert True == has_all(user, registry.mask("posts.read"))
+    assert False == has_all(user, registry.mask("posts.read", "posts.write"))
+    assert True == has_any(user, registry.mask("posts.read", "posts.write"))
+
+
+def test_permission_mask_session_storage() -> None:
+    registry = PermissionRegistry(["posts.read", "posts.write"])
+    session = SessionStore("auth1", NullSessionHandler())
+
+    assert load_permission_mask(session, "perms", registry) is None
+
+    store_permission_mask(session, "perms", registry, 0b11)
+
+    # survives the session serializer round trip
+    session._attributes = json.loads(json.dumps(session._attributes))
+
+    assert 0b11 == load_permission_mask(session, "perms", registry)
+
+    # masks from a different registry layout are rejected
+    assert load_permission_mask(session, "perms", PermissionRegistry(["posts.write", "posts.read"])) is None
+
+    # appending a permission keeps the stored mask valid
+    registry.register("posts.delete")
+
+    assert 0b11 == load_permission_mask(session, "perms", registry)
+    assert load_permission_mask(session, "perms", PermissionRegistry(["posts.read"])) is None
+
+
+def test_permission_mask_max_age() -> None:
+    now = [1000.0]
+    registry = PermissionRegistry(["posts.read"], max_age=60, clock=lambda: now[0])
+    session = SessionStore("auth1", NullSessionHandler())
+
+    store_permission_mask(session, "perms", registry, 0b1)
+    now[0] += 59
+
+    assert 0b1 == load_permission_mask(session, "perms", registry)
+
+    now[0] += 1
+
+    assert load_permission_mask(session, "perms", registry) is None
+
+    # masks stored before they carried a timestamp are recomputed
+    session["perms"] = [registry.fingerprint, 0b1]
+
+    assert load_permission_mask(session, "perms", registry) is None
+
+
+class PermissionUserProvider(UserProvider):
+
+    retrieve_by_id_called: int = 0
+
+    def __init__(self, mask: int) -> None:
+        self._mask = mask
+
+    def retrieve_by_id(self, id: str | int) -> AuthenticatableRetval:
+        self.retrieve_by_id_called += 1
+        return self.retrieve_by_credentials({})
+
+    def retrieve_by_credentials(self, credentials: t.Dict[str, t.Any]) -> AuthenticatableRetval:
+        return GenericUser({'userid': "harianja", 'password': "", 'permission_mask': self._mask})
+
+    def validate_credentials(self, user: Authenticatable, credentials: t.Dict[str, t.Any]) -> bool:
+        return True
+
+
+def test_session_guard_permission_mask() -> None:
+    registry = PermissionRegistry(["posts.read", "posts.write"])
+    session = SessionStore("auth1", NullSessionHandler(), id="12345")
+    user_provider = PermissionUserProvider(registry.mask("posts.write"))
+
+    guard = SessionGuard("horas", user_provider, session, permissions=registry)
+
+    assert guard.permission_mask() is None
+    assert True == guard.attempt({'username': "harianja"})
+
+    # a later request reads the mask without a provider lookup
+    guard = SessionGuard("horas", user_provider, session, permissions=registry)
+
+    assert registry.mask("posts.write") == guard.permission_mask()
+    assert 0 == user_provider.retrieve_by_id_called
+
+    assert SessionGuard("horas", user_provider, session).permission_mask() is None
+
+
+def test_session_guard_permission_mask_refreshes_stale_mask() -> None:
+    now = [1000.0]
+    registry = PermissionRegistry(["posts.read", "posts.write"], max_age=60, clock=lambda: now[0])
+    session = SessionStore("auth1", NullSessionHandler(), id="12345")
+    user_provider = PermissionUserProvider(registry.mask("posts.read", "posts.write"))
+
+    assert True == SessionGuard("horas", user_provider, session, permissions=registry).attempt({'username': "harianja"})
+
+    # revoked in the provider, the session still has the old mask for now
+    user_provider._mask = registry.mask("posts.read")
+    now[0] += 30
+
+    assert registry.mask("posts.read", "posts.write") == SessionGuard("horas", user_provider, session, permissions=registry).permission_mask()
+
+    now[0] += 30
+
+    assert registry.mask("posts.read") == SessionGuard("horas", user_provider, session, permissions=registry).permission_mask()
+    assert 1 == user_provider.retrieve_by_id_called
+
+    # stored again, the next request does not hit the provider
+    assert registry.mask("posts.read") == SessionGuard("horas", user_provider, session, permissions=registry).permission_mask()
+    assert 1 == user_provider.retrieve_by_id_called
+
+
+@pytest.mark.asyncio
+async def test_session_guard_async_permission_mask() -> None:
+    now = [1000.0]
+    registry = PermissionRegistry(["posts.read", "posts.write"], max_age=60, clock=lambda: now[0])
+    session = SessionStore("auth1", NullSessionHandler(), id="12345")
+    user_provider = PermissionUserProvider(registry.mask("posts.write"))
+
+    guard = SessionGuard("horas", user_provider, session, permissions=registry)
+
+    assert await guard.async_permission_mask() is None
+    assert True == await guard.async_attempt({'username': "harianja"})
+
+    user_provider._mask = 0
+    now[0] += 60
+
+    assert 0 == await SessionGuard("horas", user_provider, session, permissions=registry).async_permission_mask()
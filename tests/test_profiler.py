@@ -0,0 +1,154 @@
+import cProfile
+import typing as t
+import pytest
+
+from auth1 import (
+    AuthManager,
+    Guard,
+    Instrument,
+    ProfileMiddleware,
+    SessionGuard,
+    SessionStore,
+    SlowRequestProfiler
+)
+
+from ._helpers import NoopUserProvider1, NoopReadSessionHandler
+
+
+class Clock:
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_slow_request_profiler_keeps_slowest() -> None:
+    clock = Clock()
+    profiler = SlowRequestProfiler(capacity=2, clock=clock)
+
+    assert isinstance(profiler, Instrument)
+
+    for label, duration in (("a", 0.1), ("b", 0.5), ("c", 0.2), ("d", 0.05)):
+        with profiler.request(label):
+            with profiler.span("session.read"):
+                clock.now += duration
+
+    assert ["b", "c"] == [entry.label for entry in profiler.slowest()]
+    assert {'session.read': 0.5} == profiler.slowest()[0].phases
+
+    profiler.clear()
+
+    assert [] == profiler.slowest()
+
+
+def test_slow_request_profiler_ignores_spans_outside_requests() -> None:
+    profiler = SlowRequestProfiler()
+
+    with profiler.span("session.read"):
+        pass
+
+    profiler.annotate("guard", "web")
+
+    assert [] == profiler.slowest()
+
+
+def test_slow_request_profiler_phase_breakdown() -> None:
+    profiler = SlowRequestProfiler()
+
+    auth_manager = AuthManager({'defaults': {'guard': "web"}, 'guards': {'web': {'driver': "session"}}}, instrument=profiler)
+
+    @auth_manager.factory("session")
+    def create_guard(name: str) -> Guard:
+        return SessionGuard(name, NoopUserProvider1(), instrument=auth_manager.instrument)
+
+    data = b'{"_token": "abc", "cart": [1, 2, 3, 4, 5, 6, 7, 8, 9]}'
+
+    with profiler.request("GET /"):
+        session = SessionStore("auth1", NoopReadSessionHandler(data), id="12345", instrument=profiler)
+        session.start()
+
+        guard = t.cast(SessionGuard, auth_manager.guard())
+        guard.set_session(session)
+        guard.user()
+
+        session.save()
+
+    entry = profiler.slowest()[0]
+
+    assert "GET /" == entry.label
+    assert "web" == entry.guard
+    assert len(data) == entry.session_bytes
+    assert {'session.read', 'session.decode', 'manager.guard', 'guard.user', 'session.encode', 'session.write'} == set(entry.phases)
+    assert entry.profile is None
+
+
+@pytest.mark.parametrize("mode", ["cprofile", "tracemalloc"])
+def test_slow_request_profiler_snapshot_over_threshold(mode: t.Any) -> None:
+    clock = Clock()
+    profiler = SlowRequestProfiler(threshold=1.0, profile=mode, clock=clock)
+
+    with profiler.request("fast"):
+        clock.now += 0.5
+
+    with profiler.request("slow"):
+        [str(i) for i in range(100)]
+        clock.now += 2.0
+
+    slow, fast = profiler.slowest()
+
+    assert fast.profile is None
+    assert slow.profile
+
+
+def test_slow_request_profiler_failed_start(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = Clock()
+    profiler = SlowRequestProfiler(threshold=1.0, profile="cprofile", clock=clock)
+
+    def enable(self: cProfile.Profile) -> None:
+        raise ValueError("Another profiling tool is already active")
+
+    with monkeypatch.context() as m:
+        m.setattr(cProfile.Profile, "enable", enable)
+
+        # the request is timed without a profile
+        with profiler.request("failed"):
+            clock.now += 2.0
+
+    assert 1 == profiler.failed_profiles
+    assert profiler.span("session.read") is profiler._null_span
+
+    with profiler.request("slow"):
+        clock.now += 3.0
+
+    slow, failed = profiler.slowest()
+
+    assert "failed" == failed.label
+    assert failed.profile is None
+    assert "slow" == slow.label
+    assert slow.profile
+
+
+def test_slow_request_profiler_profile_requires_threshold() -> None:
+    with pytest.raises(ValueError):
+        SlowRequestProfiler(profile="cprofile")
+
+
+@pytest.mark.asyncio
+async def test_profile_middleware() -> None:
+    profiler = SlowRequestProfiler()
+
+    async def app(scope: t.Any, receive: t.Any, send: t.Any) -> None:
+        with profiler.span("guard.user"):
+            pass
+
+    middleware = ProfileMiddleware(app, profiler)
+
+    await middleware({'type': "http", 'method': "GET", 'path': "/dashboard"}, None, None) # type: ignore [arg-type]
+    await middleware({'type': "lifespan"}, None, None) # type: ignore [arg-type]
+
+    entries = profiler.slowest()
+
+    assert ["GET /dashboard"] == [entry.label for entry in entries]
+    assert ["guard.user"] == list(entries[0].phases)
@@ -0,0 +1,165 @@
+import typing as t
+import pytest
+
+from auth1 import (
+    Recaller,
+    SessionGuard,
+    SessionStore,
+    NullSessionHandler,
+    UserProvider,
+    Authenticatable,
+    AuthenticatableRetval,
+    GenericUser
+)
+
+
+class RememberUserProvider(UserProvider):
+
+    def __init__(self, _async: bool = False) -> None:
+        self._async = _async
+        self.user = GenericUser({'userid': "harianja", 'password': "Harianja710433!"})
+        self.selector_lookups: t.List[str] = []
+        self.updated_tokens: t.List[str] = []
+
+    def retrieve_by_id(self, id: str | int) -> AuthenticatableRetval:
+        return None
+
+    def retrieve_by_credentials(self, credentials: t.Dict[str, t.Any]) -> AuthenticatableRetval:
+        return self.user
+
+    def validate_credentials(self, user: Authenticatable, credentials: t.Dict[str, t.Any]) -> bool:
+        return True
+
+    def retrieve_by_remember_selector(self, selector: str) -> AuthenticatableRetval:
+        self.selector_lookups.append(selector)
+
+        user = None
+        if self.user.remember_token and Recaller.selector_of(self.user.remember_token) == selector:
+            user = self.user
+
+        if self._async:
+            return self._async_return(user)
+        return user
+
+    def update_remember_token(self, user: Authenticatable, token: str) -> t.Awaitable[None] | None:
+        self.updated_tokens.append(token)
+        if self._async:
+            return self._async_return(None)
+        return None
+
+    async def _async_return(self, value: t.Any) -> t.Any:
+        return value
+
+
+def test_recaller() -> None:
+    recaller = Recaller.create()
+
+    parsed = Recaller.parse(recaller.value)
+
+    assert parsed is not None
+    assert recaller.selector == parsed.selector
+    assert True == parsed.matches(recaller.stored_token)
+    assert recaller.selector == Recaller.selector_of(recaller.stored_token)
+
+    # the validator itself never ends up in the stored token
+    assert recaller.value.split(":")[1] not in recaller.stored_token
+
+    rotated = recaller.rotate()
+
+    assert recaller.selector == rotated.selector
+    assert False == rotated.matches(recaller.stored_token)
+
+    assert Recaller.parse(None) is None
+    assert Recaller.parse("no-separator") is None
+    assert Recaller.parse(":validator") is None
+    assert False == recaller.matches(None)
+
+
+def _login_with_remember(user_provider: RememberUserProvider) -> str:
+    guard = SessionGuard("horas", user_provider, SessionStore("auth1", NullSessionHandler(), id="12345"))
+
+    assert True == guard.attempt({'username': "harianja"}, remember=True)
+    assert guard.queued_recaller is not None
+
+    return guard.queued_recaller
+
+
+def test_session_guard_remember_login() -> None:
+    user_provider = RememberUserProvider()
+
+    cookie = _login_with_remember(user_provider)
+    recaller = Recaller.parse(cookie)
+
+    assert recaller is not None
+    assert [recaller.stored_token] == user_provider.updated_tokens
+    assert recaller.stored_token == user_provider.user.remember_token
+
+
+def test_session_guard_user_from_recaller() -> None:
+    user_provider = RememberUserProvider()
+    cookie = _login_with_remember(user_provider)
+
+    # a new request with an expired session but a valid recaller
+    session_store = SessionStore("auth1", NullSessionHandler(), id="67890")
+    guard = SessionGuard("horas", user_provider, session_store)
+    guard.set_recaller(cookie)
+
+    user = guard.user()
+
+    assert user is user_provider.user
+    assert "harianja" == session_store[guard.name]
+    assert "67890" != session_store.id
+
+    # the validator is rotated on use, the selector stays indexed
+    rotated = guard.queued_recaller
+
+    assert rotated is not None
+    assert rotated != cookie
+    assert Recaller.parse(rotated).selector == Recaller.parse(cookie).selector # type: ignore [union-attr]
+    assert 2 == len(user_provider.updated_tokens)
+
+    # the old cookie can not be replayed
+    guard = SessionGuard("horas", user_provider, SessionStore("auth1", NullSessionHandler(), id="67890"))
+    guard.set_recaller(cookie)
+
+    assert guard.user() is None
+    assert "" == guard.queued_recaller
+
+
+def test_session_guard_user_from_invalid_recaller() -> None:
+    user_provider = RememberUserProvider()
+
+    guard = SessionGuard("horas", user_provider, SessionStore("auth1", NullSessionHandler(), id="67890"))
+    guard.set_recaller("garbage")
+
+    assert guard.user() is None
+    assert "" == guard.queued_recaller
+    assert [] == user_provider.selector_lookups
+
+
+@pytest.mark.asyncio
+async def test_session_guard_async_user_from_recaller() -> None:
+    user_provider = RememberUserProvider(_async=True)
+
+    guard = SessionGuard("horas", user_provider, SessionStore("auth1", NullSessionHandler(), id="12345"))
+    assert True == await guard.async_attempt({'username': "harianja"}, remember=True)
+
+    cookie = guard.queued_recaller
+
+    session_store = SessionStore("auth1", NullSessionHandler(), id="67890")
+    guard = SessionGuard("horas", user_provider, session_store)
+    guard.set_recaller(cookie)
+
+    user = await guard.async_user()
+
+    assert user is user_provider.user
+    assert "harianja" == session_store[guard.name]
+    assert guard.queued_recaller not in (None, "", cookie)
+
+    guard = SessionGuard("horas", user_provider, SessionStore("auth1", NullSessionHandler(), id="67890"))
+    guard.set_recaller(cookie)
+
+    with pytest.raises(ValueError) as exc_info:
+        guard.user()
+
+    assert "Cannot use awaitable return value from user provider" == exc_info.value.args[0]
@@ -0,0 +1,243 @@
+import asyncio
+import typing as t
+import pytest
+
+from auth1 import (
+    CircuitBreaker,
+    ResilientSessionHandler,
+    SessionHandler,
+    SessionUnavailableError
+)
+from auth1._cache import TTLCache
+
+
+class AsyncHandler(SessionHandler):
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.data: t.Dict[str, bytes] = {}
+        self.latency = latency
+        self.fail = False
+        self.reads = 0
+
+    async def read(self, id: str) -> bytes:
+        self.reads += 1
+        await self._wait()
+        return self.data.get(id, b"")
+
+    async def write(self, id: str, data: bytes) -> None:
+        await self._wait()
+        self.data[id] = data
+
+    async def destroy(self, id: str) -> None:
+        await self._wait()
+        self.data.pop(id, None)
+
+    async def _wait(self) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if self.fail:
+            raise OSError("backend down")
+
+
+def test_circuit_breaker() -> None:
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+
+    assert breaker.allow()
+    breaker.record_failure()
+    assert "closed" == breaker.state
+    breaker.record_failure()
+    assert "open" == breaker.state
+    assert not breaker.allow()
+
+    now[0] = 10.0
+
+    assert "half_open" == breaker.state
+    # a single trial call at a time
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_failure()
+    assert "open" == breaker.state
+
+    now[0] = 20.0
+
+    assert breaker.allow()
+    breaker.record_success()
+
+    assert "closed" == breaker.state
+    assert (2, 2) == (breaker.stats().opened, breaker.stats().rejected)
+
+
+@pytest.mark.asyncio
+async def test_resilient_handler_passes_through() -> None:
+    backend = AsyncHandler()
+    handler = ResilientSessionHandler(backend)
+
+    await handler.write("a", b"data")
+
+    assert b"data" == await handler.read("a")
+
+    await handler.destroy("a")
+
+    assert b"" == await handler.read("a")
+    assert 4 == handler.stats().calls
+
+
+@pytest.mark.asyncio
+async def test_resilient_handler_timeout_opens_breaker() -> None:
+    backend = AsyncHandler(latency=0.05)
+    handler = ResilientSessionHandler(backend, timeout=0.005, breaker=CircuitBreaker(failure_threshold=2))
+
+    for _ in range(2):
+        with pytest.raises(SessionUnavailableError):
+            await handler.read("a")
+
+    reads = backend.reads
+
+    # fails fast without waiting on the backend
+    with pytest.raises(SessionUnavailableError):
+        await handler.read("a")
+
+    assert reads == backend.reads
+
+    stats = handler.stats()
+
+    assert "open" == stats.breaker.state
+    assert 2 == stats.timeouts
+    assert 1 == stats.breaker.rejected
+
+
+@pytest.mark.asyncio
+async def test_resilient_handler_falls_back_to_cache() -> None:
+    backend = AsyncHandler()
+    handler = ResilientSessionHandler(backend, fallback=TTLCache(ttl=60))
+
+    await handler.write("a", b"data")
+
+    backend.fail = True
+
+    assert b"data" == await handler.read("a")
+
+    with pytest.raises(SessionUnavailableError):
+        await handler.read("b")
+
+    with pytest.raises(SessionUnavailableError):
+        await handler.write("a", b"other")
+
+    # the latest write is still served
+    assert b"other" == await handler.read("a")
+    assert 2 == handler.stats().fallbacks
+    assert 4 == handler.stats().failures
+
+
+@pytest.mark.asyncio
+async def test_resilient_handler_hedges_slow_reads() -> None:
+    backend = AsyncHandler()
+    replica = AsyncHandler()
+    backend.data["a"] = replica.data["a"] = b"data"
+
+    handler = ResilientSessionHandler(backend, replica=replica, hedge_min_delay=0.001)
+
+    assert handler.hedge_delay is None
+
+    for _ in range(32):
+        assert b"data" == await handler.read("a")
+
+    assert handler.hedge_delay is not None
+    assert 0 == handler.stats().hedged
+
+    backend.latency = 0.2
+
+    assert b"data" == await handler.read("a")
+
+    stats = handler.stats()
+
+    assert 1 == stats.hedged
+    assert 1 == stats.hedge_wins
+    assert 1 / 33 == stats.hedge_rate
+
+    # the primary still answers when the replica fails
+    backend.latency = 0.01
+    replica.fail = True
+
+    assert b"data" == await handler.read("a")
+
+
+@pytest.mark.asyncio
+async def test_resilient_handler_hedge_never_wins_with_empty_read() -> None:
+    backend = AsyncHandler()
+    replica = AsyncHandler()
+    backend.data["a"] = replica.data["a"] = b"data"
+
+    handler = ResilientSessionHandler(backend, replica=replica, hedge_min_delay=0.001)
+
+    for _ in range(32):
+        await handler.read("a")
+
+    # just written, the replica has not caught up yet
+    backend.data["b"] = b"fresh"
+    backend.latency = 0.05
+
+    assert b"fresh" == await handler.read("b")
+
+    stats = handler.stats()
+
+    assert 1 == stats.hedged
+    assert 0 == stats.hedge_wins
+
+    # an empty replica answer does not hide a failed primary either
+    backend.fail = True
+
+    with pytest.raises(SessionUnavailableError):
+        await handler.read("b")
+
+
+@pytest.mark.asyncio
+async def test_resilient_handler_cancelled_trial_releases_breaker() -> None:
+    now = [0.0]
+    backend = AsyncHandler()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    handler = ResilientSessionHandler(backend, breaker=breaker)
+
+    backend.fail = True
+
+    with pytest.raises(SessionUnavailableError):
+        await handler.read("a")
+
+    backend.fail = False
+    backend.latency = 0.05
+    now[0] = 10.0
+
+    # the half-open trial is cancelled, e.g. the client went away
+    task = asyncio.ensure_future(handler.read("a"))
+    await asyncio.sleep(0.01)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    backend.latency = 0.0
+    now[0] = 100.0
+
+    assert b"" == await handler.read("a")
+    assert "closed" == breaker.state
+
+
+@pytest.mark.asyncio
+async def test_resilient_handler_empty_read_clears_fallback() -> None:
+    backend = AsyncHandler()
+    handler = ResilientSessionHandler(backend, fallback=TTLCache(ttl=60))
+
+    await handler.write("a", b"data")
+
+    # logged out by another process
+    del backend.data["a"]
+
+    assert b"" == await handler.read("a")
+
+    backend.fail = True
+
+    with pytest.raises(SessionUnavailableError):
+        await handler.read("a")
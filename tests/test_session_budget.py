@@ -0,0 +1,132 @@
+import json
+import pytest
+
+from auth1 import (
+    NullSessionHandler,
+    SessionBudget,
+    SessionManager,
+    SessionStore,
+    SessionTooLargeError
+)
+
+from ._helpers import NoopSaveSessionHandler
+
+
+def _session(budget: SessionBudget, handler: NoopSaveSessionHandler | None = None) -> SessionStore:
+    session = SessionStore("auth1", handler or NoopSaveSessionHandler(), id="12345", budget=budget)
+    session['_token'] = "abc"
+    return session
+
+
+def test_session_budget_soft_limit() -> None:
+    budget = SessionBudget(soft_limit=40, hard_limit=1000)
+    session = _session(budget)
+
+    session.save()
+
+    session['cart'] = list(range(20))
+    session.save()
+
+    stats = budget.stats()
+
+    assert 2 == stats.saves
+    assert 1 == stats.near_budget
+    assert 0 == stats.over_budget
+
+
+def test_session_budget_hard_limit_rejects() -> None:
+    budget = SessionBudget(hard_limit=40)
+    handler = NoopSaveSessionHandler()
+    session = _session(budget, handler)
+
+    session['cart'] = list(range(20))
+
+    with pytest.raises(SessionTooLargeError) as exc_info:
+        session.save()
+
+    assert 40 == exc_info.value.limit
+    assert exc_info.value.size > 40
+    assert handler.saved_data == b""
+
+    stats = budget.stats()
+
+    assert 1 == stats.over_budget
+    assert 1 == stats.rejected
+
+
+def test_session_budget_hard_limit_drops_flagged_keys() -> None:
+    budget = SessionBudget(hard_limit=60, policy="drop", droppable=["recent", "cart"])
+    handler = NoopSaveSessionHandler()
+    session = _session(budget, handler)
+
+    session['cart'] = list(range(5))
+    session['recent'] = list(range(20))
+    session.save()
+
+    # dropping `recent` was enough, `cart` stays
+    assert {'_token': "abc", 'cart': [0, 1, 2, 3, 4]} == json.loads(handler.saved_data)
+
+    with pytest.raises(AttributeError):
+        session['recent']
+
+    session['profile'] = "x" * 100
+
+    with pytest.raises(SessionTooLargeError):
+        session.save()
+
+    stats = budget.stats()
+
+    assert 2 == stats.over_budget
+    assert 1 == stats.rejected
+    assert 2 == stats.dropped_keys
+
+
+def test_session_budget_invalid() -> None:
+    with pytest.raises(ValueError):
+        SessionBudget(policy="truncate") # type: ignore [arg-type]
+
+    with pytest.raises(ValueError):
+        SessionBudget(soft_limit=100, hard_limit=10)
+
+
+def test_session_key_sizes() -> None:
+    session = SessionStore("auth1", NullSessionHandler())
+    session['small'] = 1
+    session['large'] = list(range(50))
+
+    sizes = session.key_sizes()
+
+    assert ["large", "small"] == list(sizes)
+    assert sizes['large'] > sizes['small']
+
+
+def test_session_manager_budget() -> None:
+    session_manager = SessionManager({'budget': {'soft_limit': 10, 'hard_limit': 100, 'policy': "drop", 'droppable': ["cart"]}})
+
+    @session_manager.handler_factory("null")
+    def create_handler() -> NullSessionHandler:
+        return NullSessionHandler()
+
+    first = session_manager.create("null")
+    second = session_manager.create("null")
+
+    assert first.budget is second.budget
+    assert first.budget is session_manager.budget
+    assert "drop" == session_manager.budget.policy
+    assert ("cart",) == session_manager.budget.droppable
+
+
+@pytest.mark.asyncio
+async def test_session_budget_async_save() -> None:
+    budget = SessionBudget(hard_limit=40)
+    handler = NoopSaveSessionHandler(_async=True)
+    session = _session(budget, handler)
+
+    await session.async_save()
+
+    session['cart'] = list(range(20))
+
+    with pytest.raises(SessionTooLargeError):
+        await session.async_save()
+
+    assert 1 == budget.stats().rejected
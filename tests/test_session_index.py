@@ -0,0 +1,237 @@
+import hashlib
+import time
+import typing as t
+import pytest
+
+from auth1 import (
+    SessionGuard,
+    SessionStore,
+    SessionIndex,
+    SessionInfo,
+    SessionManager,
+    InMemorySessionIndex,
+    NullSessionHandler,
+    GenericUser
+)
+
+from ._helpers import NoopSessionHandler, NoopUserProvider1
+
+
+class Clock:
+
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class UserProvider(NoopUserProvider1):
+
+    def retrieve_by_credentials(self, credentials: t.Dict[str, t.Any]) -> GenericUser:
+        return GenericUser({'userid': credentials['username'], 'password': ""})
+
+    def validate_credentials(self, user: t.Any, credentials: t.Dict[str, t.Any]) -> bool:
+        return True
+
+
+def _login(index: SessionIndex, username: str, user_agent: str | None = None, clock: t.Callable[[], float] = time.time) -> SessionStore:
+    session = SessionStore("auth1", NullSessionHandler(), id="12345", index=index, clock=clock)
+    guard = SessionGuard("horas", UserProvider(), session)
+    guard.set_user_agent(user_agent)
+    assert True == guard.attempt({'username': username})
+    return session
+
+
+def test_in_memory_session_index() -> None:
+    clock = Clock()
+    index = InMemorySessionIndex(max_age=100, clock=clock)
+
+    assert isinstance(index, SessionIndex)
+
+    index.add(SessionInfo("a", "harianja", 1000.0))
+    index.add(SessionInfo("b", "harianja", 1010.0))
+    index.add(SessionInfo("c", "sitompul", 1000.0))
+
+    assert ["b", "a"] == [info.session_id for info in index.sessions("harianja")]
+
+    index.rename("a", "d")
+    index.touch("d", 1020.0)
+
+    assert ["d", "b"] == [info.session_id for info in index.sessions("harianja")]
+
+    index.remove("d")
+    index.rename("unknown", "e")
+    index.touch("unknown", 1020.0)
+
+    assert ["b"] == [info.session_id for info in index.sessions("harianja")]
+
+    # stale entries are pruned on lookup
+    clock.now = 1115.0
+
+    assert [] == index.sessions("harianja")
+    assert 1 == len(index)
+
+
+def test_in_memory_session_index_prunes_every_user() -> None:
+    clock = Clock()
+    index = InMemorySessionIndex(max_age=100, clock=clock)
+
+    clock.now = 1000.0
+
+    for i in range(50):
+        index.add(SessionInfo(f"s{i}", f"user{i}", 1000.0))
+
+    index.touch("s0", 1050.0)
+
+    # nobody lists their sessions, new logins still drop the expired ones
+    clock.now = 1120.0
+    index.add(SessionInfo("new", "someone", 1120.0))
+
+    assert 2 == len(index)
+
+    # touches leave outdated entries behind, they do not pile up
+    for i in range(1000):
+        index.touch("new", 1120.0 + i)
+
+    assert len(index._expiry) < 200
+
+
+def test_session_guard_login_tracks_session() -> None:
+    index = InMemorySessionIndex()
+
+    first = _login(index, "harianja", "Mozilla/5.0")
+    second = _login(index, "harianja")
+
+    sessions = first.user_sessions("harianja")
+
+    assert {first.id, second.id} == {info.session_id for info in sessions}
+    user_agent_hash = hashlib.sha1(b"Mozilla/5.0").hexdigest()[:16]
+
+    assert {None, user_agent_hash} == {info.user_agent_hash for info in sessions}
+    assert all(info.user_id == "harianja" for info in sessions)
+    assert [] == first.user_sessions("sitompul")
+
+
+def test_session_store_migrate_keeps_index_current() -> None:
+    index = InMemorySessionIndex()
+    session = _login(index, "harianja")
+
+    old_id = session.id
+    session.migrate(True)
+
+    assert [session.id] == [info.session_id for info in index.sessions("harianja")]
+    assert old_id != session.id
+
+    # logging out flushes the session, the entry goes with it
+    session.invalidate()
+
+    assert [] == index.sessions("harianja")
+
+
+def test_session_store_save_touches_last_seen() -> None:
+    clock = Clock()
+    index = InMemorySessionIndex(clock=clock)
+    session = _login(index, "harianja", clock=clock)
+
+    clock.now = 1030.0
+    session.save()
+
+    assert 1000.0 == index.sessions("harianja")[0].last_seen
+
+    clock.now = 1061.0
+    session.save()
+
+    assert 1061.0 == index.sessions("harianja")[0].last_seen
+
+
+def test_session_store_destroy_session() -> None:
+    index = InMemorySessionIndex()
+
+    current = _login(index, "harianja")
+    other = _login(index, "harianja")
+    stranger = _login(index, "sitompul")
+
+    handler = NoopSessionHandler()
+    current._handler = handler
+
+    assert False == current.destroy_session("harianja", t.cast(str, stranger.id))
+    assert False == handler.destroyed
+
+    assert True == current.destroy_session("harianja", t.cast(str, other.id))
+    assert True == handler.destroyed
+    assert [current.id] == [info.session_id for info in current.user_sessions("harianja")]
+
+    # destroying the own session logs this device out instead of leaving
+    # a session that is saved again but no longer listed
+    current_id = current.id
+    current["login"] = "harianja"
+
+    assert True == current.destroy_session("harianja", t.cast(str, current_id))
+    assert current_id != current.id
+    assert [] == current.user_sessions("harianja")
+
+    with pytest.raises(AttributeError):
+        current["login"]
+
+
+@pytest.mark.asyncio
+async def test_session_store_async_destroy_own_session() -> None:
+    index = InMemorySessionIndex()
+    current = _login(index, "harianja")
+    current_id = current.id
+
+    assert True == await current.async_destroy_session("harianja", t.cast(str, current_id))
+    assert current_id != current.id
+    assert [] == await current.async_user_sessions("harianja")
+
+
+def test_session_store_without_index() -> None:
+    session = SessionStore("auth1", NullSessionHandler(), id="12345")
+
+    session.track("harianja")
+
+    assert session.index is None
+    assert [] == session.user_sessions("harianja")
+    assert False == session.destroy_session("harianja", "12345")
+
+
+def test_session_manager_shares_index() -> None:
+    session_manager = SessionManager({'index': "memory"})
+
+    @session_manager.handler_factory("default")
+    def create_handler() -> NullSessionHandler:
+        return NullSessionHandler()
+
+    @session_manager.index_factory("memory")
+    def create_index() -> InMemorySessionIndex:
+        return InMemorySessionIndex()
+
+    first = session_manager.create("default")
+    second = session_manager.create("default")
+
+    assert isinstance(first.index, InMemorySessionIndex)
+    assert first.index is second.index
+
+
+@pytest.mark.asyncio
+async def test_session_guard_async_login_tracks_session() -> None:
+    index = InMemorySessionIndex()
+
+    session = SessionStore("auth1", NoopSessionHandler(_async=True), id="12345", index=index)
+    guard = SessionGuard("horas", UserProvider(), session)
+
+    assert True == await guard.async_attempt({'username': "harianja"})
+
+    sessions = await session.async_user_sessions("harianja")
+
+    assert [session.id] == [info.session_id for info in sessions]
+
+    old_id = session.id
+    await session.async_migrate(True)
+
+    assert [session.id] == [info.session_id for info in index.sessions("harianja")]
+    assert old_id != session.id
+
+    assert True == await session.async_destroy_session("harianja", t.cast(str, session.id))
+    assert [] == await session.async_user_sessions("harianja")
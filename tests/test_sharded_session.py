@@ -0,0 +1,175 @@
+import typing as t
+import pytest
+
+from auth1 import (
+    HashRing,
+    SessionHandler,
+    ShardedSessionHandler
+)
+
+
+class MemoryHandler(SessionHandler):
+
+    def __init__(self, _async: bool = False) -> None:
+        self.data: t.Dict[str, bytes] = {}
+        self._async = _async
+
+    def read(self, id: str) -> t.Awaitable[bytes] | bytes:
+        return self._return(self.data.get(id, b""))
+
+    def write(self, id: str, data: bytes) -> t.Awaitable[None] | None:
+        self.data[id] = data
+        return self._return(None)
+
+    def destroy(self, id: str) -> t.Awaitable[None] | None:
+        self.data.pop(id, None)
+        return self._return(None)
+
+    def _return(self, value: t.Any) -> t.Any:
+        if self._async:
+            return self._async_return(value)
+        return value
+
+    async def _async_return(self, value: t.Any) -> t.Any:
+        return value
+
+
+_IDS = [f"session-{i}" for i in range(3000)]
+
+
+def test_hash_ring_distribution() -> None:
+    ring = HashRing(["a", "b", "c"])
+
+    counts = {node: 0 for node in ring.nodes}
+
+    for id in _IDS:
+        counts[ring.node_for(id)] += 1
+
+    assert all(800 < count < 1200 for count in counts.values())
+
+    with pytest.raises(LookupError):
+        HashRing().node_for("x")
+
+
+def test_hash_ring_moves_proportional_fraction() -> None:
+    ring = HashRing(["a", "b", "c"])
+    grown = ring.with_node("d")
+
+    moved = [id for id in _IDS if ring.node_for(id) != grown.node_for(id)]
+
+    # about a quarter, and only ever onto the new node
+    assert 0.15 < len(moved) / len(_IDS) < 0.35
+    assert {"d"} == {grown.node_for(id) for id in moved}
+
+    shrunk = ring.without_node("b")
+
+    assert all(shrunk.node_for(id) == ring.node_for(id) for id in _IDS if ring.node_for(id) != "b")
+
+
+def test_sharded_session_handler_routes_by_id() -> None:
+    shards = {'a': MemoryHandler(), 'b': MemoryHandler()}
+    handler = ShardedSessionHandler(shards)
+
+    for id in _IDS[:100]:
+        handler.write(id, id.encode())
+
+    assert 100 == len(shards['a'].data) + len(shards['b'].data)
+    assert all(id in shards[handler.shard_for(id)].data for id in _IDS[:100])
+    assert all(id.encode() == handler.read(id) for id in _IDS[:100])
+
+    handler.destroy(_IDS[0])
+
+    assert b"" == handler.read(_IDS[0])
+
+
+def test_sharded_session_handler_dual_read_on_add() -> None:
+    handler = ShardedSessionHandler({'a': MemoryHandler(), 'b': MemoryHandler()})
+
+    for id in _IDS[:200]:
+        handler.write(id, id.encode())
+
+    new_shard = MemoryHandler()
+    handler.add_shard("c", new_shard)
+
+    assert handler.rebalancing
+    moved = [id for id in _IDS[:200] if handler.shard_for(id) == "c"]
+    assert moved
+
+    # still readable from the old shard, written to the new one on save
+    assert all(id.encode() == handler.read(id) for id in _IDS[:200])
+
+    handler.write(moved[0], b"updated")
+
+    assert b"updated" == new_shard.data[moved[0]]
+
+    handler.destroy(moved[1])
+
+    assert b"" == handler.read(moved[1])
+
+    handler.finish_rebalance()
+
+    assert not handler.rebalancing
+    assert b"" == handler.read(moved[2])
+
+
+def test_sharded_session_handler_remove_shard() -> None:
+    shards = {'a': MemoryHandler(), 'b': MemoryHandler(), 'c': MemoryHandler()}
+    handler = ShardedSessionHandler(shards)
+
+    for id in _IDS[:200]:
+        handler.write(id, id.encode())
+
+    removed = handler.remove_shard("b")
+
+    assert removed is shards['b']
+    assert all(id.encode() == handler.read(id) for id in _IDS[:200])
+
+    with pytest.raises(ValueError):
+        handler.remove_shard("b")
+
+    # sessions still on the first ring would become unreachable
+    with pytest.raises(RuntimeError):
+        handler.remove_shard("c")
+
+    with pytest.raises(RuntimeError):
+        handler.add_shard("d", MemoryHandler())
+
+    handler.finish_rebalance()
+    handler.remove_shard("c", dual_read=False)
+
+    assert not handler.rebalancing
+
+    with pytest.raises(ValueError):
+        handler.remove_shard("a")
+
+
+def test_sharded_session_handler_rebalance_window_expires() -> None:
+    now = [0.0]
+    handler = ShardedSessionHandler({'a': MemoryHandler()}, rebalance_seconds=60, clock=lambda: now[0])
+
+    handler.add_shard("b", MemoryHandler())
+
+    assert handler.rebalancing
+
+    now[0] = 61.0
+
+    assert not handler.rebalancing
+
+
+@pytest.mark.asyncio
+async def test_sharded_session_handler_async() -> None:
+    handler = ShardedSessionHandler({'a': MemoryHandler(_async=True), 'b': MemoryHandler(_async=True)})
+
+    for id in _IDS[:100]:
+        await t.cast(t.Awaitable[None], handler.write(id, id.encode()))
+
+    handler.add_shard("c", MemoryHandler(_async=True))
+
+    moved = [id for id in _IDS[:100] if handler.shard_for(id) == "c"]
+
+    for id in _IDS[:100]:
+        assert id.encode() == await t.cast(t.Awaitable[bytes], handler.read(id))
+
+    await t.cast(t.Awaitable[None], handler.destroy(moved[0]))
+
+    assert b"" == await t.cast(t.Awaitable[bytes], handler.read(moved[0]))
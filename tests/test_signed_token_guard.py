@@ -0,0 +1,185 @@
+import typing as t
+import base64
+import json
+import pytest
+
+from auth1 import (
+    Guard,
+    SignedTokenGuard,
+    SignedTokenCodec,
+    InvalidTokenError,
+    TokenUser,
+    UserProvider,
+    Authenticatable,
+    AuthenticatableRetval,
+    GenericUser
+)
+
+from ._helpers import FakeRequest
+
+
+class FakeClock:
+
+    def __init__(self) -> None:
+        self.now = 1700000000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingUserProvider(UserProvider):
+
+    retrieve_by_id_called: int = 0
+
+    def __init__(self, _async: bool = False) -> None:
+        self._async = _async
+
+    def retrieve_by_id(self, id: str | int) -> AuthenticatableRetval:
+        self.retrieve_by_id_called += 1
+        user = GenericUser({'userid': id, 'password': "", 'email': "harianja@lundu.com"})
+        if self._async:
+            return self._async_return(user)
+        return user
+
+    async def _async_return(self, user: Authenticatable) -> Authenticatable:
+        return user
+
+    def retrieve_by_credentials(self, credentials: t.Dict[str, t.Any]) -> AuthenticatableRetval:
+        return None
+
+    def validate_credentials(self, user: Authenticatable, credentials: t.Dict[str, t.Any]) -> bool:
+        return False
+
+
+def _bearer(token: str) -> FakeRequest:
+    return FakeRequest(headers={'authorization': f"Bearer {token}"})
+
+
+def test_signed_token_codec() -> None:
+    clock = FakeClock()
+    codec = SignedTokenCodec({'k1': "secret1", 'k2': b"secret2"}, clock=clock)
+
+    token = codec.encode("harianja", 60, scopes=["read", "write"], claims={'tenant': "lundu"})
+
+    header = json.loads(base64.urlsafe_b64decode(token.split(".")[0] + "=="))
+    assert {'alg': "HS256", 'typ': "JWT", 'kid': "k1"} == header
+
+    claims = codec.decode(token)
+
+    assert "harianja" == claims['sub']
+    assert "read write" == claims['scope']
+    assert "lundu" == claims['tenant']
+    assert clock.now + 60 == claims['exp']
+
+    # tokens signed with another known key verify as well
+    assert "harianja" == codec.decode(codec.encode("harianja", 60, kid="k2"))['sub']
+
+    clock.now += 61
+
+    with pytest.raises(InvalidTokenError) as exc_info:
+        codec.decode(token)
+
+    assert "Token has expired" == exc_info.value.args[0]
+
+
+def test_signed_token_codec_rejects_tampering() -> None:
+    codec = SignedTokenCodec({'k1': "secret1"})
+    other = SignedTokenCodec({'k1': "other"})
+
+    header, payload, signature = codec.encode("harianja", 60).split(".")
+    forged_payload = base64.urlsafe_b64encode(json.dumps({'sub': "admin", 'exp': 2 ** 40}).encode()).rstrip(b"=").decode()
+
+    for token, message in [
+        (f"{header}.{forged_payload}.{signature}", "Token signature mismatch"),
+        (other.encode("harianja", 60), "Token signature mismatch"),
+        ("a.b", "Token must have three segments"),
+        (SignedTokenCodec({'unknown': "secret1"}).encode("harianja", 60), "Unknown key id `unknown`"),
+    ]:
+        with pytest.raises(InvalidTokenError) as exc_info:
+            codec.decode(token)
+        assert message == exc_info.value.args[0]
+
+    none_header = base64.urlsafe_b64encode(b'{"alg":"none"}').rstrip(b"=").decode()
+
+    with pytest.raises(InvalidTokenError) as exc_info:
+        codec.decode(f"{none_header}.{payload}.")
+
+    assert "Unsupported token algorithm `none`" == exc_info.value.args[0]
+
+    for forged_header in [b'{"alg":"HS256","kid":["k1"]}', b'{"alg":{"a":1},"kid":"k1"}', b'{"alg":"HS256","kid":1}']:
+        segment = base64.urlsafe_b64encode(forged_header).rstrip(b"=").decode()
+
+        with pytest.raises(InvalidTokenError) as exc_info:
+            codec.decode(f"{segment}.{payload}.{signature}")
+
+        assert "Malformed token header" == exc_info.value.args[0]
+
+
+def test_signed_token_codec_invalid_keys() -> None:
+    with pytest.raises(ValueError) as exc_info:
+        SignedTokenCodec({})
+
+    assert "At least one signing key is required" == exc_info.value.args[0]
+
+    with pytest.raises(ValueError) as exc_info:
+        SignedTokenCodec({'k1': "secret"}, default_kid="k2")
+
+    assert "Unknown default key id `k2`" == exc_info.value.args[0]
+
+
+def test_signed_token_guard_user() -> None:
+    codec = SignedTokenCodec({'k1': "secret1"})
+    user_provider = CountingUserProvider()
+
+    guard = SignedTokenGuard("internal", codec, user_provider, _bearer(codec.encode("harianja", 60, scopes=["read"])))
+
+    assert isinstance(guard, Guard)
+
+    user = guard.user()
+
+    assert isinstance(user, TokenUser)
+    assert isinstance(user, Authenticatable)
+    assert "harianja" == user.identifier
+    assert True == user.has_scope("read")
+    assert False == user.has_scope("write")
+    assert guard.user() is user
+
+    # claims alone never reach the provider
+    assert 0 == user_provider.retrieve_by_id_called
+
+    full_user = guard.full_user()
+
+    assert full_user is not None
+    assert "harianja@lundu.com" == full_user.email
+    assert guard.full_user() is full_user
+    assert 1 == user_provider.retrieve_by_id_called
+
+    guard.set_request(_bearer("not.a.token"))
+    assert guard.user() is None
+    assert guard.full_user() is None
+
+    list_kid = base64.urlsafe_b64encode(b'{"alg":"HS256","kid":["k1"]}').rstrip(b"=").decode()
+    guard.set_request(_bearer(f"{list_kid}.e30.c2ln"))
+    assert guard.user() is None
+
+    guard.set_request(FakeRequest())
+    assert guard.user() is None
+
+
+@pytest.mark.asyncio
+async def test_signed_token_guard_async_user() -> None:
+    codec = SignedTokenCodec({'k1': "secret1"})
+    user_provider = CountingUserProvider(_async=True)
+
+    guard = SignedTokenGuard("internal", codec, user_provider, _bearer(codec.encode("harianja", 60)))
+
+    user = await guard.async_user()
+
+    assert user is not None
+    assert "harianja" == user.identifier
+
+    full_user = await guard.async_full_user()
+
+    assert full_user is not None
+    assert "harianja" == full_user.identifier
+    assert 1 == user_provider.retrieve_by_id_called
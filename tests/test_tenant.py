@@ -0,0 +1,181 @@
+import typing as t
+import pytest
+
+from auth1 import (
+    AuthManager,
+    Guard,
+    Request,
+    SessionGuard,
+    TenantAuthManager,
+    TenantMiddleware
+)
+
+from ._helpers import NoopUserProvider1
+
+
+class Clock:
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Tenants:
+
+    def __init__(self) -> None:
+        self.built: t.List[str] = []
+        self.closed: t.List[str] = []
+
+    def __call__(self, tenant_id: str) -> AuthManager:
+        self.built.append(tenant_id)
+
+        auth = AuthManager({'defaults': {'guard': tenant_id}, 'guards': {tenant_id: {'driver': "session"}}})
+
+        @auth.factory("session")
+        def create_guard(name: str) -> Guard:
+            return SessionGuard(name, NoopUserProvider1())
+
+        @auth.on_close
+        def close() -> None:
+            self.closed.append(tenant_id)
+
+        return auth
+
+
+def _resolve(request: Request) -> str | None:
+    return request.headers.get("x-tenant", None)
+
+
+def test_tenant_auth_manager_builds_on_first_use() -> None:
+    tenants = Tenants()
+    manager = TenantAuthManager(tenants, _resolve)
+
+    assert 0 == len(manager)
+
+    first = manager.tenant("acme")
+
+    assert first is manager.tenant("acme")
+    assert ["acme"] == tenants.built
+    assert "acme" in manager
+
+
+def test_tenant_auth_manager_lru_eviction() -> None:
+    tenants = Tenants()
+    manager = TenantAuthManager(tenants, _resolve, max_tenants=2)
+
+    manager.tenant("a")
+    manager.tenant("b")
+    manager.tenant("a")
+    manager.tenant("c")
+
+    assert ["b"] == tenants.closed
+    assert "a" in manager and "c" in manager and "b" not in manager
+
+    assert True == manager.evict("a")
+    assert False == manager.evict("a")
+    assert ["b", "a"] == tenants.closed
+
+
+def test_tenant_auth_manager_defers_close_of_active_tenant() -> None:
+    tenants = Tenants()
+    manager = TenantAuthManager(tenants, _resolve, max_tenants=1)
+
+    with manager.activate("a") as auth:
+        manager.tenant("b")
+
+        # evicted, but still serving the request
+        assert "a" not in manager
+        assert [] == tenants.closed
+        assert manager.guard() is not None
+        assert ["a", "b"] == tenants.built
+
+        with manager.activate("b"):
+            manager.evict("b")
+            assert [] == tenants.closed
+
+        assert ["b"] == tenants.closed
+
+    assert ["b", "a"] == tenants.closed
+    assert auth is not manager.tenant("a")
+
+
+def test_tenant_auth_manager_idle_eviction() -> None:
+    tenants = Tenants()
+    clock = Clock()
+    manager = TenantAuthManager(tenants, _resolve, idle_seconds=60, clock=clock)
+
+    manager.tenant("a")
+    clock.now = 30
+    manager.tenant("b")
+    clock.now = 70
+    manager.tenant("b")
+
+    assert ["a"] == tenants.closed
+    assert 1 == len(manager)
+
+
+def test_tenant_auth_manager_guard() -> None:
+    manager = TenantAuthManager(Tenants(), _resolve)
+
+    with pytest.raises(RuntimeError) as exc_info:
+        manager.guard()
+
+    assert "No tenant is active" == exc_info.value.args[0]
+
+    with manager.activate("acme"):
+        assert "acme" == manager.current
+        guard = t.cast(SessionGuard, manager.guard())
+
+    assert guard.name.startswith("login_acme_")
+    assert manager.current is None
+
+
+@pytest.mark.asyncio
+async def test_tenant_auth_manager_async_close() -> None:
+    closed: t.List[str] = []
+
+    def factory(tenant_id: str) -> AuthManager:
+        auth = AuthManager({})
+
+        @auth.on_close
+        async def close() -> None:
+            closed.append(tenant_id)
+
+        return auth
+
+    manager = TenantAuthManager(factory, _resolve, max_tenants=1)
+
+    manager.tenant("a")
+    manager.tenant("b")
+
+    await manager.async_close()
+
+    assert ["a", "b"] == sorted(closed)
+    assert 0 == len(manager)
+
+
+@pytest.mark.asyncio
+async def test_tenant_middleware() -> None:
+    manager = TenantAuthManager(Tenants(), _resolve)
+    seen: t.List[t.Any] = []
+
+    async def app(scope: t.Any, receive: t.Any, send: t.Any) -> None:
+        seen.append((scope['tenant'], manager.current))
+
+    middleware = TenantMiddleware(app, manager)
+
+    await middleware({'type': "http", 'headers': [(b"x-tenant", b"acme")]}, None, None) # type: ignore [arg-type]
+
+    assert [("acme", "acme")] == seen
+
+    messages: t.List[t.Any] = []
+
+    async def send(message: t.Any) -> None:
+        messages.append(message)
+
+    await middleware({'type': "http", 'headers': []}, None, send) # type: ignore [arg-type]
+
+    assert 404 == messages[0]['status']
+    assert 1 == len(seen)
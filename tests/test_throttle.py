@@ -0,0 +1,230 @@
+import typing as t
+import pytest
+
+from auth1 import (
+    ThrottleBackend,
+    InMemoryThrottleBackend,
+    LoginThrottler,
+    SessionGuard,
+    SessionStore,
+    NullSessionHandler,
+    UserProvider,
+    Authenticatable,
+    AuthenticatableRetval,
+    GenericUser
+)
+
+
+class FakeClock:
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingUserProvider(UserProvider):
+
+    retrieve_by_credentials_called: int = 0
+
+    def retrieve_by_id(self, id: str | int) -> AuthenticatableRetval:
+        return None
+
+    def retrieve_by_credentials(self, credentials: t.Dict[str, t.Any]) -> AuthenticatableRetval:
+        self.retrieve_by_credentials_called += 1
+        return GenericUser({'userid': credentials['username'], 'password': "Harianja710433!"})
+
+    def validate_credentials(self, user: Authenticatable, credentials: t.Dict[str, t.Any]) -> bool:
+        return credentials['password'] == user.password
+
+
+class AsyncThrottleBackend(ThrottleBackend):
+
+    def __init__(self, clock: FakeClock) -> None:
+        self._backend = InMemoryThrottleBackend(clock=clock)
+
+    async def hit(self, key: str, decay_seconds: float) -> float:
+        return self._backend.hit(key, decay_seconds)
+
+    async def lockout(self, key: str, seconds: float) -> None:
+        self._backend.lockout(key, seconds)
+
+    async def available_in(self, key: str) -> float:
+        return self._backend.available_in(key)
+
+    async def clear(self, key: str) -> None:
+        self._backend.clear(key)
+
+
+def test_in_memory_throttle_backend_sliding_window() -> None:
+    clock = FakeClock()
+    backend = InMemoryThrottleBackend(clock=clock)
+
+    assert isinstance(backend, ThrottleBackend)
+
+    assert 1 == backend.hit("key", 60)
+    assert 2 == backend.hit("key", 60)
+
+    # half way through the next window, half of the previous hits still count
+    clock.now += 90
+    assert 2 == backend.hit("key", 60)
+
+    clock.now += 1000
+    assert 1 == backend.hit("key", 60)
+
+
+def test_in_memory_throttle_backend_lockout() -> None:
+    clock = FakeClock()
+    backend = InMemoryThrottleBackend(clock=clock)
+
+    assert 0 == backend.available_in("key")
+
+    backend.lockout("key", 30)
+    assert 30 == backend.available_in("key")
+
+    clock.now += 10
+    assert 20 == backend.available_in("key")
+
+    backend.clear("key")
+    assert 0 == backend.available_in("key")
+
+
+def test_in_memory_throttle_backend_bounded() -> None:
+    clock = FakeClock()
+    backend = InMemoryThrottleBackend(max_keys=3, clock=clock)
+
+    for i in range(10):
+        backend.hit(f"key{i}", 60)
+
+    assert 3 == len(backend)
+
+
+def test_in_memory_throttle_backend_keeps_lockouts_when_full() -> None:
+    clock = FakeClock()
+    backend = InMemoryThrottleBackend(max_keys=3, clock=clock)
+
+    backend.hit("victim", 60)
+    backend.lockout("victim", 300)
+
+    # rotating keys evict each other instead of the lockout
+    for i in range(100):
+        backend.hit(f"key{i}", 60)
+
+    assert 3 == len(backend)
+    assert 300 == backend.available_in("victim")
+    assert 1 == backend.hit("key-new", 60)
+
+    backend.lockout("key-new", 60)
+
+    assert 0 == backend.available_in("key-other")
+    assert 60 == backend.available_in("key-new")
+    assert 300 == backend.available_in("victim")
+    assert (3, 99, 0) == backend.stats()
+
+    # only lockouts left, a new key is not tracked rather than locked out
+    backend.lockout("key-last", 60)
+
+    assert 0 == backend.hit("key-untracked", 60)
+    assert 0 == backend.available_in("key-untracked")
+    assert (3, 100, 1) == backend.stats()
+
+
+def test_login_throttler_full_backend_locks_out_no_bystander() -> None:
+    throttler = LoginThrottler(InMemoryThrottleBackend(max_keys=4, clock=FakeClock()), max_attempts=1)
+
+    for i in range(5):
+        throttler.hit({'username': f"user{i}"})
+
+    assert False == throttler.too_many_attempts({'username': "alice"})
+
+
+def test_in_memory_throttle_backend_prunes_expired() -> None:
+    clock = FakeClock()
+    backend = InMemoryThrottleBackend(max_keys=3, clock=clock)
+
+    backend.hit("a", 60)
+    backend.hit("b", 60)
+    backend.lockout("b", 300)
+
+    # a expires after two windows, b is still locked out
+    clock.now += 120
+    backend.hit("c", 60)
+
+    assert 2 == len(backend)
+    assert 180 == backend.available_in("b")
+
+    clock.now += 60
+    backend.hit("c", 60)
+
+    clock.now += 200
+    backend.hit("d", 60)
+
+    assert 1 == len(backend)
+
+
+def test_login_throttler() -> None:
+    clock = FakeClock()
+    throttler = LoginThrottler(InMemoryThrottleBackend(clock=clock), max_attempts=3, client_max_attempts=5, decay_seconds=60)
+
+    credentials = {'username': "Harianja", 'password': "wrong"}
+
+    for _ in range(2):
+        throttler.hit(credentials, "10.0.0.1")
+
+    assert False == throttler.too_many_attempts(credentials, "10.0.0.1")
+
+    throttler.hit(credentials, "10.0.0.1")
+
+    assert True == throttler.too_many_attempts(credentials, "10.0.0.1")
+    assert True == throttler.too_many_attempts({'username': "harianja "})
+    assert 60 == throttler.available_in(credentials)
+
+    # the client address is still below its own limit
+    assert False == throttler.too_many_attempts({'username': "other"}, "10.0.0.1")
+
+    clock.now += 61
+    assert False == throttler.too_many_attempts(credentials, "10.0.0.1")
+
+
+def test_session_guard_attempt_throttled() -> None:
+    clock = FakeClock()
+    user_provider = CountingUserProvider()
+    throttler = LoginThrottler(InMemoryThrottleBackend(clock=clock), max_attempts=2, decay_seconds=60)
+
+    guard = SessionGuard("horas", user_provider, SessionStore("auth1", NullSessionHandler(), id="12345"), throttler=throttler)
+    guard.set_client_address("10.0.0.1")
+
+    credentials = {'username': "harianja", 'password': "wrong"}
+
+    assert False == guard.attempt(credentials)
+    assert False == guard.attempt(credentials)
+    assert 2 == user_provider.retrieve_by_credentials_called
+
+    # locked out keys never reach the provider
+    assert False == guard.attempt({'username': "harianja", 'password': "Harianja710433!"})
+    assert 2 == user_provider.retrieve_by_credentials_called
+
+    clock.now += 61
+
+    assert True == guard.attempt({'username': "harianja", 'password': "Harianja710433!"})
+    assert 0 == throttler.backend.available_in("login:id:harianja")
+
+
+@pytest.mark.asyncio
+async def test_session_guard_async_attempt_throttled() -> None:
+    clock = FakeClock()
+    user_provider = CountingUserProvider()
+    throttler = LoginThrottler(AsyncThrottleBackend(clock), max_attempts=1, decay_seconds=60)
+
+    guard = SessionGuard("horas", user_provider, SessionStore("auth1", NullSessionHandler(), id="12345"), throttler=throttler)
+
+    assert False == await guard.async_attempt({'username': "harianja", 'password': "wrong"})
+    assert False == await guard.async_attempt({'username': "harianja", 'password': "Harianja710433!"})
+    assert 1 == user_provider.retrieve_by_credentials_called
+    assert 60 == await throttler.async_available_in({'username': "harianja"})
+
+    with pytest.raises(TypeError) as exc_info:
+        throttler.too_many_attempts({'username': "harianja"})
+
+    assert "Cannot use awaitable return value from throttle backend" == exc_info.value.args[0]
@@ -0,0 +1,140 @@
+import typing as t
+import pytest
+
+from auth1 import (
+    Guard,
+    TokenGuard,
+    TTLCache,
+    UserProvider,
+    Authenticatable,
+    AuthenticatableRetval,
+    GenericUser,
+    hash_token
+)
+
+from ._helpers import FakeRequest
+
+
+class TokenUserProvider(UserProvider):
+
+    def __init__(self, _async: bool = False) -> None:
+        self._async = _async
+        self.lookups: t.List[str] = []
+        self.tokens = {hash_token("secret-token"): GenericUser({'userid': "harianja", 'password': ""})}
+
+    def retrieve_by_id(self, id: str | int) -> AuthenticatableRetval:
+        return None
+
+    def retrieve_by_credentials(self, credentials: t.Dict[str, t.Any]) -> AuthenticatableRetval:
+        return None
+
+    def validate_credentials(self, user: Authenticatable, credentials: t.Dict[str, t.Any]) -> bool:
+        return False
+
+    def retrieve_by_token_hash(self, token_hash: str) -> AuthenticatableRetval:
+        self.lookups.append(token_hash)
+        if self._async:
+            return self._async_retrieve(token_hash)
+        return self.tokens.get(token_hash, None)
+
+    async def _async_retrieve(self, token_hash: str) -> Authenticatable | None:
+        return self.tokens.get(token_hash, None)
+
+
+class FakeClock:
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_guard_reads_token() -> None:
+    guard = TokenGuard("api", TokenUserProvider())
+
+    assert isinstance(guard, Guard)
+    assert guard.get_token_for_request() is None
+
+    guard.set_request(FakeRequest(headers={'authorization': "Bearer secret-token"}))
+    assert "secret-token" == guard.get_token_for_request()
+
+    guard.set_request(FakeRequest(headers={'Authorization': "Basic abc"}, query={'api_token': "query-token"}))
+    assert "query-token" == guard.get_token_for_request()
+
+    guard.set_request(FakeRequest(headers={'authorization': "Bearer  "}))
+    assert guard.get_token_for_request() is None
+
+
+def test_token_guard_user() -> None:
+    user_provider = TokenUserProvider()
+
+    guard = TokenGuard("api", user_provider, FakeRequest(headers={'authorization': "Bearer secret-token"}))
+
+    user = guard.user()
+
+    assert user is not None
+    assert "harianja" == user.identifier
+    assert guard.user() is user
+
+    # the provider only ever sees the hash of the token
+    assert [hash_token("secret-token")] == user_provider.lookups
+
+    guard = TokenGuard("api", user_provider, FakeRequest(query={'api_token': "wrong"}))
+    assert guard.user() is None
+
+
+def test_token_guard_verification_cache() -> None:
+    clock = FakeClock()
+    cache: TTLCache[str, Authenticatable] = TTLCache(ttl=10, clock=clock)
+    user_provider = TokenUserProvider()
+    request = FakeRequest(headers={'authorization': "Bearer secret-token"})
+
+    for _ in range(3):
+        assert TokenGuard("api", user_provider, request, cache=cache).user() is not None
+
+    assert 1 == len(user_provider.lookups)
+
+    # failed lookups are never cached
+    for _ in range(2):
+        assert TokenGuard("api", user_provider, FakeRequest(query={'api_token': "wrong"}), cache=cache).user() is None
+
+    assert 3 == len(user_provider.lookups)
+
+    clock.now += 11
+    assert TokenGuard("api", user_provider, request, cache=cache).user() is not None
+    assert 4 == len(user_provider.lookups)
+
+    TokenGuard("api", user_provider, cache=cache).forget("secret-token")
+    assert TokenGuard("api", user_provider, request, cache=cache).user() is not None
+    assert 5 == len(user_provider.lookups)
+
+
+@pytest.mark.asyncio
+async def test_token_guard_async_user() -> None:
+    cache: TTLCache[str, Authenticatable] = TTLCache(ttl=10)
+    user_provider = TokenUserProvider(_async=True)
+    request = FakeRequest(headers={'authorization': "Bearer secret-token"})
+
+    user = await TokenGuard("api", user_provider, request, cache=cache).async_user()
+
+    assert user is not None
+    assert user is await TokenGuard("api", user_provider, request, cache=cache).async_user()
+    assert 1 == len(user_provider.lookups)
+
+    with pytest.raises(ValueError) as exc_info:
+        TokenGuard("api", user_provider, FakeRequest(query={'api_token': "other"}), cache=cache).user()
+
+    assert "Cannot use awaitable return value from user provider" == exc_info.value.args[0]
+
+
+def test_ttl_cache_bounded() -> None:
+    cache: TTLCache[str, int] = TTLCache(ttl=10, maxsize=2)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+
+    assert 2 == len(cache)
+    assert cache.get("a") is None
+    assert 3 == cache.get("c")
@@ -1,7 +1,7 @@
 import pytest
 import typing as t
 
-from auth1 import Authenticatable, GenericUser
+from auth1 import Authenticatable, GenericUser, SlotUser, make_user_class
 
 def test_user_provider()->None:
     pass
@@ -49,3 +49,70 @@ def test_generic_user() -> None:
         user.non_existence_attribute
 
     assert "GenericUser object has no attribute non_existence_attribute" == exc_info.value.args[0]
+
+
+def test_make_user_class() -> None:
+    AppUser = make_user_class("AppUser", ["email", "name"])
+
+    user = AppUser({
+        'userid': "harianja",
+        'password': "Password123!",
+        'email': "harianja@lundu.com"
+    })
+
+    assert isinstance(user, Authenticatable)
+    assert isinstance(user, SlotUser)
+    assert not hasattr(user, "__dict__")
+
+    assert "userid" == user.identifier_name
+    assert "harianja" == user.identifier
+    assert "Password123!" == user.password
+    assert user.remember_token is None
+    assert "harianja@lundu.com" == user.email
+    assert user.name is None
+
+    user.remember_token = "abcdef"
+
+    assert "abcdef" == user.remember_token
+    assert ("harianja", "Password123!", "abcdef", "harianja@lundu.com", None) == user.to_tuple()
+    assert {'userid': "harianja", 'password': "Password123!", 'remember_token': "abcdef", 'email': "harianja@lundu.com", 'name': None} == user.to_dict()
+
+    with pytest.raises(AttributeError):
+        user.non_existence_attribute
+
+
+def test_make_user_class_tuple_round_trip() -> None:
+    AppUser = make_user_class("AppUser", ["email"], identifier_name="username", remember_token_name=None)
+
+    user = AppUser.from_tuple(("harianja", "Password123!", "harianja@lundu.com"))
+
+    assert "harianja" == user.identifier
+    assert user.remember_token is None
+    assert user == AppUser.from_tuple(user.to_tuple())
+
+    with pytest.raises(ValueError) as exc_info:
+        AppUser.from_tuple(("harianja",))
+
+    assert "AppUser expects 3 values, got 1" == exc_info.value.args[0]
+
+
+def test_make_user_class_fallback() -> None:
+    AppUser = make_user_class("AppUser", ["email"], identifier_name="username")
+
+    user = AppUser.build({'username': "harianja", 'password': "Password123!", 'email': "harianja@lundu.com"})
+    assert isinstance(user, AppUser)
+
+    # unknown fields fall back to a dict backed user with the same schema names
+    user = AppUser.build({'username': "harianja", 'password': "Password123!", 'phone': "0812"})
+
+    assert isinstance(user, GenericUser)
+    assert "username" == user.identifier_name
+    assert "harianja" == user.identifier
+    assert "0812" == user.phone
+
+
+def test_make_user_class_invalid_field() -> None:
+    for field in ["identifier", "to_tuple", "_private", "not-valid", "fields", "fallback", "identifier_name"]:
+        with pytest.raises(ValueError) as exc_info:
+            make_user_class("AppUser", [field])
+        assert f"Invalid user field `{field}`" == exc_info.value.args[0]